@@ -0,0 +1,359 @@
+"""Agregat ringkas untuk semua tab analisis.
+
+Agregat dapat dibangun dari seluruh DataFrame sekaligus atau dilipat
+potongan demi potongan, sehingga memori tidak bergantung pada jumlah baris.
+"""
+import numpy as np
+import pandas as pd
+
+from calendar_features import PERIOD_LABELS, PERIOD_OF_HOUR, day_dates
+from dimensions import Dimensions
+from profiling import stage
+
+# Batas histogram durasi per detik (3 jam); durasi lebih panjang masuk bin terakhir
+MAX_DURATION_SECONDS = 3 * 60 * 60
+
+# Versi struktur agregat untuk cache di disk; naikkan bila atribut berubah
+AGGREGATES_VERSION = 6
+
+# Dimensi kubus waktu (kode integer); hari_ke dan akhir_pekan ditentukan oleh tanggal
+CUBE_KEYS = ['tanggal', 'jam', 'hari_ke', 'akhir_pekan']
+
+# Dimensi kubus pemutaran untuk analisis skip, shuffle, dan alasan mulai/selesai
+PLAYBACK_KEYS = ['jam', 'perangkat', 'shuffle', 'reason_start', 'reason_end']
+
+
+def _fold(current, new):
+    """Menjumlahkan dua tabel agregat dengan indeks yang mungkin berbeda."""
+    if current is None:
+        return new
+    combined = pd.concat([current, new])
+    return combined.groupby(level=list(range(combined.index.nlevels)), observed=True).sum()
+
+
+def _totals(chunk, keys, minutes):
+    """Jumlah pemutaran dan menit per kombinasi kolom ``keys``."""
+    return minutes.groupby([chunk[key] for key in keys], observed=True).agg(plays='size', menit='sum')
+
+
+# Kolom tabel lagu berindeks kunci string (sketsa) dan cara melipatnya antar potongan
+TRACK_FOLD = {
+    'track_name': 'first', 'artist_name': 'first', 'plays': 'sum', 'menit': 'sum',
+    'skips': 'sum', 'first_ts': 'min', 'last_ts': 'max'
+}
+
+
+def playback_totals(chunk):
+    """Jumlah pemutaran dan skip per kombinasi PLAYBACK_KEYS dalam satu groupby."""
+    return chunk['skipped'].groupby([chunk[key] for key in PLAYBACK_KEYS], observed=True).agg(
+        plays='size', skips='sum'
+    )
+
+
+def entity_table(keys, plays, menit, skips, first_ts=None, last_ts=None):
+    """Total per kunci surrogate (artis atau lagu) dengan ``np.bincount``; hanya kunci yang muncul, urut kunci.
+
+    ``first_ts`` dan ``last_ts`` (int64 ns) menambahkan waktu putar pertama dan terakhir per kunci.
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    n = int(keys.max()) + 1 if len(keys) else 0
+    counts = np.bincount(keys, weights=plays, minlength=n)
+    present = np.flatnonzero(counts > 0)
+    table = pd.DataFrame({
+        'plays': counts[present].astype(np.int64),
+        'menit': np.bincount(keys, weights=menit, minlength=n)[present],
+        'skips': np.bincount(keys, weights=skips, minlength=n)[present].astype(np.int64),
+    }, index=pd.Index(present.astype(np.int32), name='key'))
+    if first_ts is not None:
+        first = np.full(n, np.iinfo(np.int64).max)
+        last = np.full(n, np.iinfo(np.int64).min)
+        np.minimum.at(first, keys, first_ts)
+        np.maximum.at(last, keys, last_ts)
+        table['first_ts'] = first[present].view('datetime64[ns]')
+        table['last_ts'] = last[present].view('datetime64[ns]')
+    return table
+
+
+def _fold_entities(current, new):
+    """Melipat dua tabel ``entity_table`` dengan kunci dari dimensi yang sama."""
+    if current is None:
+        return new
+    both = pd.concat([current, new])
+    ts = [both[name].to_numpy().view('int64') for name in ('first_ts', 'last_ts')] if 'first_ts' in both else []
+    return entity_table(both.index, both['plays'], both['menit'], both['skips'], *ts)
+
+
+def _remap(table, mapping):
+    """Tabel entitas dengan kunci diganti lewat ``mapping`` (kunci lama -> kunci baru)."""
+    return table.set_axis(pd.Index(mapping[table.index.to_numpy()], name=table.index.name))
+
+
+def _chunk_columns(chunk, minutes):
+    """Pemutaran (1 per baris), menit, skip, dan ts (int64 ns) per baris sebagai array."""
+    skips = chunk['skipped'].to_numpy().astype(np.float64) if 'skipped' in chunk else np.zeros(len(chunk))
+    ts = chunk['ts'].to_numpy().astype('datetime64[ns]').view('int64')
+    return np.ones(len(chunk)), np.asarray(minutes, dtype=np.float64), skips, ts
+
+
+def _top_keys(values, labels, n):
+    """Kunci ``n`` nilai teratas dari Series berindeks kunci.
+
+    Nilai yang sama diurutkan menurut label (``labels(kunci)``), seperti
+    ``ORDER BY nilai DESC, label`` di SQL, sehingga hasilnya tidak bergantung
+    pada urutan kunci. Label hanya diambil untuk kandidat.
+    """
+    candidates = values.nlargest(n, keep='all')
+    names = labels(candidates.index)
+    order = sorted(range(len(candidates)), key=lambda i: (-candidates.iat[i], names[i]))[:n]
+    return candidates.index[order], names[order]
+
+
+def track_totals(chunk, minutes):
+    """Total per lagu dalam satu potongan, berindeks kunci lagu (string), beserta judul dan artis.
+
+    Baris dikelompokkan dengan kunci integer sementara; judul dan artis
+    diambil dari baris pertama setiap lagu.
+    """
+    dims = Dimensions()
+    _, track = dims.encode(chunk)
+    plays, menit, skips, ts = _chunk_columns(chunk, minutes)
+    table = entity_table(track, plays, menit, skips, ts, ts)
+    names = dims.track_table(table.index)
+    return pd.concat([names, table.set_axis(names.index)], axis=1)[list(TRACK_FOLD)]
+
+
+class ListeningAggregates:
+    """Ringkasan riwayat mendengarkan yang dibutuhkan tab-tab dashboard.
+
+    Intinya adalah kubus kecil (tanggal x jam x hari x akhir pekan) berisi
+    jumlah pemutaran dan menit, ditambah total per artis dan per lagu dan
+    kubus pemutaran (jam x perangkat x shuffle x alasan mulai x alasan
+    selesai) berisi jumlah pemutaran dan skip.
+    Semua grafik waktu diturunkan dari kubus sehingga biaya render tidak
+    bergantung pada jumlah baris.
+
+    Tabel artis dan lagu berindeks kunci int32 dari ``dims``; nama baru
+    digabung kembali untuk N teratas.
+    """
+
+    def __init__(self):
+        # Hash isi unggahan asal, dipakai sebagai kunci memo grafik
+        self.dataset_key = None
+        # Zona waktu fitur kalender (None = UTC)
+        self.tz = None
+        self.total_plays = 0
+        self.total_minutes = 0.0
+        self.first_ts = None
+        self.last_ts = None
+        self.cube = None
+        self.playback = None
+        # Dimensi nama; artists dan tracks berindeks kunci int32 ke dims
+        self.dims = Dimensions()
+        self.artists = None
+        self.tracks = None
+        self.duration_category_plays = None
+        self.duration_seconds = np.zeros(MAX_DURATION_SECONDS + 1, dtype=np.int64)
+        self.longest_plays = None
+
+    @classmethod
+    def from_frame(cls, data, tz=None):
+        """Membangun agregat dari DataFrame yang sudah dibersihkan."""
+        agg = cls()
+        agg.tz = tz
+        agg.update(data)
+        return agg
+
+    @classmethod
+    def from_chunks(cls, chunks, tz=None):
+        """Membangun agregat dari iterator potongan DataFrame."""
+        agg = cls()
+        agg.tz = tz
+        for chunk in chunks:
+            agg.update(chunk)
+        return agg
+
+    def update(self, chunk):
+        """Melipat satu potongan data yang sudah dibersihkan ke dalam agregat."""
+        if len(chunk) == 0:
+            return self
+        with stage('aggregate', rows=len(chunk)):
+            return self._update(chunk)
+
+    def _update(self, chunk):
+        self.total_plays += len(chunk)
+        self.total_minutes += float(chunk['ms_played'].sum()) / (1000 * 60)
+
+        ts_min, ts_max = chunk['ts'].min(), chunk['ts'].max()
+        self.first_ts = ts_min if self.first_ts is None else min(self.first_ts, ts_min)
+        self.last_ts = ts_max if self.last_ts is None else max(self.last_ts, ts_max)
+
+        # Menit dijumlahkan dalam float64 agar total besar tetap presisi
+        minutes = chunk['ms_played'].astype('float64') / (1000 * 60)
+
+        # Kubus waktu
+        self.cube = _fold(self.cube, _totals(chunk, CUBE_KEYS, minutes))
+
+        # Kubus pemutaran: skip, shuffle, perangkat, dan alasan
+        self.playback = _fold(self.playback, playback_totals(chunk))
+
+        # Artis dan lagu
+        self._update_entities(chunk, minutes)
+
+        # Durasi
+        self.duration_category_plays = _fold(
+            self.duration_category_plays, chunk['kategori_durasi'].value_counts()
+        )
+        seconds = (chunk['ms_played'].to_numpy() // 1000).clip(0, MAX_DURATION_SECONDS)
+        self.duration_seconds += np.bincount(seconds.astype(np.int64), minlength=MAX_DURATION_SECONDS + 1)
+
+        self._keep_longest(chunk.nlargest(10, 'menit_diputar')[['track_name', 'artist_name', 'menit_diputar']])
+
+        return self
+
+    def _update_entities(self, chunk, minutes):
+        """Melipat total per artis dan per lagu dari satu potongan."""
+        artist, track = self.dims.encode(chunk)
+        plays, menit, skips, ts = _chunk_columns(chunk, minutes)
+        self.artists = _fold_entities(self.artists, entity_table(artist, plays, menit, skips))
+        self.tracks = _fold_entities(self.tracks, entity_table(track, plays, menit, skips, ts, ts))
+
+    def _keep_longest(self, longest):
+        # Nama sebagai string: kolom kategori membawa seluruh kamus kategori potongannya
+        longest = longest.astype({'track_name': str, 'artist_name': str})
+        if self.longest_plays is not None:
+            longest = pd.concat([self.longest_plays, longest]).nlargest(10, 'menit_diputar')
+        self.longest_plays = longest.reset_index(drop=True)
+
+    def merge(self, other):
+        """Menggabungkan agregat riwayat lain, misalnya file atau pengguna lain, ke agregat ini.
+
+        Kedua riwayat dianggap tidak tumpang tindih; pemutaran yang sama di
+        keduanya terhitung dua kali.
+        """
+        if other.total_plays == 0:
+            return self
+        if self.tz != other.tz:
+            raise ValueError(f"Zona waktu agregat berbeda: {self.tz} dan {other.tz}")
+
+        self.total_plays += other.total_plays
+        self.total_minutes += other.total_minutes
+        self.first_ts = other.first_ts if self.first_ts is None else min(self.first_ts, other.first_ts)
+        self.last_ts = other.last_ts if self.last_ts is None else max(self.last_ts, other.last_ts)
+
+        self.cube = _fold(self.cube, other.cube)
+        self.playback = _fold(self.playback, other.playback)
+        self._merge_entities(other)
+        self.duration_category_plays = _fold(self.duration_category_plays, other.duration_category_plays)
+        self.duration_seconds += other.duration_seconds
+        self._keep_longest(other.longest_plays)
+        return self
+
+    def _merge_entities(self, other):
+        artist_map, track_map = self.dims.merge(other.dims)
+        self.artists = _fold_entities(self.artists, _remap(other.artists, artist_map))
+        self.tracks = _fold_entities(self.tracks, _remap(other.tracks, track_map))
+
+    # Tampilan turunan dari kubus
+
+    def totals_by(self, *keys):
+        """Total pemutaran dan menit dari kubus per kombinasi ``keys``."""
+        return self.cube.groupby(list(keys)).sum()
+
+    def hourly(self):
+        """Pemutaran dan menit per jam (0-23)."""
+        return self.totals_by('jam').reindex(range(24), fill_value=0)
+
+    def weekday(self):
+        """Pemutaran dan menit per hari, 0 = Senin."""
+        return self.totals_by('hari_ke').reindex(range(7), fill_value=0)
+
+    def weekday_hour_plays(self):
+        """Matriks pemutaran hari (baris, 0 = Senin) x jam (kolom)."""
+        plays = self.totals_by('hari_ke', 'jam')['plays'].unstack(fill_value=0)
+        return plays.reindex(index=range(7), columns=range(24), fill_value=0)
+
+    def weekend_hourly_plays(self, weekend):
+        """Pemutaran per jam untuk akhir pekan (True) atau hari kerja (False)."""
+        plays = self.totals_by('akhir_pekan', 'jam')['plays']
+        if weekend not in plays.index.get_level_values('akhir_pekan'):
+            return pd.Series(dtype='int64')
+        return plays.xs(weekend, level='akhir_pekan')
+
+    def period_plays(self):
+        """Pemutaran per periode waktu, mengikuti batas jam di calendar_features."""
+        plays = np.bincount(PERIOD_OF_HOUR, weights=self.hourly()['plays'], minlength=len(PERIOD_LABELS))
+        return pd.Series(plays.astype(np.int64), index=PERIOD_LABELS)
+
+    def date_plays(self):
+        """Pemutaran per tanggal yang memiliki aktivitas, berindeks tanggal."""
+        plays = self.totals_by('tanggal')['plays']
+        plays.index = day_dates(plays.index)
+        return plays
+
+    def playback_by(self, *keys):
+        """Pemutaran, skip, dan tingkat skip dari kubus pemutaran per kombinasi ``keys``."""
+        totals = self.playback.groupby(list(keys), observed=True).sum()
+        totals['skip_rate'] = totals['skips'] / totals['plays']
+        return totals
+
+    def top_artists(self, n=15, by='plays'):
+        """N artis teratas menurut ``by`` ('plays' atau 'menit')."""
+        keys, names = _top_keys(self.artists[by], self.dims.artist_names, n)
+        return self.artists.loc[keys, by].set_axis(pd.Index(names.astype(str), name='artist_name'))
+
+    def top_artist_skips(self, n=15):
+        """Pemutaran, skip, dan tingkat skip N artis teratas menurut pemutaran."""
+        keys, names = _top_keys(self.artists['plays'], self.dims.artist_names, n)
+        top = self.artists.loc[keys, ['plays', 'skips']].set_axis(pd.Index(names.astype(str), name='artist_name'))
+        top['skip_rate'] = top['skips'] / top['plays']
+        return top
+
+    def error_bounds(self):
+        """Batas galat angka perkiraan per metrik; kosong karena semua angka di sini eksak."""
+        return {}
+
+    @property
+    def n_artists(self):
+        return len(self.artists)
+
+    @property
+    def n_tracks(self):
+        """Jumlah judul lagu unik."""
+        return len(np.unique(self.dims.track_title[self.tracks.index.to_numpy()]))
+
+    def top_tracks(self, n=15, by='plays'):
+        """N lagu teratas beserta menit, tingkat skip, dan waktu putar pertama/terakhir."""
+        keys, _ = _top_keys(self.tracks[by], self.dims.tracks.take, n)
+        names = self.dims.track_table(keys)
+        top = pd.concat([names, self.tracks.loc[keys].set_axis(names.index)], axis=1)[list(TRACK_FOLD)]
+        top['skip_rate'] = top['skips'] / top['plays']
+        return top
+
+    @property
+    def mean_minutes(self):
+        """Durasi rata-rata per pemutaran dalam menit."""
+        return self.total_minutes / self.total_plays if self.total_plays else 0.0
+
+    @property
+    def median_minutes(self):
+        """Median durasi dalam menit, dihitung dari histogram per detik."""
+        if not self.total_plays:
+            return 0.0
+        cumulative = np.cumsum(self.duration_seconds)
+        second = int(np.searchsorted(cumulative, self.total_plays / 2))
+        return (second + 0.5) / 60
+
+    @property
+    def total_days(self):
+        """Rentang hari kalender (lokal) dari pemutaran pertama hingga terakhir."""
+        days = self.cube.index.get_level_values('tanggal')
+        return int(days.max() - days.min()) + 1
+
+    def duration_histogram(self, max_minutes=10, nbins=50):
+        """Histogram durasi 0..max_minutes menit sebagai (tepi kiri bin dalam menit, jumlah)."""
+        width = max_minutes * 60 // nbins
+        counts = np.add.reduceat(
+            self.duration_seconds[:max_minutes * 60], np.arange(0, max_minutes * 60, width)
+        )
+        edges = np.arange(len(counts)) * width / 60
+        return edges, counts
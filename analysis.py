@@ -0,0 +1,322 @@
+"""Perhitungan setiap bagian analisis tanpa Streamlit maupun Plotly.
+
+Setiap fungsi menerima ``ListeningAggregates`` (atau tabel sesi, rangkaian
+beruntun) dan mengembalikan dict berisi angka, Series, dan DataFrame.
+Aplikasi Streamlit dan CLI laporan (report.py) memakai fungsi yang sama;
+grafik dibangun terpisah di figures.py.
+"""
+import numpy as np
+import pandas as pd
+
+from calendar_features import DAY_LABELS, day_dates, localize
+from downsample import downsample_series
+from streaks import BINGE_MIN_PLAYS, day_runs
+
+
+def artist_analysis(agg):
+    """Artis teratas menurut jumlah pemutaran dan menurut waktu mendengarkan."""
+    top_artists = agg.top_artists(15)
+    return {
+        'top_artists': top_artists,
+        'artist_time': agg.top_artists(10, by='menit'),
+        'top_artist': top_artists.index[0],
+        'top_plays': top_artists.iloc[0],
+    }
+
+
+def song_analysis(agg):
+    """Lagu teratas beserta tabel detail 10 besar."""
+    top_songs = agg.top_tracks(15)
+    detail = top_songs.head(10)
+    detail_data = pd.DataFrame({
+        'Ranking': range(1, len(detail) + 1),
+        'Lagu': detail['track_name'].values,
+        'Artis': detail['artist_name'].values,
+        'Jumlah Pemutaran': detail['plays'].values,
+        'Total Waktu (menit)': detail['menit'].values,
+        'Tingkat Skip': detail['skip_rate'].values,
+        'Pertama Diputar': localize(detail['first_ts'], agg.tz).values,
+        'Terakhir Diputar': localize(detail['last_ts'], agg.tz).values,
+    })
+
+    top_song, top_artist, top_song_plays = top_songs.iloc[0][['track_name', 'artist_name', 'plays']]
+    return {
+        'top_songs': top_songs[['track_name', 'artist_name', 'plays']].reset_index(drop=True),
+        'detail': detail_data,
+        'top_song': top_song,
+        'top_artist': top_artist,
+        'top_song_plays': top_song_plays,
+    }
+
+
+def time_analysis(agg):
+    """Pola per jam, per hari, hari x jam, dan per periode waktu."""
+    hourly_listening = agg.hourly()['plays']
+    daily_listening = agg.weekday()['plays']
+    daily_listening.index = DAY_LABELS
+
+    heatmap = agg.weekday_hour_plays()
+    heatmap.index = DAY_LABELS
+
+    periode_listening = agg.period_plays()
+    peak_hour = hourly_listening.idxmax()
+    return {
+        'hourly': hourly_listening,
+        'daily': daily_listening,
+        'heatmap': heatmap,
+        'period': periode_listening,
+        'peak_hour': peak_hour,
+        'peak_hour_plays': hourly_listening[peak_hour],
+        'peak_day': daily_listening.idxmax(),
+        'peak_day_plays': daily_listening.max(),
+        'peak_period': periode_listening.idxmax(),
+        'peak_period_plays': periode_listening.max(),
+        'weekend_sessions': agg.weekend_hourly_plays(True).sum(),
+        'weekday_sessions': agg.weekend_hourly_plays(False).sum(),
+    }
+
+
+def duration_analysis(agg):
+    """Statistik durasi, histogram 0-10 menit, kategori, dan pemutaran terpanjang."""
+    bin_edges, bin_counts = agg.duration_histogram(max_minutes=10, nbins=50)
+    duration_dist = agg.duration_category_plays.sort_values(ascending=False)
+
+    hourly = agg.hourly()
+    weekday = agg.weekday()
+    daily_duration = weekday['menit'] / weekday['plays']
+    daily_duration.index = DAY_LABELS
+
+    category_detail = pd.DataFrame({
+        'Kategori': duration_dist.index.astype(str),
+        'Jumlah Pemutaran': duration_dist.values,
+        'Persentase': duration_dist.values / agg.total_plays * 100,
+    })
+
+    longest = agg.longest_plays[['track_name', 'artist_name', 'menit_diputar']].reset_index(drop=True)
+    longest.index = longest.index + 1
+    return {
+        'rata_rata_menit': agg.mean_minutes,
+        'median_menit': agg.median_minutes,
+        'total_jam': agg.total_minutes / 60,
+        'histogram': pd.DataFrame({'menit': bin_edges, 'jumlah': bin_counts}),
+        'categories': duration_dist,
+        'hourly_duration': hourly['menit'] / hourly['plays'],
+        'daily_duration': daily_duration,
+        'category_detail': category_detail,
+        'longest_plays': longest,
+    }
+
+
+def pattern_analysis(agg):
+    """Konsistensi harian, tren (disusutkan), dan pola hari kerja vs akhir pekan."""
+    daily_activity = agg.date_plays()
+    days_with_music = len(daily_activity)
+    weekend_hourly = agg.weekend_hourly_plays(True)
+    weekday_hourly = agg.weekend_hourly_plays(False)
+    return {
+        'days_with_music': days_with_music,
+        'total_days': agg.total_days,
+        'consistency': (days_with_music / agg.total_days) * 100,
+        'artist_diversity': agg.n_artists,
+        'trend': downsample_series(daily_activity),
+        'plays_per_day': daily_activity.value_counts().sort_index(),
+        'weekday_hourly': weekday_hourly,
+        'weekend_hourly': weekend_hourly,
+        'weekday_peak': weekday_hourly.idxmax() if len(weekday_hourly) > 0 else 0,
+        'weekend_peak': weekend_hourly.idxmax() if len(weekend_hourly) > 0 else 0,
+        'most_active_day': daily_activity.idxmax(),
+        'max_sessions': daily_activity.max(),
+    }
+
+
+def _skip_table(totals, labels=None):
+    """Tabel pemutaran, skip, dan tingkat skip dengan label indeks yang mudah dibaca."""
+    totals = totals[totals['plays'] > 0][['plays', 'skips', 'skip_rate']]
+    totals.index = totals.index.astype(str) if labels is None else totals.index.map(labels)
+    return totals
+
+
+def _reason_matrix(values, fill_value=None):
+    """Matriks alasan mulai x selesai dengan label terurut abjad di kedua sumbu.
+
+    Urutan masukan berbeda antar mode (kode kategori, urutan baris SQL), jadi
+    diurutkan agar semua mode menampilkan matriks yang sama.
+    """
+    matrix = values.unstack(fill_value=fill_value)
+    matrix.index = matrix.index.astype(str)
+    matrix.columns = matrix.columns.astype(str)
+    return matrix.sort_index().sort_index(axis=1)
+
+
+def playback_analysis(agg):
+    """Tingkat skip per jam, perangkat, shuffle, artis, dan lagu, serta transisi alasan mulai -> selesai."""
+    shuffle = agg.playback_by('shuffle')
+    total_plays, total_skips = shuffle['plays'].sum(), shuffle['skips'].sum()
+
+    hourly = agg.playback_by('jam')['skip_rate'].reindex(range(24))
+    # Jumlah sama diurutkan menurut nama agar urutan sama di semua mode
+    devices = _skip_table(agg.playback_by('perangkat')).sort_index()
+    devices = devices.sort_values('plays', ascending=False, kind='stable')
+    shuffle = _skip_table(shuffle, {False: 'Berurutan', True: 'Shuffle'})
+
+    reasons = agg.playback_by('reason_start', 'reason_end')
+    transitions = _reason_matrix(reasons['plays'], fill_value=0)
+    transition_skip_rate = _reason_matrix(reasons['skip_rate'])
+
+    artists = agg.top_artist_skips(15)
+    tracks = agg.top_tracks(15)[['track_name', 'artist_name', 'plays', 'skip_rate']].reset_index(drop=True)
+    return {
+        'skip_rate': total_skips / total_plays if total_plays else 0.0,
+        'total_skips': total_skips,
+        'shuffle_share': shuffle['plays'].get('Shuffle', 0) / total_plays if total_plays else 0.0,
+        'hourly': hourly,
+        'peak_skip_hour': hourly.idxmax() if hourly.notna().any() else 0,
+        'devices': devices,
+        'shuffle': shuffle,
+        'transitions': transitions,
+        'transition_share': transitions.div(transitions.sum(axis=1), axis=0),
+        'transition_skip_rate': transition_skip_rate,
+        'artists': artists,
+        'most_skipped_artist': artists['skip_rate'].idxmax() if len(artists) else None,
+        'tracks': tracks,
+    }
+
+
+def session_analysis(sessions, tz=None):
+    """Statistik sesi, histogram durasi 0-4 jam, lagu per sesi, dan sesi terpanjang."""
+    counts, edges = np.histogram(sessions['durasi_menit'].clip(upper=240), bins=48, range=(0, 240))
+    longest = sessions.nlargest(5, 'durasi_menit')[['mulai', 'durasi_menit', 'jumlah_lagu', 'porsi_skip']]
+    longest['mulai'] = localize(longest['mulai'], tz)
+    longest.index = range(1, len(longest) + 1)
+    return {
+        'n_sessions': len(sessions),
+        'median_duration': sessions['durasi_menit'].median(),
+        'mean_tracks': sessions['jumlah_lagu'].mean(),
+        'skip_share': (sessions['porsi_skip'] * sessions['jumlah_lagu']).sum() / sessions['jumlah_lagu'].sum(),
+        'length_histogram': pd.DataFrame({'menit': edges[:-1], 'jumlah': counts}),
+        'tracks_per_session': sessions['jumlah_lagu'].clip(upper=50).value_counts().sort_index(),
+        'longest_sessions': longest,
+    }
+
+
+def streak_analysis(streaks, start_date=None, end_date=None, min_binge=BINGE_MIN_PLAYS, n=10):
+    """Hari beruntun, lagu yang paling sering diulang berturut-turut, dan binge artis.
+
+    Dihitung dari run yang sudah disimpan ``ListeningStreaks``; ``start_date``
+    dan ``end_date`` membatasi ke run yang dimulai dalam rentang tanggal.
+    Binge adalah run artis dengan sedikitnya ``min_binge`` pemutaran.
+    """
+    days, repeats, binges = streaks.between(start_date, end_date)
+    first_days, lengths = day_runs(days)
+    longest = int(np.argmax(lengths)) if len(lengths) else None
+    top = np.argsort(-lengths, kind='stable')[:n]
+    longest_streaks = pd.DataFrame({
+        'mulai': day_dates(first_days[top]).date,
+        'selesai': day_dates(first_days[top] + lengths[top] - 1).date,
+        'hari': lengths[top],
+    }, index=range(1, len(top) + 1))
+
+    # Teratas menurut jumlah pemutaran berturut-turut, lalu menit
+    top = np.lexsort((-repeats['menit_diputar'].to_numpy(), -repeats['jumlah_putar'].to_numpy()))[:n]
+    repeats = repeats.iloc[top]
+    repeats = pd.concat([
+        streaks.track_labels.iloc[repeats['kode']].reset_index(drop=True),
+        repeats[['mulai', 'jumlah_putar', 'menit_diputar']].reset_index(drop=True),
+    ], axis=1)
+    repeats['mulai'] = localize(repeats['mulai'], streaks.tz)
+    repeats.index = range(1, len(repeats) + 1)
+
+    binges = binges[binges['jumlah_putar'].to_numpy() >= min_binge]
+    codes, plays = binges['kode'].to_numpy(), binges['jumlah_putar'].to_numpy()
+    count = np.bincount(codes, minlength=len(streaks.artist_labels))
+    total = np.bincount(codes, weights=plays, minlength=len(count)).astype(np.int64)
+    longest_run = np.zeros(len(count), dtype=np.int64)
+    np.maximum.at(longest_run, codes, plays)
+    present = np.flatnonzero(count)
+    top = present[np.lexsort((-total[present], -count[present]))[:n]]
+    per_artist = pd.DataFrame(
+        {'binge': count[top], 'pemutaran': total[top], 'terpanjang': longest_run[top]},
+        index=streaks.artist_labels[top]
+    )
+    top = np.lexsort((-binges['menit_diputar'].to_numpy(), -plays))[:n]
+    longest_binges = pd.DataFrame({
+        'artist_name': streaks.artist_labels[codes[top]],
+        'mulai': localize(binges['mulai'].iloc[top], streaks.tz).to_numpy(),
+        'jumlah_putar': plays[top],
+        'menit_diputar': binges['menit_diputar'].to_numpy()[top],
+    }, index=range(1, len(top) + 1))
+
+    return {
+        'active_days': len(days),
+        'longest_streak': int(lengths[longest]) if longest is not None else 0,
+        'longest_streak_start': longest_streaks['mulai'].iloc[0] if longest is not None else None,
+        'longest_streak_end': longest_streaks['selesai'].iloc[0] if longest is not None else None,
+        # Rangkaian yang berakhir di hari aktif terakhir dalam rentang
+        'current_streak': int(lengths[-1]) if len(lengths) else 0,
+        'current_streak_end': day_dates(days[-1:]).date[0] if len(days) else None,
+        'streak_lengths': pd.Series(lengths).clip(upper=30).value_counts().sort_index(),
+        'longest_streaks': longest_streaks,
+        'repeats': repeats,
+        'min_binge': min_binge,
+        'n_binges': len(binges),
+        'binge_plays': int(plays.sum()),
+        'binge_artists': per_artist,
+        'longest_binges': longest_binges,
+    }
+
+
+def comparison_analysis(engine, current, previous, rolling_days=7, n=15):
+    """Total, selisih, pola jam, dan artis teratas dua jendela tanggal dari mesin prefix sum.
+
+    ``current`` dan ``previous`` adalah pasangan (awal, akhir) inklusif.
+    Rata-rata bergulir ``rolling_days`` hari mencakup seluruh riwayat.
+    """
+    now, before = engine.window(*current), engine.window(*previous)
+    summary = pd.DataFrame({
+        'current': [now['plays'], now['menit'], now['active_days'], now['plays'] / max(now['days'], 1)],
+        'previous': [before['plays'], before['menit'], before['active_days'], before['plays'] / max(before['days'], 1)],
+    }, index=['plays', 'menit', 'active_days', 'plays_per_day'])
+    summary['delta'] = summary['current'] - summary['previous']
+    summary['change'] = summary['delta'] / summary['previous'].where(summary['previous'] > 0)
+
+    hourly = pd.DataFrame({'current': now['hourly']['plays'], 'previous': before['hourly']['plays']})
+
+    artists = pd.DataFrame({
+        'current': now['artists']['plays'],
+        'previous': before['artists']['plays'],
+        'current_menit': now['artists']['menit'],
+    })
+    artists['delta'] = artists['current'] - artists['previous']
+    artists['current_rank'] = artists['current'].where(artists['current'] > 0).rank(ascending=False, method='min')
+    artists['previous_rank'] = artists['previous'].where(artists['previous'] > 0).rank(ascending=False, method='min')
+    top = artists[(artists['current'] > 0) | (artists['previous'] > 0)]
+    top = top.sort_values(['current', 'previous'], ascending=False).head(n)
+
+    rising = artists['delta'].idxmax() if len(artists) and artists['delta'].max() > 0 else None
+    falling = artists['delta'].idxmin() if len(artists) and artists['delta'].min() < 0 else None
+    return {
+        'current': current,
+        'previous': previous,
+        'summary': summary,
+        'hourly': hourly,
+        'peak_hour': int(hourly['current'].idxmax()) if now['plays'] else None,
+        'artists': top,
+        'top_artist': top.index[0] if len(top) and top['current'].iloc[0] > 0 else None,
+        'rising_artist': rising,
+        'rising_delta': int(artists['delta'].max()) if rising is not None else 0,
+        'falling_artist': falling,
+        'falling_delta': int(artists['delta'].min()) if falling is not None else 0,
+        'rolling_days': rolling_days,
+        'rolling': downsample_series(engine.rolling(rolling_days)['plays']),
+    }
+
+
+# Analisis per bagian berbasis agregat
+ANALYSES = {
+    'artist': artist_analysis,
+    'song': song_analysis,
+    'time': time_analysis,
+    'duration': duration_analysis,
+    'pattern': pattern_analysis,
+    'playback': playback_analysis,
+}
@@ -1,15 +1,34 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime, timedelta
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import warnings
+from zoneinfo import available_timezones
+from aggregates import AGGREGATES_VERSION, ListeningAggregates
+from analysis import ANALYSES, comparison_analysis, session_analysis, streak_analysis
+from calendar_features import DEFAULT_TIMEZONE
+from comparison import COMPARISON_ARTISTS, COMPARISON_VERSION, PERIODS, ComparisonEngine, period_windows
+from disk_cache import DiskCache, cache_key, combine_keys, content_hash
+from figures import FIGURES, comparison_figures, session_figures, streak_figures
+from filters import FILTER_VERSION, HistoryIndex, filter_sessions
+from incremental import STORE_VERSION, HashIndex, dedup_chunks, drop_duplicate_plays, new_plays, row_hashes
+from ingest import DEFAULT_CHUNKSIZE, SCHEMA_VERSION, clean_frame, clean_keys, concat_clean, iter_clean_chunks, read_export
+from profiling import PROFILE_ENABLED, Profiler, activate, export, stage
+from result_cache import LOCK_DIR, ResultCache, worker_lock
+from sessions import DEFAULT_SESSION_GAP_MINUTES, SESSIONS_VERSION, sessionize
+from sketches import SKETCH_VERSION, SketchAggregates
+from sql_store import SQL_ENGINE, SQL_SUFFIX, SQL_VERSION, SqlAggregates, SqlStore
+from streaks import BINGE_MIN_PLAYS, MIN_STORED_BINGE, STREAKS_VERSION, ListeningStreaks
 warnings.filterwarnings('ignore')
 
+# Cache hasil pembersihan di disk (lihat SPOTIFY_CACHE_DIR / SPOTIFY_CACHE_MAX_MB)
+DISK_CACHE = DiskCache()
+
+# Grafik per (dataset, bagian), dibagi semua sesi di proses ini (lihat SPOTIFY_RESULT_CACHE_ENTRIES)
+SECTION_CACHE = ResultCache()
+
+# Jumlah artis teratas yang ditawarkan di filter artis
+FILTER_ARTIST_OPTIONS = 1000
+
 # Konfigurasi halaman
 st.set_page_config(
     page_title="🎵 Analisis Spotify Saya",
@@ -43,344 +62,576 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
-def load_and_clean_data(uploaded_file):
+def dataset_key_for(uploaded_file, tz=None):
+    """Kunci dataset: hash isi unggahan, digabung dengan zona waktu jika bukan UTC."""
+    key = content_hash(uploaded_file)
+    if tz and tz != DEFAULT_TIMEZONE:
+        key = combine_keys(key, tz)
+    return key
+
+def load_and_clean_data(uploaded_file, dataset_key=None, tz=None):
     """Memuat dan membersihkan data Spotify."""
     try:
-        # Membaca file CSV
-        data = pd.read_csv(uploaded_file)
-        
-        # Konversi timestamp
-        data['ts'] = pd.to_datetime(data['ts'])
-        data['tanggal'] = data['ts'].dt.date
-        data['jam'] = data['ts'].dt.hour
-        data['hari'] = data['ts'].dt.day_name()
-        data['bulan'] = data['ts'].dt.month_name()
-        data['tahun'] = data['ts'].dt.year
-        
-        # Konversi durasi
-        data['menit_diputar'] = data['ms_played'] / (1000 * 60)
-        data['detik_diputar'] = data['ms_played'] / 1000
-        
-        # Menangani missing values
-        data['track_name'].fillna('Lagu Tidak Diketahui', inplace=True)
-        data['artist_name'].fillna('Artis Tidak Diketahui', inplace=True)
-        data['album_name'].fillna('Album Tidak Diketahui', inplace=True)
-        
-        # Menambahkan fitur kategori waktu
-        data['periode_waktu'] = pd.cut(
-            data['jam'],
-            bins=[0, 6, 12, 18, 24],
-            labels=['Malam (0-6)', 'Pagi (6-12)', 'Siang (12-18)', 'Sore (18-24)'],
-            include_lowest=True
-        )
+        dataset_key = dataset_key or dataset_key_for(uploaded_file, tz)
+        with stage('load_and_clean') as record:
+            data = _load_and_clean_cached(dataset_key, tz, uploaded_file)
+            record.rows = len(data)
+        return data
+    except Exception as e:
+        st.error(f"Error loading file: {str(e)}")
+        return None
+
+@st.cache_data(max_entries=4)
+def _load_and_clean_cached(dataset_key, tz, _uploaded_file):
+    """Membaca hasil pembersihan dari cache disk, atau memproses ulang jika belum ada."""
+    key = cache_key(dataset_key, 'clean', SCHEMA_VERSION)
+    with worker_lock(key):
+        data = DISK_CACHE.load_frame(key)
+        if data is None:
+            data = _load_store_parts(dataset_key)
+        if data is None:
+            # Membaca file CSV, shard JSON, atau ZIP ekspor
+            data = clean_frame(read_export(_uploaded_file), tz)
+            if _is_multi_file(_uploaded_file):
+                # Beberapa ekspor bisa tumpang tindih
+                data = drop_duplicate_plays(data)
+            DISK_CACHE.save_frame(key, data)
+    return data
+
+def _is_multi_file(uploaded_file):
+    return isinstance(uploaded_file, (list, tuple)) and len(uploaded_file) > 1
+
+def _store_parts(dataset_key):
+    """Kunci bagian riwayat tersimpan menurut manifest; ``None`` jika tidak ada atau ada yang hilang."""
+    manifest = DISK_CACHE.load_object(cache_key(dataset_key, 'store', STORE_VERSION))
+    if manifest is None:
+        return None
+    if any(DISK_CACHE.load_path(part_key, '.feather') is None for part_key in manifest['parts']):
+        return None
+    return manifest['parts']
+
+def _load_store_parts(dataset_key):
+    """Menggabungkan bagian-bagian riwayat hasil penambahan bertahap; ``None`` jika tidak lengkap."""
+    parts = _store_parts(dataset_key)
+    if parts is None:
+        return None
+    return concat_clean([DISK_CACHE.load_frame(part_key) for part_key in parts])
+
+def _iter_dataset_chunks(dataset_key, tz, chunksize, uploaded_file):
+    """Potongan data bersih satu dataset: dari bagian tersimpan bila lengkap, jika tidak dari file unggahan.
+
+    Bagian dibaca lewat memory map dan dipotong per ``chunksize`` baris,
+    sehingga dataset hasil penambahan tidak membaca ulang ekspor lamanya.
+    """
+    parts = _store_parts(dataset_key)
+    if parts is None:
+        chunks = iter_clean_chunks(uploaded_file, chunksize, tz)
+        if _is_multi_file(uploaded_file):
+            # Beberapa ekspor bisa tumpang tindih
+            chunks = dedup_chunks(chunks)
+        yield from chunks
+        return
+    for part_key in parts:
+        part = DISK_CACHE.load_frame(part_key)
+        for start in range(0, len(part), chunksize):
+            yield part.iloc[start:start + chunksize].reset_index(drop=True)
+
+def load_aggregates(uploaded_file, chunksize=None, dataset_key=None, tz=None):
+    """Memuat data Spotify sebagai agregat ringkas untuk semua tab.
+
+    Jika ``chunksize`` diisi, ekspor dibaca per potongan dan setiap potongan
+    langsung dilipat ke agregat sehingga seluruh riwayat tidak pernah
+    berada di memori sekaligus.
+    """
+    try:
+        dataset_key = dataset_key or dataset_key_for(uploaded_file, tz)
+        with stage('load_aggregates') as record:
+            agg = _load_aggregates_cached(dataset_key, tz, chunksize, uploaded_file)
+            record.rows = agg.total_plays
+        return agg
+    except Exception as e:
+        st.error(f"Error loading file: {str(e)}")
+        return None
+
+@st.cache_data(max_entries=8)
+def _load_aggregates_cached(dataset_key, tz, chunksize, _uploaded_file):
+    """Membaca agregat dari cache disk, atau membangunnya jika belum ada."""
+    key = cache_key(dataset_key, 'agg', f"{SCHEMA_VERSION}.{AGGREGATES_VERSION}")
+    with worker_lock(key):
+        agg = DISK_CACHE.load_object(key)
+        if agg is None:
+            if chunksize is None:
+                data = _load_and_clean_cached(dataset_key, tz, _uploaded_file)
+                agg = ListeningAggregates.from_frame(data, tz)
+            else:
+                chunks = _iter_dataset_chunks(dataset_key, tz, chunksize, _uploaded_file)
+                agg = ListeningAggregates.from_chunks(chunks, tz)
+            DISK_CACHE.save_object(key, agg)
+    agg.dataset_key = dataset_key
+    return agg
+
+def load_sketch_aggregates(uploaded_file, chunksize=None, dataset_key=None, tz=None):
+    """Memuat data Spotify sebagai agregat dengan artis dan lagu diringkas sebagai sketsa.
+
+    Jumlah unik dan artis/lagu teratas menjadi perkiraan berbatas galat,
+    sehingga memori tidak bergantung pada jumlah artis atau lagu.
+    """
+    try:
+        dataset_key = dataset_key or dataset_key_for(uploaded_file, tz)
+        with stage('load_sketch_aggregates') as record:
+            agg = _load_sketch_aggregates_cached(dataset_key, tz, chunksize, uploaded_file)
+            record.rows = agg.total_plays
+        return agg
+    except Exception as e:
+        st.error(f"Error loading file: {str(e)}")
+        return None
+
+@st.cache_data(max_entries=8)
+def _load_sketch_aggregates_cached(dataset_key, tz, chunksize, _uploaded_file):
+    """Membaca agregat sketsa dari cache disk, atau membangunnya jika belum ada."""
+    key = cache_key(dataset_key, 'sketch', f"{SCHEMA_VERSION}.{AGGREGATES_VERSION}.{SKETCH_VERSION}")
+    with worker_lock(key):
+        agg = DISK_CACHE.load_object(key)
+        if agg is None:
+            if chunksize is None:
+                data = _load_and_clean_cached(dataset_key, tz, _uploaded_file)
+                agg = SketchAggregates.from_frame(data, tz)
+            else:
+                chunks = _iter_dataset_chunks(dataset_key, tz, chunksize, _uploaded_file)
+                agg = SketchAggregates.from_chunks(chunks, tz)
+            DISK_CACHE.save_object(key, agg)
+    # Hasil per bagian berbeda dengan mode eksak sehingga memonya dipisah
+    agg.dataset_key = combine_keys(dataset_key, 'sketch')
+    return agg
+
+def load_sql_aggregates(uploaded_file, chunksize=DEFAULT_CHUNKSIZE, dataset_key=None, tz=None):
+    """Memuat data Spotify ke basis data SQL lokal dan menjawab tab lewat kueri.
+
+    Ekspor dibaca per potongan langsung ke berkas basis data di samping
+    cache disk; yang disimpan di memori hanya total dan histogram kecil.
+    """
+    try:
+        dataset_key = dataset_key or dataset_key_for(uploaded_file, tz)
+        with stage('load_sql_aggregates') as record:
+            agg = _load_sql_aggregates_cached(dataset_key, tz, chunksize, uploaded_file)
+            record.rows = agg.total_plays
+        return agg
+    except Exception as e:
+        st.error(f"Error loading file: {str(e)}")
+        return None
+
+@st.cache_data(max_entries=8)
+def _load_sql_aggregates_cached(dataset_key, tz, chunksize, _uploaded_file):
+    """Membuka basis data SQL dataset dari cache disk, atau mengisinya jika belum ada."""
+    if not DISK_CACHE.enabled:
+        raise ValueError("Penyimpanan SQL membutuhkan cache disk (SPOTIFY_CACHE_MAX_MB > 0)")
+    key = cache_key(dataset_key, f'sql-{SQL_ENGINE}', f"{SCHEMA_VERSION}.{SQL_VERSION}")
+    with worker_lock(key):
+        path = DISK_CACHE.load_path(key, SQL_SUFFIX)
+        if path is None:
+            chunks = _iter_dataset_chunks(dataset_key, tz, chunksize, _uploaded_file)
+            path = DISK_CACHE.save_file(key, SQL_SUFFIX, lambda path: SqlStore.build(path, chunks))
+    agg = SqlAggregates(SqlStore(path), tz)
+    agg.dataset_key = dataset_key
+    return agg
+
+def append_export(uploaded_file, new_files, chunksize=None, dataset_key=None, tz=None):
+    """Menambahkan ekspor baru ke riwayat tersimpan tanpa memproses ulang riwayat lama.
+
+    Hanya pemutaran yang belum ada, menurut (ts, spotify_track_uri,
+    ms_played), yang dibersihkan lalu dilipat ke agregat dan disimpan sebagai
+    bagian baru, sehingga biayanya sebanding dengan jumlah baris baru.
+    Mengembalikan kunci dataset gabungan dan jumlah pemutaran baru.
+    """
+    try:
+        base_key = dataset_key or dataset_key_for(uploaded_file, tz)
+        combined_key = combine_keys(base_key, content_hash(new_files))
+        with stage('append_export') as record:
+            added = _append_cached(base_key, combined_key, tz, chunksize, uploaded_file, new_files)
+            record.rows = added
+        return combined_key, added
+    except Exception as e:
+        st.error(f"Error loading file: {str(e)}")
+        return None, 0
+
+@st.cache_data(max_entries=8)
+def _append_cached(base_key, combined_key, tz, chunksize, _uploaded_file, _new_files):
+    """Menyimpan riwayat gabungan sebagai bagian lama + bagian baru beserta agregat dan indeksnya."""
+    store_key = cache_key(combined_key, 'store', STORE_VERSION)
+    agg_key = cache_key(combined_key, 'agg', f"{SCHEMA_VERSION}.{AGGREGATES_VERSION}")
+    with worker_lock(store_key):
+        manifest = DISK_CACHE.load_object(store_key)
+        if manifest is not None and DISK_CACHE.load_object(agg_key) is not None:
+            return manifest['added']
         
-        # Indikator akhir pekan
-        data['akhir_pekan'] = data['hari'].isin(['Saturday', 'Sunday'])
+        base_parts = _save_base_parts(base_key, tz, chunksize, _uploaded_file)
+        index = _load_hash_index(base_key, tz, chunksize, _uploaded_file)
+        # Duplikat dibuang dari data mentah; hanya baris baru yang dibersihkan
+        raw = read_export(_new_files)
+        fresh, hashes = new_plays(index, raw, clean_keys(raw))
+        fresh = clean_frame(fresh, tz)
         
-        # Kategori durasi
-        data['kategori_durasi'] = pd.cut(
-            data['menit_diputar'],
-            bins=[0, 0.5, 2, 5, float('inf')],
-            labels=['Sangat Pendek (<30s)', 'Pendek (30s-2m)', 'Sedang (2-5m)', 'Panjang (>5m)']
+        # Agregat lama dilipat dengan baris baru saja
+        agg = _load_aggregates_cached(base_key, tz, chunksize, _uploaded_file).update(fresh)
+        DISK_CACHE.save_object(agg_key, agg)
+        DISK_CACHE.save_object(
+            cache_key(combined_key, 'hashes', f"{SCHEMA_VERSION}.{STORE_VERSION}"), index.add(hashes)
         )
         
-        return data
+        # Bagian lama tidak ditulis ulang; hanya baris baru yang disimpan
+        part_key = cache_key(combined_key, 'part', SCHEMA_VERSION)
+        DISK_CACHE.save_frame(part_key, fresh)
+        DISK_CACHE.save_object(store_key, {'parts': base_parts + [part_key], 'added': len(fresh)})
+        return len(fresh)
+
+def _save_base_parts(dataset_key, tz, chunksize, uploaded_file):
+    """Kunci bagian riwayat dasar di cache disk; disimpan dulu bila belum ada.
+
+    Mode hemat memori tidak pernah menyimpan data bersih utuh, jadi
+    potongannya ditulis sekali sebagai bagian beserta indeks hash-nya.
+    Setelah itu dataset gabungan membaca bagian ini, bukan ekspor lama.
+    """
+    parts = _store_parts(dataset_key)
+    if parts is not None or not DISK_CACHE.enabled:
+        return parts or []
+    clean_key = cache_key(dataset_key, 'clean', SCHEMA_VERSION)
+    if chunksize is None:
+        _load_and_clean_cached(dataset_key, tz, uploaded_file)
+        return [clean_key]
+    if DISK_CACHE.load_path(clean_key, '.feather') is not None:
+        return [clean_key]
+
+    parts, hashes = [], []
+    for number, chunk in enumerate(_iter_dataset_chunks(dataset_key, tz, chunksize, uploaded_file)):
+        part_key = cache_key(dataset_key, f'part-{number}', SCHEMA_VERSION)
+        DISK_CACHE.save_frame(part_key, chunk)
+        parts.append(part_key)
+        hashes.append(row_hashes(chunk))
+    hash_key = cache_key(dataset_key, 'hashes', f"{SCHEMA_VERSION}.{STORE_VERSION}")
+    if DISK_CACHE.load_object(hash_key) is None:
+        DISK_CACHE.save_object(hash_key, HashIndex(np.concatenate(hashes) if hashes else None))
+    DISK_CACHE.save_object(cache_key(dataset_key, 'store', STORE_VERSION), {'parts': parts, 'added': 0})
+    return parts
+
+def _load_hash_index(dataset_key, tz, chunksize, uploaded_file):
+    """Indeks hash pemutaran dalam satu dataset, dari cache disk atau dihitung ulang."""
+    key = cache_key(dataset_key, 'hashes', f"{SCHEMA_VERSION}.{STORE_VERSION}")
+    index = DISK_CACHE.load_object(key)
+    if index is None:
+        if chunksize is None:
+            hashes = row_hashes(_load_and_clean_cached(dataset_key, tz, uploaded_file))
+        else:
+            hashes = np.concatenate([
+                row_hashes(chunk) for chunk in _iter_dataset_chunks(dataset_key, tz, chunksize, uploaded_file)
+            ])
+        index = HashIndex(hashes)
+        DISK_CACHE.save_object(key, index)
+    return index
+
+def load_sessions(uploaded_file, gap_minutes=DEFAULT_SESSION_GAP_MINUTES, dataset_key=None, tz=None):
+    """Memuat tabel sesi mendengarkan, di-cache di samping data yang sudah dibersihkan."""
+    try:
+        dataset_key = dataset_key or dataset_key_for(uploaded_file, tz)
+        with stage('load_sessions') as record:
+            sessions = _load_sessions_cached(dataset_key, tz, gap_minutes, uploaded_file)
+            record.rows = len(sessions)
+        return sessions
+    except Exception as e:
+        st.error(f"Error loading file: {str(e)}")
+        return None
+
+@st.cache_data(max_entries=8)
+def _load_sessions_cached(dataset_key, tz, gap_minutes, _uploaded_file):
+    """Membaca tabel sesi dari cache disk, atau menghitungnya dari data yang sudah dibersihkan."""
+    key = cache_key(dataset_key, f'sessions-{gap_minutes}', f"{SCHEMA_VERSION}.{SESSIONS_VERSION}")
+    with worker_lock(key):
+        sessions = DISK_CACHE.load_frame(key)
+        if sessions is None:
+            sessions = sessionize(_load_and_clean_cached(dataset_key, tz, _uploaded_file), gap_minutes)
+            DISK_CACHE.save_frame(key, sessions)
+    return sessions
+
+def load_streaks(uploaded_file, chunksize=None, dataset_key=None, tz=None):
+    """Memuat rangkaian beruntun (hari, lagu diulang, binge artis), di-cache di samping data yang sudah dibersihkan."""
+    try:
+        dataset_key = dataset_key or dataset_key_for(uploaded_file, tz)
+        with stage('load_streaks') as record:
+            streaks = _load_streaks_cached(dataset_key, tz, chunksize, uploaded_file)
+            record.rows = len(streaks.repeats) + len(streaks.binges)
+        return streaks
+    except Exception as e:
+        st.error(f"Error loading file: {str(e)}")
+        return None
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _load_streaks_cached(dataset_key, tz, chunksize, _uploaded_file):
+    """Membaca rangkaian dari cache disk, atau menghitungnya dari data lengkap atau per potongan."""
+    key = cache_key(dataset_key, 'streaks', f"{SCHEMA_VERSION}.{STREAKS_VERSION}")
+    with worker_lock(key):
+        streaks = DISK_CACHE.load_object(key)
+        if streaks is None:
+            if chunksize is None:
+                streaks = ListeningStreaks.from_frame(_load_and_clean_cached(dataset_key, tz, _uploaded_file), tz)
+            else:
+                chunks = _iter_dataset_chunks(dataset_key, tz, chunksize, _uploaded_file)
+                streaks = ListeningStreaks.from_chunks(chunks, tz)
+            DISK_CACHE.save_object(key, streaks)
+    return streaks
+
+def load_history_index(uploaded_file, chunksize=None, dataset_key=None, tz=None):
+    """Memuat indeks riwayat terurut waktu untuk filter tanggal dan artis."""
+    try:
+        dataset_key = dataset_key or dataset_key_for(uploaded_file, tz)
+        with stage('load_history_index') as record:
+            index = _load_history_index_cached(dataset_key, tz, chunksize, uploaded_file)
+            record.rows = len(index)
+        return index
+    except Exception as e:
+        st.error(f"Error loading file: {str(e)}")
+        return None
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _load_history_index_cached(dataset_key, tz, chunksize, _uploaded_file):
+    """Membaca indeks dari cache disk, atau membangunnya dari data lengkap atau per potongan.
+
+    Disimpan sebagai resource agar setiap perubahan filter tidak menyalin indeks.
+    """
+    key = cache_key(dataset_key, 'filter', f"{SCHEMA_VERSION}.{FILTER_VERSION}")
+    with worker_lock(key):
+        index = DISK_CACHE.load_object(key)
+        if index is None:
+            if chunksize is None:
+                index = HistoryIndex.from_frame(_load_and_clean_cached(dataset_key, tz, _uploaded_file), tz)
+            else:
+                chunks = _iter_dataset_chunks(dataset_key, tz, chunksize, _uploaded_file)
+                index = HistoryIndex.from_chunks(chunks, tz)
+            DISK_CACHE.save_object(key, index)
+    return index
+
+def load_comparison(uploaded_file, agg, chunksize=None, dataset_key=None, tz=None):
+    """Memuat mesin perbandingan periode untuk seluruh riwayat ``agg`` (tanpa filter)."""
+    try:
+        dataset_key = dataset_key or dataset_key_for(uploaded_file, tz)
+        with stage('load_comparison') as record:
+            engine = _load_comparison_cached(agg.dataset_key, dataset_key, tz, chunksize, uploaded_file, agg)
+            record.rows = agg.total_plays
+        return engine
     except Exception as e:
         st.error(f"Error loading file: {str(e)}")
         return None
 
-def create_artist_analysis(data):
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _load_comparison_cached(agg_key, dataset_key, tz, chunksize, _uploaded_file, _agg):
+    """Membaca mesin dari cache disk, atau membangunnya dari kubus agregat dan jumlah harian artis teratas.
+
+    Kunci memakai kunci agregat karena artis teratas mode perkiraan bisa
+    berbeda; disimpan sebagai resource agar setiap perubahan periode tidak menyalin array.
+    """
+    key = cache_key(agg_key, 'comparison', f"{SCHEMA_VERSION}.{COMPARISON_VERSION}")
+    with worker_lock(key):
+        engine = DISK_CACHE.load_object(key)
+        if engine is None:
+            if isinstance(_agg, SqlAggregates):
+                artists = list(_agg.top_artists(COMPARISON_ARTISTS).index)
+                engine = ComparisonEngine.from_totals(_agg, artists, _agg.artist_day_totals(artists))
+            elif chunksize is None:
+                engine = ComparisonEngine.from_frame(_agg, _load_and_clean_cached(dataset_key, tz, _uploaded_file))
+            else:
+                chunks = _iter_dataset_chunks(dataset_key, tz, chunksize, _uploaded_file)
+                engine = ComparisonEngine.from_chunks(_agg, chunks)
+            DISK_CACHE.save_object(key, engine)
+    return engine
+
+def filter_aggregates(index, dataset_key, start_date, end_date, artists):
+    """Agregat untuk rentang tanggal dan artis terpilih, di-memo per kombinasi filter."""
+    return _filter_aggregates_cached(dataset_key, start_date, end_date, tuple(artists), index)
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _filter_aggregates_cached(dataset_key, start_date, end_date, artists, _index):
+    agg = _index.aggregates(start_date, end_date, artists)
+    # Memo grafik per bagian memakai kunci ini
+    agg.dataset_key = combine_keys(dataset_key, f"{start_date}:{end_date}", *artists)
+    return agg
+
+def build_section(agg, name):
+    """Membangun grafik dan angka satu bagian, di-memo per (dataset, bagian).
+
+    Kembali ke bagian yang pernah dibuka tidak menghitung ulang apa pun, dan
+    sesi lain yang membuka bagian yang sama menunggu satu perhitungan saja.
+    """
+    if agg.dataset_key is None:
+        return _build_section(agg, name)
+    return SECTION_CACHE.get_or_compute((agg.dataset_key, name), lambda: _build_section(agg, name))
+
+def _build_section(agg, name):
+    with stage(f'analysis:{name}', rows=agg.total_plays):
+        result = ANALYSES[name](agg)
+    with stage(f'figures:{name}'):
+        figures = FIGURES[name](result)
+    return {**result, **figures}
+
+def plotly_chart(figure):
+    """Menampilkan grafik selebar kolom; serialisasi Plotly tercatat sebagai tahap di profil."""
+    with stage('plotly_chart'):
+        st.plotly_chart(figure, use_container_width=True)
+
+def with_bound(value, bound=None):
+    """Teks angka; angka perkiraan diberi tanda dan batas galatnya, misalnya ``≈1,234 (±12)``."""
+    if bound is None:
+        return f"{value}"
+    return f"≈{value:,} (±{bound:,.0f})"
+
+def estimate_metric(label, value, bound=None):
+    """st.metric untuk jumlah unik; perkiraan HyperLogLog diberi batas galat relatif ~95%."""
+    if bound is None:
+        st.metric(label, f"{value:,}")
+    else:
+        st.metric(label, f"≈{value:,}", f"±{bound:.1%}", delta_color='off',
+                  help="Perkiraan HyperLogLog; nilai sebenarnya berada dalam batas ini dengan peluang ~95%")
+
+def top_count_caption(bound):
+    """Keterangan batas galat di bawah grafik artis/lagu teratas pada mode perkiraan."""
+    st.caption(f"Mode perkiraan (Space-Saving + Count-Min): setiap hitungan tidak pernah kurang dari "
+               f"nilai sebenarnya dan paling banyak lebih {bound:,.0f}.")
+
+def create_artist_analysis(agg):
     """Analisis artis favorit"""
     st.subheader("🎤 Artis Favorit Saya")
+    section = build_section(agg, 'artist')
     
     col1, col2 = st.columns(2)
     
     with col1:
-        # Top artis berdasarkan jumlah pemutaran
-        top_artists = data['artist_name'].value_counts().head(15)
-        
-        fig = px.bar(
-            x=top_artists.values,
-            y=top_artists.index,
-            orientation='h',
-            title="Top 15 Artis Berdasarkan Jumlah Pemutaran",
-            labels={'x': 'Jumlah Pemutaran', 'y': 'Artis'},
-            color=top_artists.values,
-            color_continuous_scale='Viridis'
-        )
-        fig.update_layout(height=600, yaxis={'categoryorder':'total ascending'})
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(section['fig_plays'])
     
     with col2:
-        # Top artis berdasarkan waktu mendengarkan
-        artist_time = data.groupby('artist_name')['menit_diputar'].sum().sort_values(ascending=False).head(10)
-        
-        fig = px.pie(
-            values=artist_time.values,
-            names=artist_time.index,
-            title="Top 10 Artis Berdasarkan Waktu Mendengarkan"
-        )
-        fig.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(section['fig_time'])
+    
+    bound = agg.error_bounds().get('artist_plays')
+    if bound is not None:
+        top_count_caption(bound)
     
     # Insight
-    top_artist = top_artists.index[0]
-    top_plays = top_artists.iloc[0]
     st.markdown(f"""
     <div class="insight-box">
-        <h4>✨ Insight: Artis favorit Anda adalah <strong>{top_artist}</strong> dengan <strong>{top_plays}</strong> kali pemutaran!</h4>
+        <h4>✨ Insight: Artis favorit Anda adalah <strong>{section['top_artist']}</strong> dengan <strong>{with_bound(section['top_plays'], bound)}</strong> kali pemutaran!</h4>
     </div>
     """, unsafe_allow_html=True)
 
-def create_song_analysis(data):
+def create_song_analysis(agg):
     """Analisis lagu favorit"""
     st.subheader("🎵 Lagu Favorit Saya")
+    section = build_section(agg, 'song')
     
-    # Top lagu
-    top_songs = data.groupby(['track_name', 'artist_name']).size().sort_values(ascending=False).head(15)
-    
-    # Prepare data for visualization
-    song_data = []
-    for (song, artist), count in top_songs.items():
-        song_display = f"{song[:30]}..." if len(song) > 30 else song
-        song_data.append({
-            'song': f"{song_display} - {artist}",
-            'plays': count,
-            'full_name': f"{song} - {artist}"
-        })
+    plotly_chart(section['fig_top'])
     
-    song_df = pd.DataFrame(song_data)
-    
-    fig = px.bar(
-        song_df,
-        x='plays',
-        y='song',
-        orientation='h',
-        title="Top 15 Lagu Paling Sering Diputar",
-        labels={'plays': 'Jumlah Pemutaran', 'song': 'Lagu'},
-        color='plays',
-        color_continuous_scale='Blues'
-    )
-    fig.update_layout(height=600, yaxis={'categoryorder':'total ascending'})
-    st.plotly_chart(fig, use_container_width=True)
+    bound = agg.error_bounds().get('track_plays')
+    if bound is not None:
+        top_count_caption(bound)
     
     # Detail tabel
     with st.expander("📊 Detail Lagu Favorit"):
-        detail_data = []
-        for i, ((song, artist), count) in enumerate(top_songs.head(10).items(), 1):
-            song_sessions = data[(data['track_name'] == song) & (data['artist_name'] == artist)]
-            total_minutes = song_sessions['menit_diputar'].sum()
-            detail_data.append({
-                'Ranking': i,
-                'Lagu': song,
-                'Artis': artist,
-                'Jumlah Pemutaran': count,
-                'Total Waktu (menit)': f"{total_minutes:.1f}"
-            })
-        
-        st.dataframe(pd.DataFrame(detail_data), use_container_width=True)
+        detail = section['detail'].assign(**{
+            'Total Waktu (menit)': section['detail']['Total Waktu (menit)'].map(lambda m: f"{m:.1f}"),
+            'Tingkat Skip': section['detail']['Tingkat Skip'].map(lambda r: f"{r:.0%}"),
+            'Pertama Diputar': section['detail']['Pertama Diputar'].dt.strftime('%Y-%m-%d'),
+            'Terakhir Diputar': section['detail']['Terakhir Diputar'].dt.strftime('%Y-%m-%d'),
+        })
+        st.dataframe(detail, use_container_width=True)
     
     # Insight
-    top_song, top_artist = top_songs.index[0]
-    top_song_plays = top_songs.iloc[0]
     st.markdown(f"""
     <div class="insight-box">
-        <h4>✨ Insight: Lagu favorit Anda adalah <strong>"{top_song}"</strong> oleh <strong>{top_artist}</strong> dengan <strong>{top_song_plays}</strong> kali pemutaran!</h4>
+        <h4>✨ Insight: Lagu favorit Anda adalah <strong>"{section['top_song']}"</strong> oleh <strong>{section['top_artist']}</strong> dengan <strong>{with_bound(section['top_song_plays'], bound)}</strong> kali pemutaran!</h4>
     </div>
     """, unsafe_allow_html=True)
 
-def create_time_analysis(data):
+def create_time_analysis(agg):
     """Analisis pola waktu mendengarkan"""
     st.subheader("⏰ Kapan Saya Paling Aktif Mendengarkan Musik?")
-    
-    # Mapping hari ke bahasa Indonesia
-    hari_indonesia = {
-        'Monday': 'Senin', 'Tuesday': 'Selasa', 'Wednesday': 'Rabu',
-        'Thursday': 'Kamis', 'Friday': 'Jumat', 'Saturday': 'Sabtu', 'Sunday': 'Minggu'
-    }
-    day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    section = build_section(agg, 'time')
     
     col1, col2 = st.columns(2)
     
     with col1:
-        # Pola per jam
-        hourly_listening = data['jam'].value_counts().sort_index()
-        
-        fig = px.line(
-            x=hourly_listening.index,
-            y=hourly_listening.values,
-            title="Aktivitas Mendengarkan per Jam",
-            labels={'x': 'Jam dalam Sehari', 'y': 'Jumlah Sesi'},
-            markers=True
-        )
-        fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(section['fig_hourly'])
     
     with col2:
-        # Pola per hari
-        daily_listening = data['hari'].value_counts().reindex(day_order)
-        day_labels = [hari_indonesia[day] for day in day_order]
-        colors = ['orange' if day in ['Saturday', 'Sunday'] else 'steelblue' for day in day_order]
-        
-        fig = px.bar(
-            x=day_labels,
-            y=daily_listening.values,
-            title="Aktivitas Mendengarkan per Hari",
-            labels={'x': 'Hari', 'y': 'Jumlah Sesi'},
-            color=colors,
-            color_discrete_map='identity'
-        )
-        fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
-    
-    # Heatmap
-    heatmap_data = data.groupby(['hari', 'jam']).size().unstack(fill_value=0)
-    heatmap_data = heatmap_data.reindex(day_order)
-    heatmap_data.index = day_labels
-    
-    fig = px.imshow(
-        heatmap_data.values,
-        x=heatmap_data.columns,
-        y=heatmap_data.index,
-        title="Heatmap: Pola Mendengarkan Hari vs Jam",
-        labels={'x': 'Jam', 'y': 'Hari', 'color': 'Jumlah Sesi'},
-        color_continuous_scale='YlOrRd'
-    )
-    st.plotly_chart(fig, use_container_width=True)
-    
-    # Periode waktu
-    periode_listening = data['periode_waktu'].value_counts()
+        plotly_chart(section['fig_daily'])
     
-    fig = px.pie(
-        values=periode_listening.values,
-        names=periode_listening.index,
-        title="Distribusi Mendengarkan per Periode Waktu"
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(section['fig_heatmap'])
+    plotly_chart(section['fig_period'])
     
     # Insights
-    peak_hour = hourly_listening.idxmax()
-    peak_day = hari_indonesia[daily_listening.idxmax()]
-    peak_period = periode_listening.idxmax()
-    
-    weekend_sessions = len(data[data['akhir_pekan']])
-    weekday_sessions = len(data[~data['akhir_pekan']])
+    peak_hour = section['peak_hour']
+    peak_day = section['peak_day']
+    weekend_sessions = section['weekend_sessions']
+    weekday_sessions = section['weekday_sessions']
     
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("🕐 Jam Tersibuk", f"{peak_hour}:00", f"{hourly_listening[peak_hour]} sesi")
+        st.metric("🕐 Jam Tersibuk", f"{peak_hour}:00", f"{section['peak_hour_plays']} pemutaran")
     with col2:
-        st.metric("📅 Hari Tersibuk", peak_day, f"{daily_listening.max()} sesi")
+        st.metric("📅 Hari Tersibuk", peak_day, f"{section['peak_day_plays']} pemutaran")
     with col3:
-        st.metric("⏰ Periode Tersibuk", peak_period, f"{periode_listening.max()} sesi")
+        st.metric("⏰ Periode Tersibuk", section['peak_period'], f"{section['peak_period_plays']} pemutaran")
     
     st.markdown(f"""
     <div class="insight-box">
         <h4>✨ Insight: Anda paling aktif mendengarkan musik pada jam <strong>{peak_hour}:00</strong> di hari <strong>{peak_day}</strong>!</h4>
-        <p><strong>Akhir pekan:</strong> {weekend_sessions:,} sesi ({weekend_sessions/len(data)*100:.1f}%) | 
-           <strong>Hari kerja:</strong> {weekday_sessions:,} sesi ({weekday_sessions/len(data)*100:.1f}%)</p>
+        <p><strong>Akhir pekan:</strong> {weekend_sessions:,} pemutaran ({weekend_sessions/agg.total_plays*100:.1f}%) | 
+           <strong>Hari kerja:</strong> {weekday_sessions:,} pemutaran ({weekday_sessions/agg.total_plays*100:.1f}%)</p>
     </div>
     """, unsafe_allow_html=True)
 
-def create_duration_analysis(data):
+def create_duration_analysis(agg):
     """Analisis durasi mendengarkan"""
     st.subheader("⏱️ Berapa Lama Durasi Rata-rata Saya Mendengarkan Lagu?")
-    
-    # Statistik durasi
-    rata_rata_menit = data['menit_diputar'].mean()
-    median_menit = data['menit_diputar'].median()
-    total_jam = data['menit_diputar'].sum() / 60
+    section = build_section(agg, 'duration')
+    rata_rata_menit = section['rata_rata_menit']
     
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("📊 Rata-rata", f"{rata_rata_menit:.2f} menit")
     with col2:
-        st.metric("📈 Median", f"{median_menit:.2f} menit")
+        st.metric("📈 Median", f"{section['median_menit']:.2f} menit")
     with col3:
-        st.metric("⏰ Total Waktu", f"{total_jam:.1f} jam")
+        st.metric("⏰ Total Waktu", f"{section['total_jam']:.1f} jam")
     
     col1, col2 = st.columns(2)
     
     with col1:
-        # Histogram durasi
-        fig = px.histogram(
-            data[data['menit_diputar'] <= 10],  # Fokus pada 0-10 menit
-            x='menit_diputar',
-            nbins=50,
-            title="Distribusi Durasi Mendengarkan (0-10 menit)",
-            labels={'x': 'Menit', 'y': 'Frekuensi'}
-        )
-        # Tambahkan garis rata-rata dan median
-        fig.add_vline(x=rata_rata_menit, line_dash="dash", line_color="red", 
-                     annotation_text=f"Rata-rata: {rata_rata_menit:.2f}")
-        fig.add_vline(x=median_menit, line_dash="dash", line_color="green",
-                     annotation_text=f"Median: {median_menit:.2f}")
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(section['fig_hist'])
     
     with col2:
-        # Kategori durasi
-        duration_dist = data['kategori_durasi'].value_counts()
-        
-        fig = px.pie(
-            values=duration_dist.values,
-            names=duration_dist.index,
-            title="Distribusi Kategori Durasi"
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(section['fig_category'])
     
     # Durasi per jam dan hari
     col1, col2 = st.columns(2)
     
     with col1:
-        hourly_duration = data.groupby('jam')['menit_diputar'].mean()
-        fig = px.line(
-            x=hourly_duration.index,
-            y=hourly_duration.values,
-            title="Durasi Rata-rata per Jam",
-            labels={'x': 'Jam', 'y': 'Durasi Rata-rata (menit)'},
-            markers=True
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(section['fig_hourly'])
     
     with col2:
-        # Mapping hari
-        hari_indonesia = {
-            'Monday': 'Senin', 'Tuesday': 'Selasa', 'Wednesday': 'Rabu',
-            'Thursday': 'Kamis', 'Friday': 'Jumat', 'Saturday': 'Sabtu', 'Sunday': 'Minggu'
-        }
-        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        
-        daily_duration = data.groupby('hari')['menit_diputar'].mean().reindex(day_order)
-        day_labels = [hari_indonesia[day] for day in day_order]
-        
-        fig = px.bar(
-            x=day_labels,
-            y=daily_duration.values,
-            title="Durasi Rata-rata per Hari",
-            labels={'x': 'Hari', 'y': 'Durasi Rata-rata (menit)'}
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(section['fig_daily'])
     
     # Detail kategori durasi
     with st.expander("📊 Detail Kategori Durasi"):
-        detail_data = []
-        for kategori, jumlah in duration_dist.items():
-            persentase = (jumlah / len(data)) * 100
-            detail_data.append({
-                'Kategori': kategori,
-                'Jumlah Sesi': f"{jumlah:,}",
-                'Persentase': f"{persentase:.1f}%"
-            })
-        st.dataframe(pd.DataFrame(detail_data), use_container_width=True)
-    
-    # Sesi terpanjang
-    with st.expander("🎵 Sesi Mendengarkan Terpanjang"):
-        longest_sessions = data.nlargest(10, 'menit_diputar')[['track_name', 'artist_name', 'menit_diputar']]
-        longest_sessions['Durasi'] = longest_sessions['menit_diputar'].apply(lambda x: f"{x:.2f} menit")
-        longest_sessions = longest_sessions[['track_name', 'artist_name', 'Durasi']].reset_index(drop=True)
-        longest_sessions.index = longest_sessions.index + 1
-        st.dataframe(longest_sessions, use_container_width=True)
+        category_detail = section['category_detail'].assign(**{
+            'Jumlah Pemutaran': section['category_detail']['Jumlah Pemutaran'].map(lambda n: f"{n:,}"),
+            'Persentase': section['category_detail']['Persentase'].map(lambda p: f"{p:.1f}%"),
+        })
+        st.dataframe(category_detail, use_container_width=True)
+    
+    # Pemutaran terpanjang
+    with st.expander("🎵 Pemutaran Terpanjang"):
+        longest = section['longest_plays']
+        longest = pd.DataFrame({
+            'track_name': longest['track_name'],
+            'artist_name': longest['artist_name'],
+            'Durasi': longest['menit_diputar'].map(lambda m: f"{m:.2f} menit"),
+        })
+        st.dataframe(longest, use_container_width=True)
     
     st.markdown(f"""
     <div class="insight-box">
@@ -388,90 +639,364 @@ def create_duration_analysis(data):
     </div>
     """, unsafe_allow_html=True)
 
-def create_pattern_analysis(data):
+def create_playback_analysis(agg):
+    """Analisis skip, shuffle, perangkat, dan alasan mulai/selesai pemutaran"""
+    st.subheader("⏭️ Apakah Saya Sering Skip Lagu?")
+    section = build_section(agg, 'playback')
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("⏭️ Tingkat Skip", f"{section['skip_rate']:.1%}", f"{section['total_skips']:,} skip")
+    with col2:
+        st.metric("🔀 Porsi Shuffle", f"{section['shuffle_share']:.1%}")
+    with col3:
+        peak_hour = section['peak_skip_hour']
+        st.metric("🕐 Jam Paling Sering Skip", f"{peak_hour}:00", f"{section['hourly'].get(peak_hour, 0):.1%}",
+                  delta_color='off')
+    with col4:
+        devices = section['devices']
+        st.metric("📱 Perangkat Utama", devices.index[0] if len(devices) else "-")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        plotly_chart(section['fig_hourly'])
+    with col2:
+        plotly_chart(section['fig_shuffle'])
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        plotly_chart(section['fig_devices'])
+    with col2:
+        plotly_chart(section['fig_transitions'])
+    
+    plotly_chart(section['fig_artists'])
+    bounds = agg.error_bounds()
+    if 'artist_skips' in bounds:
+        st.caption(f"Mode perkiraan: pemutaran artis paling banyak lebih {bounds['artist_plays']:,.0f} dan "
+                   f"skip paling banyak lebih {bounds['artist_skips']:,.0f} dari nilai sebenarnya.")
+    
+    with st.expander("📊 Detail Skip per Lagu dan Alasan"):
+        tracks = section['tracks']
+        st.dataframe(pd.DataFrame({
+            'Lagu': tracks['track_name'],
+            'Artis': tracks['artist_name'],
+            'Jumlah Pemutaran': tracks['plays'],
+            'Tingkat Skip': tracks['skip_rate'].map(lambda r: f"{r:.0%}"),
+        }), use_container_width=True)
+        st.markdown("**Jumlah pemutaran per alasan mulai (baris) dan alasan selesai (kolom)**")
+        st.dataframe(section['transitions'], use_container_width=True)
+        st.markdown("**Tingkat skip per pasangan alasan**")
+        st.dataframe(section['transition_skip_rate'].map(lambda r: f"{r:.0%}" if pd.notna(r) else "-"),
+                     use_container_width=True)
+    
+    shuffle = section['shuffle']['skip_rate']
+    comparison = ""
+    if {'Shuffle', 'Berurutan'} <= set(shuffle.index):
+        more = "lebih sering" if shuffle['Shuffle'] > shuffle['Berurutan'] else "lebih jarang"
+        comparison = f" Saat shuffle Anda {more} skip ({shuffle['Shuffle']:.1%} vs {shuffle['Berurutan']:.1%} berurutan)."
+    st.markdown(f"""
+    <div class="insight-box">
+        <h4>✨ Insight: Anda melewati <strong>{section['skip_rate']:.1%}</strong> lagu yang diputar.{comparison}</h4>
+        <p><strong>Artis yang paling sering di-skip</strong> di antara 15 teratas: {section['most_skipped_artist']}</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+def create_session_analysis(sessions, gap_minutes, tz=None):
+    """Analisis sesi mendengarkan: pemutaran berurutan dengan jeda kurang dari batas"""
+    st.markdown(f"#### 🎧 Sesi Mendengarkan (jeda > {gap_minutes} menit memulai sesi baru)")
+    if sessions is None:
+        st.info("Analisis sesi membutuhkan data lengkap; matikan mode hemat memori, penyimpanan SQL, dan filter artis untuk melihatnya.")
+        return
+    if len(sessions) == 0:
+        return
+    section = session_analysis(sessions, tz)
+    section.update(session_figures(section))
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("🎧 Jumlah Sesi", f"{section['n_sessions']:,}")
+    with col2:
+        st.metric("⏳ Median Durasi Sesi", f"{section['median_duration']:.0f} menit")
+    with col3:
+        st.metric("🎶 Rata-rata Lagu per Sesi", f"{section['mean_tracks']:.1f}")
+    with col4:
+        st.metric("⏭️ Porsi Skip", f"{section['skip_share']:.1%}")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        plotly_chart(section['fig_length'])
+    with col2:
+        plotly_chart(section['fig_tracks'])
+    
+    with st.expander("🏆 Sesi Terpanjang"):
+        longest = section['longest_sessions']
+        longest = pd.DataFrame({
+            'Mulai': longest['mulai'].dt.strftime('%Y-%m-%d %H:%M'),
+            'Durasi': longest['durasi_menit'].map(lambda m: f"{m:.0f} menit"),
+            'Jumlah Lagu': longest['jumlah_lagu'],
+            'Porsi Skip': longest['porsi_skip'].map(lambda p: f"{p:.0%}"),
+        })
+        st.dataframe(longest, use_container_width=True)
+
+def create_streak_analysis(streaks, start_date=None, end_date=None):
+    """Rangkaian beruntun: hari mendengarkan berturut-turut, lagu diulang, dan binge artis"""
+    st.markdown("#### 🔥 Rangkaian Beruntun")
+    if streaks is None:
+        st.info("Rangkaian beruntun dihitung dari seluruh riwayat; matikan filter artis untuk melihatnya.")
+        return
+    min_binge = st.slider(
+        "Binge: pemutaran berturut-turut dari satu artis, minimal",
+        min_value=MIN_STORED_BINGE,
+        max_value=30,
+        value=BINGE_MIN_PLAYS,
+        key='min_binge'
+    )
+    section = streak_analysis(streaks, start_date, end_date, min_binge)
+    if section['active_days'] == 0:
+        return
+    section.update(streak_figures(section))
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric(
+            "🔥 Rangkaian Terpanjang", f"{section['longest_streak']:,} hari",
+            f"{section['longest_streak_start']:%Y-%m-%d} – {section['longest_streak_end']:%Y-%m-%d}",
+            delta_color='off'
+        )
+    with col2:
+        st.metric(
+            "📅 Rangkaian Terakhir", f"{section['current_streak']:,} hari",
+            f"hingga {section['current_streak_end']:%Y-%m-%d}", delta_color='off'
+        )
+    with col3:
+        repeats = section['repeats']
+        if len(repeats):
+            top = repeats.iloc[0]
+            st.metric("🔁 Diulang Berturut-turut", f"{top['jumlah_putar']}x", top['track_name'],
+                      delta_color='off')
+        else:
+            st.metric("🔁 Diulang Berturut-turut", "-")
+    with col4:
+        st.metric("🎧 Binge Artis", f"{section['n_binges']:,}", f"{section['binge_plays']:,} pemutaran",
+                  delta_color='off')
+
+    col1, col2 = st.columns(2)
+    with col1:
+        plotly_chart(section['fig_streaks'])
+    with col2:
+        if len(section['binge_artists']):
+            plotly_chart(section['fig_binges'])
+        else:
+            st.info(f"Tidak ada binge {min_binge}+ pemutaran berturut-turut dalam rentang ini.")
+
+    with st.expander("🏆 Rangkaian, Ulangan, dan Binge Terpanjang"):
+        streak_table = section['longest_streaks'].rename(columns={'mulai': 'Mulai', 'selesai': 'Selesai', 'hari': 'Hari'})
+        st.dataframe(streak_table, use_container_width=True)
+        repeat_table = pd.DataFrame({
+            'Lagu': repeats['track_name'],
+            'Artis': repeats['artist_name'],
+            'Mulai': repeats['mulai'].dt.strftime('%Y-%m-%d %H:%M'),
+            'Berturut-turut': repeats['jumlah_putar'],
+        })
+        st.dataframe(repeat_table, use_container_width=True)
+        binges = section['longest_binges']
+        binge_table = pd.DataFrame({
+            'Artis': binges['artist_name'],
+            'Mulai': binges['mulai'].dt.strftime('%Y-%m-%d %H:%M'),
+            'Berturut-turut': binges['jumlah_putar'],
+            'Durasi': binges['menit_diputar'].map(lambda m: f"{m:.0f} menit"),
+        })
+        st.dataframe(binge_table, use_container_width=True)
+
+def create_pattern_analysis(agg, sessions=None, gap_minutes=DEFAULT_SESSION_GAP_MINUTES,
+                            streaks=None, filter_dates=(None, None)):
     """Analisis pola dan tren khusus"""
     st.subheader("🎭 Tren dan Pola Khusus dalam Kebiasaan Mendengarkan")
+    section = build_section(agg, 'pattern')
     
-    # Statistik konsistensi
-    days_with_music = data['tanggal'].nunique()
-    total_days = (data['ts'].max() - data['ts'].min()).days + 1
-    consistency = (days_with_music / total_days) * 100
-    
-    artist_diversity = data['artist_name'].nunique()
-    total_sessions = len(data)
+    days_with_music = section['days_with_music']
+    consistency = section['consistency']
+    artist_diversity = section['artist_diversity']
+    total_sessions = agg.total_plays
     diversity_ratio = artist_diversity / total_sessions
     
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("🎯 Konsistensi", f"{consistency:.1f}%", f"{days_with_music}/{total_days} hari")
+        st.metric("🎯 Konsistensi", f"{consistency:.1f}%", f"{days_with_music}/{section['total_days']} hari")
     with col2:
-        st.metric("🎨 Keragaman Artis", f"{artist_diversity}", f"dari {total_sessions:,} sesi")
+        diversity_bound = agg.error_bounds().get('n_artists')
+        st.metric(
+            "🎨 Keragaman Artis",
+            f"≈{artist_diversity}" if diversity_bound else f"{artist_diversity}",
+            f"dari {total_sessions:,} pemutaran",
+            help=f"Perkiraan HyperLogLog, ±{diversity_bound:.1%} (~95%)" if diversity_bound else None
+        )
     with col3:
         st.metric("🔄 Rasio Keragaman", f"{diversity_ratio:.3f}")
     
-    # Tren aktivitas harian
-    daily_activity = data.groupby('tanggal').size()
-    
-    fig = px.line(
-        x=daily_activity.index,
-        y=daily_activity.values,
-        title="Tren Aktivitas Harian",
-        labels={'x': 'Tanggal', 'y': 'Jumlah Sesi'}
-    )
-    fig.update_layout(height=400)
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(section['fig_trend'])
     
     col1, col2 = st.columns(2)
     
     with col1:
-        # Distribusi sesi per hari
-        sessions_per_day = daily_activity.value_counts().sort_index()
-        
-        fig = px.bar(
-            x=sessions_per_day.index,
-            y=sessions_per_day.values,
-            title="Distribusi Sesi per Hari",
-            labels={'x': 'Jumlah Sesi per Hari', 'y': 'Frekuensi Hari'}
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(section['fig_distribution'])
     
     with col2:
-        # Pola weekday vs weekend
-        weekend_hourly = data[data['akhir_pekan']].groupby('jam').size()
-        weekday_hourly = data[~data['akhir_pekan']].groupby('jam').size()
-        
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=weekday_hourly.index, y=weekday_hourly.values,
-                                mode='lines+markers', name='Hari Kerja'))
-        fig.add_trace(go.Scatter(x=weekend_hourly.index, y=weekend_hourly.values,
-                                mode='lines+markers', name='Akhir Pekan'))
-        
-        fig.update_layout(
-            title="Pola Mendengarkan: Hari Kerja vs Akhir Pekan",
-            xaxis_title="Jam",
-            yaxis_title="Jumlah Sesi"
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(section['fig_weekend'])
     
     # Analisis mendalam
-    weekday_peak = weekday_hourly.idxmax() if len(weekday_hourly) > 0 else 0
-    weekend_peak = weekend_hourly.idxmax() if len(weekend_hourly) > 0 else 0
-    avg_sessions_per_day = len(data) / days_with_music
-    most_active_day = daily_activity.idxmax()
-    max_sessions = daily_activity.max()
+    avg_sessions_per_day = agg.total_plays / days_with_music
     
     st.markdown(f"""
     <div class="insight-box">
         <h4>📈 Analisis Mendalam:</h4>
         <ul>
-            <li><strong>Jam tersibuk hari kerja:</strong> {weekday_peak}:00</li>
-            <li><strong>Jam tersibuk akhir pekan:</strong> {weekend_peak}:00</li>
-            <li><strong>Rata-rata sesi per hari:</strong> {avg_sessions_per_day:.1f}</li>
-            <li><strong>Hari paling aktif:</strong> {most_active_day} dengan {max_sessions} sesi</li>
+            <li><strong>Jam tersibuk hari kerja:</strong> {section['weekday_peak']}:00</li>
+            <li><strong>Jam tersibuk akhir pekan:</strong> {section['weekend_peak']}:00</li>
+            <li><strong>Rata-rata pemutaran per hari:</strong> {avg_sessions_per_day:.1f}</li>
+            <li><strong>Hari paling aktif:</strong> {section['most_active_day']:%Y-%m-%d} dengan {section['max_sessions']} pemutaran</li>
         </ul>
         <h4>✨ Insight: Anda memiliki pola mendengarkan yang konsisten <strong>{consistency:.1f}%</strong> dengan keragaman <strong>{artist_diversity}</strong> artis!</h4>
     </div>
     """, unsafe_allow_html=True)
+    
+    create_streak_analysis(streaks, *filter_dates)
+    create_session_analysis(sessions, gap_minutes, agg.tz)
+
+def picked_range(picked, default):
+    """Rentang (awal, akhir) dari date_input; selama belum lengkap hanya tanggal awal yang ada."""
+    picked = tuple(picked)
+    return (picked + picked)[:2] if picked else default
+
+def create_comparison_analysis(engine, filtered=False):
+    """Perbandingan dua periode: total, selisih, pola jam, dan artis teratas"""
+    st.subheader("📊 Perbandingan Periode")
+    if engine is None or engine.n_days == 0:
+        return
+    if filtered:
+        st.caption("Bagian ini selalu memakai seluruh riwayat; filter di sidebar tidak berlaku di sini.")
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        period = st.selectbox(
+            "Periode",
+            list(PERIODS) + ['custom'],
+            format_func=lambda key: PERIODS.get(key, "Rentang kustom"),
+            key='comparison_period'
+        )
+    with col2:
+        rolling_days = st.selectbox("Rata-rata bergulir", [7, 14, 30], format_func=lambda days: f"{days} hari")
+    
+    current, previous = period_windows('last_30', engine.last_date)
+    if period == 'custom':
+        col1, col2 = st.columns(2)
+        bounds = {'min_value': engine.first_date, 'max_value': engine.last_date}
+        with col1:
+            current = picked_range(st.date_input("Periode ini", value=current, **bounds), current)
+        with col2:
+            previous = picked_range(st.date_input("Periode pembanding", value=previous, **bounds), previous)
+    else:
+        current, previous = period_windows(period, engine.last_date)
+    
+    with stage('analysis:comparison'):
+        section = comparison_analysis(engine, current, previous, rolling_days)
+    with stage('figures:comparison'):
+        section.update(comparison_figures(section))
+    summary = section['summary']
+    
+    def change(metric):
+        value = summary.loc[metric, 'change']
+        return None if pd.isna(value) else f"{value:+.1%}"
+    
+    st.caption(f"Periode ini: {current[0]:%d %b %Y} – {current[1]:%d %b %Y} · "
+               f"Pembanding: {previous[0]:%d %b %Y} – {previous[1]:%d %b %Y}")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("🎵 Pemutaran", f"{summary.loc['plays', 'current']:,.0f}", change('plays'))
+    with col2:
+        st.metric("⏰ Waktu", f"{summary.loc['menit', 'current'] / 60:.1f} jam", change('menit'))
+    with col3:
+        st.metric("📅 Hari Aktif", f"{summary.loc['active_days', 'current']:.0f}",
+                  f"{summary.loc['active_days', 'delta']:+.0f} hari")
+    with col4:
+        st.metric("📈 Pemutaran per Hari", f"{summary.loc['plays_per_day', 'current']:.1f}", change('plays_per_day'))
+    
+    plotly_chart(section['fig_rolling'])
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        plotly_chart(section['fig_hourly'])
+    with col2:
+        plotly_chart(section['fig_artists'])
+    
+    with st.expander("📋 Detail Artis"):
+        artists = section['artists']
+        st.dataframe(pd.DataFrame({
+            'Periode Ini': artists['current'],
+            'Pembanding': artists['previous'],
+            'Selisih': artists['delta'],
+            'Peringkat Ini': artists['current_rank'].astype('Int64'),
+            'Peringkat Pembanding': artists['previous_rank'].astype('Int64'),
+            'Menit Periode Ini': artists['current_menit'].round(1),
+        }), use_container_width=True)
+        st.caption(f"Hanya {COMPARISON_ARTISTS} artis teratas di seluruh riwayat yang dilacak per hari.")
+    
+    insights = []
+    if section['top_artist'] is not None:
+        insights.append(f"<li><strong>Artis teratas periode ini:</strong> {section['top_artist']}</li>")
+    if section['peak_hour'] is not None:
+        insights.append(f"<li><strong>Jam tersibuk periode ini:</strong> {section['peak_hour']}:00</li>")
+    if section['rising_artist'] is not None:
+        insights.append(f"<li><strong>Paling naik:</strong> {section['rising_artist']} ({section['rising_delta']:+,} pemutaran)</li>")
+    if section['falling_artist'] is not None:
+        insights.append(f"<li><strong>Paling turun:</strong> {section['falling_artist']} ({section['falling_delta']:+,} pemutaran)</li>")
+    plays_change = change('plays')
+    st.markdown(f"""
+    <div class="insight-box">
+        <ul>{''.join(insights)}</ul>
+        <h4>✨ Insight: Pemutaran Anda {'berubah <strong>' + plays_change + '</strong>' if plays_change else 'belum bisa dibandingkan'} dibanding periode pembanding!</h4>
+    </div>
+    """, unsafe_allow_html=True)
+
+def show_profile(profiler):
+    """Panel debug di sidebar: ringkasan tahap pada putaran ini, berjenjang sesuai pemanggilan."""
+    with st.sidebar.expander("🛠️ Profil tahap", expanded=True):
+        show_cache_stats()
+        summary = pd.DataFrame(profiler.summary())
+        if summary.empty:
+            st.caption("Belum ada tahap yang tercatat.")
+            return
+        st.dataframe(pd.DataFrame({
+            'Tahap': ['\u2003' * depth + stage.rsplit('/', 1)[-1] for stage, depth in zip(summary['stage'], summary['depth'])],
+            'Panggilan': summary['calls'],
+            'Dinding (ms)': (summary['wall_s'] * 1000).round(1),
+            'CPU (ms)': (summary['cpu_s'] * 1000).round(1),
+            'Baris': summary['rows'],
+            'Puncak (MB)': summary['peak_mb'].round(1),
+        }), hide_index=True, use_container_width=True)
+        st.caption("Tahap yang dilayani cache hanya mencatat waktu pengambilan dari cache. "
+                   + ("Memori: tracemalloc." if profiler.trace_memory else "Memori: kenaikan RSS puncak proses."))
+
+def show_cache_stats():
+    """Penghitung cache grafik bersama untuk seluruh proses, bukan hanya sesi ini."""
+    stats = SECTION_CACHE.stats()
+    st.caption(
+        f"Cache grafik (semua sesi): {stats['entries']}/{stats['max_entries']} entri, "
+        f"{stats['hits']} hit, {stats['misses']} miss, {stats['computed']} dihitung, "
+        f"{stats['coalesced']} menunggu perhitungan lain, {stats['evictions']} dikeluarkan. "
+        + ("Kunci lintas worker aktif." if LOCK_DIR else "Kunci lintas worker tidak aktif (SPOTIFY_LOCK_DIR).")
+    )
+
+# Navigasi bagian: hanya bagian yang aktif yang dihitung dan dirender
+SECTIONS = {
+    "🎤 Artis Favorit": create_artist_analysis,
+    "🎵 Lagu Favorit": create_song_analysis,
+    "⏰ Pola Waktu": create_time_analysis,
+    "⏱️ Durasi": create_duration_analysis,
+    "⏭️ Skip & Shuffle": create_playback_analysis,
+    "🎭 Tren & Pola": create_pattern_analysis,
+    "📊 Perbandingan": create_comparison_analysis,
+}
 
 def main():
     """Fungsi utama aplikasi"""
@@ -494,59 +1019,173 @@ def main():
     1. Masuk ke akun Spotify Anda
     2. Pergi ke Privacy Settings
     3. Request data Anda
-    4. Download file JSON/CSV yang diberikan
-    5. Upload file 'spotify_extended_streaming_history.csv' di sini
+    4. Download file ZIP yang diberikan
+    5. Upload file ZIP tersebut, shard `endsong_X.json` / `Streaming_History_Audio_*.json`, atau CSV di sini
     """)
     
     uploaded_file = st.sidebar.file_uploader(
         "Choose your Spotify data file",
-        type=['csv'],
-        help="Upload file CSV dari data Spotify Anda"
+        type=['csv', 'json', 'zip'],
+        accept_multiple_files=True,
+        help="Upload ZIP ekspor Spotify, satu atau beberapa shard JSON, atau file CSV"
+    )
+    
+    with st.sidebar.expander("➕ Tambah ekspor baru"):
+        new_files = st.file_uploader(
+            "Ekspor terbaru",
+            type=['csv', 'json', 'zip'],
+            accept_multiple_files=True,
+            key='new_export',
+            help="Hanya pemutaran yang belum ada di riwayat di atas yang ditambahkan; riwayat lama tidak diproses ulang"
+        )
+    
+    # Pengaturan pemrosesan
+    st.sidebar.header("⚙️ Pengaturan")
+    hemat_memori = st.sidebar.checkbox(
+        "Mode hemat memori",
+        help="Baca CSV per potongan dan langsung ringkas; cocok untuk riwayat berjuta-juta baris"
+    )
+    simpan_sql = st.sidebar.checkbox(
+        "Penyimpanan SQL",
+        help=f"Simpan riwayat di basis data lokal ({SQL_ENGINE}) dan hitung setiap tab dengan kueri; "
+             "memori per pengguna hampir nol. Analisis sesi tidak tersedia"
+    )
+    perkiraan = st.sidebar.checkbox(
+        "Mode perkiraan",
+        help="Hitung artis dan lagu unik dengan HyperLogLog, serta artis dan lagu teratas dengan "
+             "Space-Saving + Count-Min; memori tetap untuk riwayat gabungan yang sangat besar. "
+             "Angka perkiraan ditampilkan beserta batas galatnya"
+    )
+    chunksize = st.sidebar.number_input(
+        "Ukuran potongan (baris)",
+        min_value=10_000,
+        value=DEFAULT_CHUNKSIZE,
+        step=50_000,
+        disabled=not (hemat_memori or simpan_sql),
+        help="Memori puncak sebanding dengan ukuran potongan, bukan panjang riwayat"
     )
+    session_gap = st.sidebar.number_input(
+        "Jeda antar sesi (menit)",
+        min_value=1,
+        max_value=24 * 60,
+        value=DEFAULT_SESSION_GAP_MINUTES,
+        help="Pemutaran yang berjarak lebih dari ini dihitung sebagai sesi mendengarkan baru"
+    )
+    timezones = [DEFAULT_TIMEZONE] + sorted(available_timezones() - {DEFAULT_TIMEZONE})
+    tz = st.sidebar.selectbox(
+        "Zona waktu",
+        timezones,
+        index=0,
+        help="Ekspor Spotify mencatat waktu dalam UTC; jam, hari, dan tanggal dihitung dalam zona ini"
+    )
+    debug = st.sidebar.checkbox(
+        "Panel debug",
+        help="Tampilkan waktu, CPU, jumlah baris, dan memori puncak setiap tahap pada putaran ini"
+    )
+    lacak_memori = debug and st.sidebar.checkbox(
+        "Lacak memori dengan tracemalloc",
+        help="Memori puncak per tahap lebih tepat, tetapi pemrosesan menjadi lebih lambat"
+    )
+    # Tanpa panel debug maupun SPOTIFY_PROFILE, setiap tahap hanya memeriksa satu ContextVar
+    profiler = activate(Profiler(trace_memory=lacak_memori) if debug or PROFILE_ENABLED else None)
     
-    if uploaded_file is not None:
+    if uploaded_file:
         # Load dan clean data
         with st.spinner('🔄 Memproses data Spotify Anda...'):
-            data = load_and_clean_data(uploaded_file)
+            dataset_key = dataset_key_for(uploaded_file, tz)
+            if new_files and (simpan_sql or perkiraan):
+                # Basis data SQL dan sketsa dibangun ulang dari semua file; tumpang tindih dibuang per potongan
+                dataset_key = combine_keys(dataset_key, content_hash(new_files))
+                uploaded_file = uploaded_file + new_files
+            elif new_files:
+                dataset_key, added = append_export(
+                    uploaded_file, new_files, int(chunksize) if hemat_memori else None, dataset_key, tz
+                )
+                uploaded_file = uploaded_file + new_files
+                if dataset_key is not None:
+                    st.sidebar.success(f"✅ {added:,} pemutaran baru ditambahkan")
+            agg = None
+            if simpan_sql:
+                agg = load_sql_aggregates(uploaded_file, int(chunksize), dataset_key, tz)
+            elif perkiraan:
+                agg = load_sketch_aggregates(uploaded_file, int(chunksize) if hemat_memori else None, dataset_key, tz)
+            elif dataset_key is not None:
+                agg = load_aggregates(uploaded_file, int(chunksize) if hemat_memori else None, dataset_key, tz)
         
-        if data is not None:
+        # Filter tanggal dan artis; indeks dibangun sekali saat filter pertama kali diaktifkan
+        full_agg = agg
+        filter_dates, filter_artists = (None, None), []
+        if agg is not None and not (simpan_sql or perkiraan):
+            st.sidebar.header("🔎 Filter")
+            if st.sidebar.checkbox("Aktifkan filter", help="Batasi analisis ke rentang tanggal dan artis tertentu"):
+                with st.spinner('🔄 Menyiapkan indeks filter...'):
+                    index = load_history_index(uploaded_file, int(chunksize) if hemat_memori else None, dataset_key, tz)
+                if index is not None and len(index):
+                    picked = st.sidebar.date_input(
+                        "Rentang tanggal",
+                        value=(index.first_date, index.last_date),
+                        min_value=index.first_date,
+                        max_value=index.last_date
+                    )
+                    # Selama rentang belum lengkap, date_input hanya mengembalikan tanggal awal
+                    filter_dates = (tuple(picked) + (index.last_date,))[:2]
+                    filter_artists = st.sidebar.multiselect(
+                        "Artis",
+                        index.top_artist_names(FILTER_ARTIST_OPTIONS),
+                        help=f"Pilihan berisi {FILTER_ARTIST_OPTIONS:,} artis dengan pemutaran terbanyak"
+                    )
+                    if filter_dates != (index.first_date, index.last_date) or filter_artists:
+                        agg = filter_aggregates(index, dataset_key, *filter_dates, filter_artists)
+        
+        if agg is not None and agg.total_plays == 0:
+            st.warning("Tidak ada pemutaran yang cocok dengan filter.")
+        elif agg is not None:
             # Overview metrics
             st.subheader("📊 Overview Data Anda")
             
+            bounds = agg.error_bounds()
             col1, col2, col3, col4 = st.columns(4)
             with col1:
-                st.metric("🎵 Total Sesi", f"{len(data):,}")
+                st.metric("🎵 Total Pemutaran", f"{agg.total_plays:,}")
             with col2:
-                st.metric("🎤 Lagu Unik", f"{data['track_name'].nunique():,}")
+                estimate_metric("🎤 Lagu Unik", agg.n_tracks, bounds.get('n_tracks'))
             with col3:
-                st.metric("🎨 Artis Unik", f"{data['artist_name'].nunique():,}")
+                estimate_metric("🎨 Artis Unik", agg.n_artists, bounds.get('n_artists'))
             with col4:
-                total_hours = data['menit_diputar'].sum() / 60
+                total_hours = agg.total_minutes / 60
                 st.metric("⏰ Total Waktu", f"{total_hours:.1f} jam")
             
-            # Tab navigation
-            tab1, tab2, tab3, tab4, tab5 = st.tabs([
-                "🎤 Artis Favorit",
-                "🎵 Lagu Favorit", 
-                "⏰ Pola Waktu",
-                "⏱️ Durasi",
-                "🎭 Tren & Pola"
-            ])
-            
-            with tab1:
-                create_artist_analysis(data)
-            
-            with tab2:
-                create_song_analysis(data)
-            
-            with tab3:
-                create_time_analysis(data)
-            
-            with tab4:
-                create_duration_analysis(data)
-            
-            with tab5:
-                create_pattern_analysis(data)
+            # Navigasi bagian; berbeda dengan st.tabs, hanya bagian aktif yang dijalankan
+            section = st.radio(
+                "Bagian analisis",
+                list(SECTIONS),
+                horizontal=True,
+                label_visibility='collapsed',
+                key='active_section'
+            )
+            with stage(SECTIONS[section].__name__, rows=agg.total_plays):
+                if SECTIONS[section] is create_pattern_analysis:
+                    # Sesi dihitung dari data lengkap, hanya saat bagian ini dibuka
+                    sessions = None
+                    if not (hemat_memori or simpan_sql or filter_artists):
+                        sessions = filter_sessions(
+                            load_sessions(uploaded_file, int(session_gap), dataset_key, tz), *filter_dates, tz
+                        )
+                    # Rangkaian dari seluruh riwayat; rentang tanggal filter dipakai saat menampilkan
+                    streaks = None
+                    if not filter_artists:
+                        streaks = load_streaks(
+                            uploaded_file, int(chunksize) if hemat_memori or simpan_sql else None, dataset_key, tz
+                        )
+                    create_pattern_analysis(agg, sessions, int(session_gap), streaks, filter_dates)
+                elif SECTIONS[section] is create_comparison_analysis:
+                    # Periode dipilih di dalam bagian, dari seluruh riwayat
+                    engine = load_comparison(
+                        uploaded_file, full_agg, int(chunksize) if hemat_memori else None, dataset_key, tz
+                    )
+                    create_comparison_analysis(engine, filtered=full_agg is not agg)
+                else:
+                    SECTIONS[section](agg)
             
             # Footer
             st.markdown("---")
@@ -577,11 +1216,22 @@ def main():
         
         ### ⏱️ **Durasi Mendengarkan**
         - Berapa lama rata-rata Anda mendengarkan setiap lagu?
+        - Berapa lama pemutaran terpanjang Anda?
+        
+        ### ⏭️ **Skip & Shuffle**
         - Apakah Anda sering skip lagu atau mendengarkan sampai habis?
+        - Apakah Anda lebih sering skip saat shuffle, di jam tertentu, atau di perangkat tertentu?
+        - Bagaimana lagu dimulai dan diakhiri (tombol next, klik, lagu selesai)?
         
         ### 🎭 **Tren & Pola Khusus**
         - Bagaimana konsistensi mendengarkan musik Anda?
         - Seberapa beragam selera musik Anda?
+        - Berapa lama satu sesi mendengarkan Anda, dan berapa lagu di dalamnya?
+        - Berapa hari berturut-turut Anda mendengarkan musik, lagu apa yang paling sering diulang, dan artis mana yang Anda putar tanpa henti?
+        
+        ### 📊 **Perbandingan Periode**
+        - Apakah tahun ini Anda mendengarkan lebih banyak daripada tahun lalu?
+        - Artis mana yang naik atau turun dibanding 30 hari sebelumnya?
         
         ---
         
@@ -593,13 +1243,20 @@ def main():
         4. Pilih **"Extended streaming history"** dan **"Account data"**
         5. Tunggu email dari Spotify (biasanya 1-30 hari)
         6. Download file ZIP yang dikirim Spotify
-        7. Extract dan upload file **"endsong_X.json"** atau CSV yang sudah dikonversi
+        7. Upload file ZIP tersebut langsung, atau shard **"endsong_X.json"** / **"Streaming_History_Audio_*.json"**
         
         ### 📋 **Format Data yang Didukung:**
-        - File CSV dengan kolom: `ts`, `ms_played`, `track_name`, `artist_name`, `album_name`
+        - ZIP ekspor Spotify atau shard JSON riwayat streaming (beberapa file sekaligus)
+        - File CSV dengan kolom wajib: `ts`, `ms_played`, `track_name`, `artist_name`
+        - Kolom opsional `spotify_track_uri`, `platform`, `reason_start`, `reason_end`, `shuffle`, `skipped` dipakai bila ada; kolom lain dilewati
         - File harus dalam format UTF-8
         - Ukuran file maksimal 200MB
         """)
+    
+    if profiler is not None:
+        export(profiler, caches={'sections': SECTION_CACHE.stats()}, section=st.session_state.get('active_section'))
+        if debug:
+            show_profile(profiler)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
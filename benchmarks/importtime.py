@@ -0,0 +1,118 @@
+"""Anggaran waktu impor dingin app.py, diukur dengan ``python -X importtime``.
+
+Setiap putaran menjalankan interpreter baru yang hanya mengimpor ``app``.
+Hasilnya gagal (exit code 1) jika median waktu impor kumulatif melebihi
+anggaran, atau jika modul berat yang tidak dibutuhkan saat mulai ikut
+terimpor. Pemeriksaan kedua tidak bergantung pada kecepatan mesin.
+
+Contoh::
+
+    python -m benchmarks.importtime --budget-ms 2500 --runs 5
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Sebelum impor yang tidak terpakai dibuang, impor dingin sekitar 3,2 s di
+# mesin pengukuran; setelahnya sekitar 2,0 s, hampir seluruhnya streamlit dan pandas
+DEFAULT_BUDGET_MS = 2500
+DEFAULT_RUNS = 3
+
+# Modul yang tidak boleh dimuat saat app.py diimpor: tidak dipakai sama
+# sekali, atau baru dibutuhkan saat grafik pertama dibuat. plotly.graph_objects
+# tidak termasuk karena streamlit sendiri sudah memuatnya.
+FORBIDDEN_MODULES = ['matplotlib', 'seaborn', 'plotly.express', 'plotly.subplots']
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def parse_importtime(stderr):
+    """Daftar (modul, kedalaman, self_us, kumulatif_us) dari keluaran ``-X importtime``."""
+    entries = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, (len(indent) - 1) // 2, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def measure_import(module='app'):
+    """Satu impor dingin di interpreter baru; mengembalikan entri importtime."""
+    env = dict(os.environ, SPOTIFY_CACHE_MAX_MB='0')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return parse_importtime(result.stderr)
+
+
+def summarize(entries, module='app', top=10):
+    """Waktu kumulatif modul, impor langsung terberat, dan modul terlarang yang termuat."""
+    position = next(i for i, entry in enumerate(entries) if entry[0] == module and entry[1] == 0)
+    start = position
+    while start > 0 and entries[start - 1][1] > 0:
+        start -= 1
+    children = [entry for entry in entries[start:position] if entry[1] == 1]
+    loaded = {entry[0] for entry in entries}
+    return {
+        'cumulative_ms': entries[position][3] / 1000,
+        'heaviest': [
+            {'module': name, 'cumulative_ms': cumulative / 1000}
+            for name, _, _, cumulative in sorted(children, key=lambda entry: -entry[3])[:top]
+        ],
+        'forbidden': [
+            forbidden for forbidden in FORBIDDEN_MODULES
+            if any(name == forbidden or name.startswith(forbidden + '.') for name in loaded)
+        ],
+    }
+
+
+def check(budget_ms=DEFAULT_BUDGET_MS, runs=DEFAULT_RUNS, module='app'):
+    summaries = [summarize(measure_import(module), module) for _ in range(runs)]
+    median_ms = statistics.median(summary['cumulative_ms'] for summary in summaries)
+    forbidden = sorted(set().union(*(summary['forbidden'] for summary in summaries)))
+    return {
+        'module': module,
+        'budget_ms': budget_ms,
+        'runs_ms': [summary['cumulative_ms'] for summary in summaries],
+        'median_ms': median_ms,
+        'heaviest': summaries[-1]['heaviest'],
+        'forbidden': forbidden,
+        'ok': median_ms <= budget_ms and not forbidden,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memeriksa anggaran waktu impor dingin app.py")
+    parser.add_argument('--budget-ms', type=float,
+                        default=float(os.environ.get('APP_IMPORT_BUDGET_MS', DEFAULT_BUDGET_MS)))
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS)
+    parser.add_argument('--json', action='store_true', help="cetak hasil sebagai JSON")
+    args = parser.parse_args(argv)
+
+    result = check(args.budget_ms, args.runs)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"impor {result['module']}: median {result['median_ms']:.0f} ms "
+              f"(anggaran {result['budget_ms']:.0f} ms, putaran: "
+              f"{', '.join(f'{ms:.0f}' for ms in result['runs_ms'])})")
+        for entry in result['heaviest']:
+            print(f"  {entry['cumulative_ms']:8.1f} ms  {entry['module']}")
+        if result['forbidden']:
+            print(f"modul terlarang ikut termuat: {', '.join(result['forbidden'])}")
+        print('OK' if result['ok'] else 'GAGAL')
+    return 0 if result['ok'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""Benchmark jalur pemuatan dan analisis.
+
+Setiap tahap diukur terpisah: penguraian file, pembersihan, agregasi,
+pemuatan per potongan, sesi, sketsa mode perkiraan, indeks dan kueri
+filter, pengisian dan kueri basis data SQL, perhitungan setiap tab,
+pembuatan grafik, dan serialisasi grafik ke JSON Plotly. Waktu diambil
+dari beberapa ulangan (minimum dan median), sedangkan puncak memori
+diukur pada satu putaran terpisah dengan ``tracemalloc`` agar tidak
+membebani pengukuran waktu. Hasilnya ditulis sebagai JSON sehingga bisa
+dibandingkan antar commit.
+
+Contoh::
+
+    python -m benchmarks.run --sizes 10k 1m --output bench.json
+    python -m benchmarks.run --compare bench-lama.json bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from aggregates import ListeningAggregates  # noqa: E402
+from analysis import ANALYSES, session_analysis  # noqa: E402
+from benchmarks.synthetic import DEFAULT_SEED, parse_size, write_history  # noqa: E402
+from figures import FIGURES  # noqa: E402
+from filters import HistoryIndex  # noqa: E402
+from ingest import DEFAULT_CHUNKSIZE, clean_frame, iter_clean_chunks, read_export  # noqa: E402
+from sessions import sessionize  # noqa: E402
+from sketches import SketchAggregates  # noqa: E402
+from sql_store import SQL_ENGINE, SqlAggregates, SqlStore  # noqa: E402
+
+DATA_DIR = os.path.join(ROOT, 'benchmarks', 'data')
+DEFAULT_SIZES = ['10k', '1m']
+DEFAULT_REPEAT = 3
+
+# Selisih relatif yang ditandai saat membandingkan dua hasil
+REGRESSION_THRESHOLD = 0.10
+
+
+def _git_commit():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('-dirty' if dirty else '')
+
+
+def _max_rss_mb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss dalam KB di Linux dan dalam byte di macOS
+    return usage / 1024 ** 2 if sys.platform == 'darwin' else usage / 1024
+
+
+class Stage:
+    """Satu tahap yang diukur: ``run(input)`` diukur, ``setup()`` tidak."""
+
+    def __init__(self, name, run, setup=None):
+        self.name = name
+        self.run = run
+        self.setup = setup or (lambda: None)
+
+
+def time_stage(stage, repeat):
+    wall, cpu = [], []
+    result = None
+    for _ in range(repeat):
+        argument = stage.setup()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        result = stage.run(argument)
+        wall.append(time.perf_counter() - wall_start)
+        cpu.append(time.process_time() - cpu_start)
+    return result, {
+        'wall_s_min': min(wall),
+        'wall_s_median': statistics.median(wall),
+        'cpu_s_median': statistics.median(cpu),
+    }
+
+
+def peak_memory(stage):
+    """Puncak alokasi Python/NumPy selama satu tahap, dalam MB.
+
+    Buffer Arrow dialokasikan di luar jangkauan tracemalloc sehingga tidak
+    terhitung; ``max_rss_mb`` pada hasil mencakup seluruh proses.
+    """
+    argument = stage.setup()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        stage.run(argument)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return (peak - baseline) / 1024 ** 2
+
+
+def dataset_path(size, seed=DEFAULT_SEED, data_dir=DATA_DIR):
+    """Path CSV sintetis untuk satu ukuran; dibuat sekali lalu dipakai ulang."""
+    n_rows = parse_size(size)
+    path = os.path.join(data_dir, f"history-{n_rows}-seed{seed}.csv")
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        write_history(path + '.tmp', n_rows, seed)
+        os.replace(path + '.tmp', path)
+    return path
+
+
+def benchmark_dataset(path, repeat=DEFAULT_REPEAT, memory=True):
+    """Mengukur semua tahap untuk satu file dan mengembalikan hasil per tahap."""
+    stages = {}
+
+    def measure(stage):
+        result, timing = time_stage(stage, repeat)
+        if memory:
+            timing['peak_mb'] = peak_memory(stage)
+        stages[stage.name] = timing
+        return result
+
+    raw = measure(Stage('parse', lambda _: read_export(path)))
+    data = measure(Stage('clean', clean_frame, setup=lambda: raw.copy()))
+    del raw
+    agg = measure(Stage('aggregate', lambda _: ListeningAggregates.from_frame(data)))
+    measure(Stage(
+        'load_chunked', lambda _: ListeningAggregates.from_chunks(iter_clean_chunks(path, DEFAULT_CHUNKSIZE))
+    ))
+    sessions = measure(Stage('sessions', lambda _: sessionize(data)))
+
+    # Mode perkiraan: artis dan lagu sebagai sketsa, lalu tab yang membacanya
+    sketch = measure(Stage(
+        'load_sketch', lambda _: SketchAggregates.from_chunks(iter_clean_chunks(path, DEFAULT_CHUNKSIZE))
+    ))
+    measure(Stage('tabs_sketch', lambda _: [analyse(sketch) for analyse in ANALYSES.values()]))
+    del sketch
+
+    # Filter: pembangunan indeks, lalu rentang tanggal setengah riwayat dan tiga artis teratas
+    index = measure(Stage('filter_index', lambda _: HistoryIndex.from_frame(data)))
+    quarter = (index.last_date - index.first_date) / 4
+    start_date, end_date = index.first_date + quarter, index.last_date - quarter
+    measure(Stage('filter:dates', lambda _: index.aggregates(start_date, end_date)))
+    measure(Stage('filter:artists', lambda _: index.aggregates(artists=index.top_artist_names(3))))
+    del index
+
+    # Basis data SQL: pengisian per potongan, lalu semua tab lewat kueri
+    with tempfile.TemporaryDirectory() as directory:
+        sql_path = os.path.join(directory, 'plays.db')
+        store = measure(Stage(
+            f'load_sql:{SQL_ENGINE}', lambda _: SqlStore.build(sql_path, iter_clean_chunks(path, DEFAULT_CHUNKSIZE))
+        ))
+        measure(Stage(
+            f'tabs_sql:{SQL_ENGINE}',
+            lambda _: [analyse(SqlAggregates(store)) for analyse in ANALYSES.values()]
+        ))
+
+    analyses = dict(ANALYSES, session=lambda _: session_analysis(sessions))
+    figure_bytes = {}
+    for name, analyse in analyses.items():
+        result = measure(Stage(f'tab:{name}', lambda _, analyse=analyse: analyse(agg)))
+        figures = measure(Stage(f'figures:{name}', lambda _, name=name: FIGURES[name](result)))
+        payload = measure(Stage(
+            f'serialize:{name}', lambda _, figures=figures: [figure.to_json() for figure in figures.values()]
+        ))
+        figure_bytes[name] = sum(len(item) for item in payload)
+
+    return {
+        'rows': len(data),
+        'frame_mb': data.memory_usage(deep=True).sum() / 1024 ** 2,
+        'stages': stages,
+        'figure_bytes': figure_bytes,
+    }
+
+
+def run(sizes=DEFAULT_SIZES, repeat=DEFAULT_REPEAT, seed=DEFAULT_SEED, memory=True, data_dir=DATA_DIR):
+    results = {
+        'commit': _git_commit(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'repeat': repeat,
+        'seed': seed,
+        'datasets': {},
+    }
+    for size in sizes:
+        path = dataset_path(size, seed, data_dir)
+        results['datasets'][str(size)] = benchmark_dataset(path, repeat, memory)
+    results['max_rss_mb'] = _max_rss_mb()
+    return results
+
+
+def compare(old, new, threshold=REGRESSION_THRESHOLD):
+    """Baris perbandingan waktu median per tahap; selisih > ambang ditandai."""
+    lines = [f"{'dataset':<8} {'tahap':<22} {'lama (s)':>10} {'baru (s)':>10} {'rasio':>7}"]
+    for size, dataset in new['datasets'].items():
+        before = old['datasets'].get(size)
+        if before is None:
+            continue
+        for name, timing in dataset['stages'].items():
+            if name not in before['stages']:
+                continue
+            old_s = before['stages'][name]['wall_s_median']
+            new_s = timing['wall_s_median']
+            ratio = new_s / old_s if old_s else float('inf')
+            flag = ' !' if ratio > 1 + threshold else (' +' if ratio < 1 - threshold else '')
+            lines.append(f"{size:<8} {name:<22} {old_s:>10.4f} {new_s:>10.4f} {ratio:>7.2f}{flag}")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pemuatan dan analisis riwayat Spotify")
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES, help="10k, 1m, 10m, atau jumlah baris")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--no-memory', action='store_true', help="lewati pengukuran puncak memori")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--output', help="file JSON hasil; default ke stdout")
+    parser.add_argument('--compare', nargs=2, metavar=('LAMA', 'BARU'), help="bandingkan dua file hasil")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f_old, open(args.compare[1]) as f_new:
+            print('\n'.join(compare(json.load(f_old), json.load(f_new))))
+        return
+
+    results = run(args.sizes, args.repeat, args.seed, not args.no_memory, args.data_dir)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
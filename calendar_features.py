@@ -0,0 +1,122 @@
+"""Fitur kalender dari epoch int64 dengan aritmetika integer.
+
+Tanggal, jam, hari dalam minggu, bulan, tahun, akhir pekan, dan periode
+waktu dihitung langsung dari nanodetik sejak 1970-01-01 tanpa accessor
+``.dt`` yang membangun string atau objek Python per baris. Bulan dan tahun
+dihitung sekali per hari kalender dalam rentang data lalu diambil lewat
+indeks. Label (nama hari, bulan, periode) baru dipasang saat render lewat
+tabel kecil di modul ini.
+"""
+import numpy as np
+import pandas as pd
+
+NS_PER_HOUR = 3600 * 10 ** 9
+NS_PER_DAY = 24 * NS_PER_HOUR
+
+# 1970-01-01 adalah hari Kamis (0 = Senin)
+EPOCH_WEEKDAY = 3
+
+DEFAULT_TIMEZONE = 'UTC'
+
+# Label untuk render; indeks = kode yang disimpan di data
+DAY_LABELS = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu', 'Minggu']
+MONTH_LABELS = [
+    'Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni',
+    'Juli', 'Agustus', 'September', 'Oktober', 'November', 'Desember'
+]
+PERIOD_LABELS = ['Malam (0-6)', 'Pagi (6-12)', 'Siang (12-18)', 'Sore (18-24)']
+
+# Kode periode per jam: [0, 6] malam, (6, 12] pagi, (12, 18] siang, (18, 24) sore
+PERIOD_OF_HOUR = np.array([0] * 7 + [1] * 6 + [2] * 6 + [3] * 5, dtype=np.int8)
+
+
+def local_epoch_ns(ts, tz=None):
+    """Nanodetik waktu dinding lokal dari ``ts`` UTC naif.
+
+    Offset zona waktu (termasuk DST) dicari secara vektor dari tabel
+    transisi zona, bukan per baris.
+    """
+    values = pd.DatetimeIndex(ts).as_unit('ns')
+    if tz and tz != DEFAULT_TIMEZONE:
+        values = values.tz_localize('UTC').tz_convert(tz).tz_localize(None)
+    return values.asi8
+
+
+def civil_from_days(days):
+    """Tahun, bulan (1-12), dan tanggal dari nomor hari sejak 1970-01-01.
+
+    Algoritme kalender Gregorian proleptik dari Howard Hinnant, seluruhnya
+    aritmetika integer.
+    """
+    z = np.asarray(days, dtype=np.int64) + 719468
+    era = np.floor_divide(z, 146097)
+    doe = z - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    day = doy - (153 * mp + 2) // 5 + 1
+    month = np.where(mp < 10, mp + 3, mp - 9)
+    year = yoe + era * 400 + (month <= 2)
+    return year, month, day
+
+
+def calendar_features(ts, tz=None):
+    """Kolom kalender untuk setiap baris sebagai dict array NumPy.
+
+    ``tanggal`` adalah nomor hari lokal sejak 1970-01-01 (int32);
+    ``day_dates`` mengubahnya kembali menjadi tanggal untuk render.
+    """
+    local = local_epoch_ns(ts, tz)
+    days = np.floor_divide(local, NS_PER_DAY)
+    hour = (np.floor_divide(local, NS_PER_HOUR) % 24).astype(np.int8)
+    weekday = ((days + EPOCH_WEEKDAY) % 7).astype(np.int8)
+
+    # Bulan dan tahun dihitung per hari dalam rentang data, lalu diambil lewat indeks
+    if len(days):
+        first = days.min()
+        year, month, _ = civil_from_days(np.arange(first, days.max() + 1))
+        offset = days - first
+        month, year = month.astype(np.int8)[offset], year.astype(np.int16)[offset]
+    else:
+        month, year = np.empty(0, dtype=np.int8), np.empty(0, dtype=np.int16)
+
+    return {
+        'tanggal': days.astype(np.int32),
+        'jam': hour,
+        'hari_ke': weekday,
+        'bulan': month,
+        'tahun': year,
+        'akhir_pekan': weekday >= 5,
+        'periode_waktu': PERIOD_OF_HOUR[hour],
+    }
+
+
+def day_start_ns(days, tz=None):
+    """Epoch nanodetik UTC dari tengah malam lokal untuk nomor hari ``days``.
+
+    Tengah malam yang tidak ada karena DST digeser maju; yang ganda diambil
+    yang lebih awal.
+    """
+    local = np.asarray(days, dtype=np.int64) * NS_PER_DAY
+    if not tz or tz == DEFAULT_TIMEZONE:
+        return local
+    values = pd.DatetimeIndex(local.astype('datetime64[ns]'))
+    values = values.tz_localize(tz, ambiguous=np.ones(len(values), dtype=bool), nonexistent='shift_forward')
+    return values.tz_convert('UTC').tz_localize(None).asi8
+
+
+def day_dates(days):
+    """Nomor hari sejak 1970-01-01 menjadi DatetimeIndex untuk sumbu grafik."""
+    return pd.DatetimeIndex(np.asarray(days, dtype='int64').astype('datetime64[D]')).as_unit('ns')
+
+
+def day_number(date):
+    """Tanggal lokal (date, string, atau Timestamp) menjadi nomor hari sejak 1970-01-01; kebalikan day_dates."""
+    return (pd.Timestamp(date) - pd.Timestamp(0)).days
+
+
+def localize(ts, tz=None):
+    """Timestamp UTC naif menjadi waktu lokal naif; untuk sedikit nilai saat render."""
+    if not tz or tz == DEFAULT_TIMEZONE:
+        return ts
+    return pd.to_datetime(ts).dt.tz_localize('UTC').dt.tz_convert(tz).dt.tz_localize(None)
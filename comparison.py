@@ -0,0 +1,231 @@
+"""Perbandingan periode dari jumlah kumulatif (prefix sum) per hari.
+
+Mesin menyimpan prefix sum pemutaran dan menit per hari untuk setiap jam
+dan untuk artis teratas. Total jendela tanggal apa pun adalah selisih dua
+baris array kumulatif, sehingga "tahun ini vs tahun lalu" atau "30 hari
+terakhir vs 30 hari sebelumnya" tidak memfilter maupun mengelompokkan ulang
+riwayat. Rata-rata bergulir dihitung dengan cara yang sama untuk semua hari
+sekaligus.
+
+Kubus hari x jam diambil dari agregat apa pun (eksak, sketsa, SQL, filter);
+hanya jumlah per hari untuk artis teratas yang dibaca dari data.
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from calendar_features import day_dates, day_number
+
+# Versi struktur mesin perbandingan untuk cache di disk; naikkan bila atribut berubah
+COMPARISON_VERSION = 1
+
+# Jumlah artis teratas (menurut pemutaran di seluruh riwayat) yang dilacak per hari
+COMPARISON_ARTISTS = 50
+
+# Pilihan periode: kunci -> label
+PERIODS = {
+    'last_30': "30 hari terakhir vs 30 hari sebelumnya",
+    'last_90': "90 hari terakhir vs 90 hari sebelumnya",
+    'month': "Bulan ini vs bulan lalu",
+    'year': "Tahun ini vs tahun lalu",
+}
+
+_MS_PER_MINUTE = 1000 * 60
+
+
+def _cumulative(values):
+    """Prefix sum sepanjang sumbu hari dengan baris nol di depan: ``cum[b] - cum[a]`` = hari [a, b)."""
+    values = np.asarray(values)
+    cumulative = np.zeros((len(values) + 1,) + values.shape[1:], dtype=values.dtype)
+    np.cumsum(values, axis=0, out=cumulative[1:])
+    return cumulative
+
+
+def _artist_codes(names, artists):
+    """Posisi setiap nilai ``names`` di ``artists``; -1 bila bukan artis yang dilacak."""
+    if isinstance(names.dtype, pd.CategoricalDtype):
+        # Dicocokkan per kategori; kode -1 (kosong) mengambil elemen terakhir, yaitu -1
+        per_category = np.append(artists.get_indexer(names.cat.categories), -1)
+        return per_category[names.cat.codes.to_numpy()]
+    return artists.get_indexer(names)
+
+
+def artist_day_totals(chunks, artists):
+    """Pemutaran dan menit per (tanggal, artis) untuk ``artists`` saja, dari iterator potongan.
+
+    Hanya baris artis yang dilacak yang dikelompokkan, dengan kunci integer,
+    sehingga memori sebanding dengan jumlah artis x hari.
+    """
+    artists = pd.Index(artists)
+    parts = []
+    for chunk in chunks:
+        codes = _artist_codes(chunk['artist_name'], artists)
+        tracked = codes >= 0
+        minutes = chunk['ms_played'].to_numpy()[tracked].astype(np.float64) / _MS_PER_MINUTE
+        part = pd.Series(minutes).groupby(
+            [chunk['tanggal'].to_numpy()[tracked], codes[tracked]]
+        ).agg(plays='size', menit='sum')
+        parts.append(part)
+    totals = pd.concat(parts).groupby(level=[0, 1]).sum() if parts else pd.DataFrame(
+        {'plays': np.empty(0, dtype=np.int64), 'menit': np.empty(0)},
+        index=pd.MultiIndex.from_arrays([np.empty(0, dtype=np.int64)] * 2)
+    )
+    totals.index = pd.MultiIndex.from_arrays(
+        [totals.index.get_level_values(0), artists[totals.index.get_level_values(1)]],
+        names=['tanggal', 'artist_name']
+    )
+    return totals
+
+
+class ComparisonEngine:
+    """Prefix sum per hari untuk total per jam dan untuk artis teratas.
+
+    Baris ke-i array kumulatif berisi jumlah hari pertama s.d. sebelum hari
+    ke-i (relatif terhadap ``first_day``), sehingga total hari [a, b] adalah
+    ``cum[b + 1] - cum[a]``: satu pengurangan per jendela, berapa pun panjangnya.
+    """
+
+    def __init__(self, first_day, hour_plays, hour_minutes, artists, artist_plays, artist_minutes, tz=None):
+        self.tz = tz
+        self.first_day = int(first_day)
+        self.n_days = len(hour_plays)
+        self.artists = pd.Index(artists, name='artist_name')
+        # Kumulatif (hari + 1) x 24 dan (hari + 1) x artis
+        self.hour_plays = _cumulative(np.asarray(hour_plays, dtype=np.int64))
+        self.hour_minutes = _cumulative(np.asarray(hour_minutes, dtype=np.float64))
+        self.artist_plays = _cumulative(np.asarray(artist_plays, dtype=np.int64))
+        self.artist_minutes = _cumulative(np.asarray(artist_minutes, dtype=np.float64))
+        # Kumulatif (hari + 1) untuk total harian dan jumlah hari dengan pemutaran
+        daily_plays = np.asarray(hour_plays, dtype=np.int64).sum(axis=1)
+        self.plays = _cumulative(daily_plays)
+        self.minutes = _cumulative(np.asarray(hour_minutes, dtype=np.float64).sum(axis=1))
+        self.active_days = _cumulative((daily_plays > 0).astype(np.int64))
+
+    @classmethod
+    def from_frame(cls, agg, data, n_artists=COMPARISON_ARTISTS):
+        """Membangun mesin dari agregat dan DataFrame yang sudah dibersihkan."""
+        return cls.from_chunks(agg, [data], n_artists)
+
+    @classmethod
+    def from_chunks(cls, agg, chunks, n_artists=COMPARISON_ARTISTS):
+        """Membangun mesin dari agregat dan iterator potongan; hanya artis teratas yang dihitung per hari."""
+        artists = list(agg.top_artists(n_artists).index)
+        return cls.from_totals(agg, artists, artist_day_totals(chunks, artists))
+
+    @classmethod
+    def from_totals(cls, agg, artists, artist_days):
+        """Membangun mesin dari kubus ``agg`` dan tabel (tanggal, artis) -> pemutaran, menit."""
+        cube = agg.totals_by('tanggal', 'jam')
+        days = cube.index.get_level_values('tanggal').to_numpy().astype(np.int64)
+        first_day = int(days.min()) if len(days) else 0
+        n_days = int(days.max()) - first_day + 1 if len(days) else 0
+
+        cell = (days - first_day) * 24 + cube.index.get_level_values('jam').to_numpy().astype(np.int64)
+        hour_plays = np.bincount(cell, weights=cube['plays'], minlength=n_days * 24)
+        hour_minutes = np.bincount(cell, weights=cube['menit'], minlength=n_days * 24)
+
+        artists = pd.Index(artists)
+        codes = artists.get_indexer(artist_days.index.get_level_values('artist_name'))
+        artist_day = artist_days.index.get_level_values('tanggal').to_numpy().astype(np.int64) - first_day
+        known = (codes >= 0) & (artist_day >= 0) & (artist_day < n_days)
+        cell = artist_day[known] * len(artists) + codes[known]
+        size = n_days * len(artists)
+        artist_plays = np.bincount(cell, weights=artist_days['plays'].to_numpy()[known], minlength=size)
+        artist_minutes = np.bincount(cell, weights=artist_days['menit'].to_numpy()[known], minlength=size)
+
+        return cls(
+            first_day,
+            hour_plays.round().astype(np.int64).reshape(n_days, 24),
+            hour_minutes.reshape(n_days, 24),
+            artists,
+            artist_plays.round().astype(np.int64).reshape(n_days, len(artists)),
+            artist_minutes.reshape(n_days, len(artists)),
+            agg.tz,
+        )
+
+    @property
+    def first_date(self):
+        """Tanggal lokal pertama dalam riwayat."""
+        return pd.Timestamp(self.first_day, unit='D').date()
+
+    @property
+    def last_date(self):
+        """Tanggal lokal terakhir dalam riwayat."""
+        return pd.Timestamp(self.first_day + max(self.n_days - 1, 0), unit='D').date()
+
+    def _rows(self, start_date, end_date):
+        """Baris kumulatif [lo, hi) untuk tanggal ``start_date`` s.d. ``end_date``, dipotong ke rentang data."""
+        lo = min(max(day_number(start_date) - self.first_day, 0), self.n_days)
+        hi = min(max(day_number(end_date) - self.first_day + 1, lo), self.n_days)
+        return lo, hi
+
+    def window(self, start_date, end_date):
+        """Total jendela tanggal lokal [start_date, end_date] (inklusif).
+
+        ``days`` adalah panjang jendela dalam hari kalender, termasuk hari di
+        luar rentang data, agar rata-rata per hari dua jendela sebanding.
+        """
+        lo, hi = self._rows(start_date, end_date)
+        return {
+            'start': start_date,
+            'end': end_date,
+            'days': max(day_number(end_date) - day_number(start_date) + 1, 0),
+            'plays': int(self.plays[hi] - self.plays[lo]),
+            'menit': float(self.minutes[hi] - self.minutes[lo]),
+            'active_days': int(self.active_days[hi] - self.active_days[lo]),
+            'hourly': pd.DataFrame({
+                'plays': self.hour_plays[hi] - self.hour_plays[lo],
+                'menit': self.hour_minutes[hi] - self.hour_minutes[lo],
+            }, index=pd.RangeIndex(24, name='jam')),
+            'artists': pd.DataFrame({
+                'plays': self.artist_plays[hi] - self.artist_plays[lo],
+                'menit': self.artist_minutes[hi] - self.artist_minutes[lo],
+            }, index=self.artists),
+        }
+
+    def rolling(self, days):
+        """Rata-rata ``days`` hari terakhir untuk pemutaran dan menit, untuk setiap hari dalam riwayat.
+
+        Hari-hari awal yang belum punya ``days`` hari sebelumnya dirata-rata
+        atas hari yang tersedia.
+        """
+        hi = np.arange(1, self.n_days + 1)
+        lo = np.maximum(hi - days, 0)
+        width = hi - lo
+        return pd.DataFrame({
+            'plays': (self.plays[hi] - self.plays[lo]) / width,
+            'menit': (self.minutes[hi] - self.minutes[lo]) / width,
+        }, index=day_dates(np.arange(self.first_day, self.first_day + self.n_days)))
+
+
+def _same_day(year, month, day):
+    """Tanggal yang sama di bulan lain; hari yang tidak ada (31, 29 Feb) dipotong ke akhir bulan."""
+    last = (pd.Timestamp(year=year, month=month, day=1) + pd.offsets.MonthEnd(0)).day
+    return datetime.date(year, month, min(day, last))
+
+
+def period_windows(period, last_date):
+    """Jendela (awal, akhir) periode ini dan periode pembanding untuk ``period`` di ``PERIODS``.
+
+    Semua periode berakhir di tanggal terakhir data, bukan hari ini, karena
+    ekspor Spotify biasanya sudah berumur beberapa hari atau minggu. Bulan
+    dan tahun berjalan dibandingkan dengan rentang yang sama panjang di bulan
+    atau tahun sebelumnya.
+    """
+    if period in ('last_30', 'last_90'):
+        days = int(period.split('_')[1])
+        end = last_date
+        start = end - datetime.timedelta(days=days - 1)
+        previous_end = start - datetime.timedelta(days=1)
+        return (start, end), (previous_end - datetime.timedelta(days=days - 1), previous_end)
+    if period == 'month':
+        start = last_date.replace(day=1)
+        previous_start = (pd.Timestamp(start) - pd.offsets.MonthBegin(1)).date()
+        previous_end = _same_day(previous_start.year, previous_start.month, last_date.day)
+        return (start, last_date), (previous_start, previous_end)
+    if period == 'year':
+        start = last_date.replace(month=1, day=1)
+        previous_end = _same_day(last_date.year - 1, last_date.month, last_date.day)
+        return (start, last_date), (start.replace(year=last_date.year - 1), previous_end)
+    raise ValueError(f"Periode tidak dikenal: {period}")
@@ -0,0 +1,162 @@
+"""Tabel dimensi artis, album, judul, dan lagu dengan kunci surrogate int32.
+
+Tabel fakta (total per artis dan per lagu di agregat, kolom per baris di
+indeks filter) hanya menyimpan kunci int32; setiap nama disimpan sekali di
+sini dan baru digabung kembali untuk N baris teratas. Kunci stabil lintas
+potongan: nilai baru mendapat kunci berikutnya, nilai lama tidak berubah.
+
+Lagu dikenali dari ``spotify_track_uri``; baris tanpa URI memakai
+"judul - artis". Judul, artis, dan album setiap lagu disimpan sebagai kunci
+ke dimensinya masing-masing sehingga nama artis tidak berulang per lagu.
+"""
+import numpy as np
+import pandas as pd
+
+
+def track_key(chunk):
+    """Kunci lagu per baris: spotify_track_uri bila ada, selain itu judul dan artis.
+
+    Kunci cadangan dibentuk sekali per pasangan (judul, artis) unik, bukan per baris.
+    """
+    if 'spotify_track_uri' in chunk:
+        key = chunk['spotify_track_uri']
+        missing = key.isna()
+        if not missing.any():
+            return key
+        key = key.astype(object)
+    else:
+        key = pd.Series(None, index=chunk.index, dtype=object)
+        missing = pd.Series(True, index=chunk.index)
+    pairs = pd.MultiIndex.from_arrays([chunk.loc[missing, 'track_name'], chunk.loc[missing, 'artist_name']])
+    codes, uniques = pd.factorize(pairs)
+    names = uniques.get_level_values(0).astype(str) + ' - ' + uniques.get_level_values(1).astype(str)
+    key[missing] = np.asarray(names, dtype=object)[codes]
+    return key
+
+
+class Codebook:
+    """Kunci int32 yang stabil lintas potongan untuk nilai seperti nama artis atau kunci lagu.
+
+    Hanya label yang di-pickle; kamus pencarian dibangun ulang saat pertama dibutuhkan.
+    """
+
+    def __init__(self):
+        self.labels = []
+        self._lookup = {}
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getstate__(self):
+        return {'labels': self.labels}
+
+    def __setstate__(self, state):
+        self.labels = state['labels']
+        self._lookup = None
+
+    @property
+    def lookup(self):
+        if self._lookup is None:
+            self._lookup = {label: code for code, label in enumerate(self.labels)}
+        return self._lookup
+
+    def encode(self, values):
+        """Kode per nilai (-1 untuk kosong) dan posisi pertama dari setiap nilai yang baru dikenal.
+
+        Kolom kategori dipetakan per kategori yang muncul, tanpa faktorisasi ulang.
+        """
+        if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype):
+            codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, uniques = pd.factorize(values)
+        valid = np.flatnonzero(codes >= 0)
+        first = np.full(len(uniques), len(codes))
+        np.minimum.at(first, codes[valid], valid)
+        used = np.flatnonzero(first < len(codes))
+
+        lookup, start = self.lookup, len(self.labels)
+        # Elemen terakhir untuk kode -1 (kosong)
+        mapping = np.full(len(uniques) + 1, -1, dtype=np.int32)
+        for i, value in zip(used, uniques[used]):
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(self.labels)
+                self.labels.append(value)
+            mapping[i] = code
+        return mapping[codes], first[used][mapping[used] >= start]
+
+    def get(self, values):
+        """Kode untuk ``values`` tanpa menambah label baru; -1 untuk nilai yang tidak dikenal."""
+        lookup = self.lookup
+        return np.array([lookup.get(value, -1) for value in values], dtype=np.int32)
+
+    def take(self, codes):
+        """Label untuk ``codes`` sebagai array objek; hanya untuk sedikit kode, misalnya N teratas."""
+        labels = self.labels
+        return np.array([labels[code] for code in codes], dtype=object)
+
+    def sorted_codes(self):
+        """Label terurut, urutan label lama, dan pemetaan kode lama -> kode baru yang urut label."""
+        labels = np.array(self.labels, dtype=object)
+        order = np.argsort(labels, kind='stable')
+        rank = np.empty(len(order), dtype=np.int32)
+        rank[order] = np.arange(len(order), dtype=np.int32)
+        return labels[order], order, rank
+
+
+class Dimensions:
+    """Dimensi artis, judul, album, dan lagu untuk satu agregat atau indeks.
+
+    ``track_title``, ``track_artist``, dan ``track_album`` berisi kunci
+    dimensi untuk setiap kunci lagu (album -1 bila kolom album tidak dibaca).
+    """
+
+    def __init__(self):
+        self.artists = Codebook()
+        self.titles = Codebook()
+        self.albums = Codebook()
+        self.tracks = Codebook()
+        self.track_title = np.empty(0, dtype=np.int32)
+        self.track_artist = np.empty(0, dtype=np.int32)
+        self.track_album = np.empty(0, dtype=np.int32)
+
+    def encode(self, chunk):
+        """Kunci artis dan kunci lagu per baris; lagu baru dicatat dengan judul, artis, dan album baris pertamanya."""
+        artist = self.artists.encode(chunk['artist_name'])[0]
+        track, first_rows = self.tracks.encode(track_key(chunk))
+        if len(first_rows):
+            title = self.titles.encode(chunk['track_name'].iloc[first_rows])[0]
+            if 'album_name' in chunk:
+                album = self.albums.encode(chunk['album_name'].iloc[first_rows])[0]
+            else:
+                album = np.full(len(first_rows), -1, dtype=np.int32)
+            self._add_tracks(title, artist[first_rows], album)
+        return artist, track
+
+    def _add_tracks(self, title, artist, album):
+        self.track_title = np.concatenate([self.track_title, title])
+        self.track_artist = np.concatenate([self.track_artist, artist])
+        self.track_album = np.concatenate([self.track_album, album])
+
+    def merge(self, other):
+        """Menambahkan dimensi ``other``; mengembalikan pemetaan kunci artis dan lagu ``other`` -> kunci di sini."""
+        artist_map = self.artists.encode(np.array(other.artists.labels, dtype=object))[0]
+        title_map = self.titles.encode(np.array(other.titles.labels, dtype=object))[0]
+        album_map = np.append(self.albums.encode(np.array(other.albums.labels, dtype=object))[0], -1)
+        track_map, new = self.tracks.encode(np.array(other.tracks.labels, dtype=object))
+        self._add_tracks(
+            title_map[other.track_title[new]], artist_map[other.track_artist[new]], album_map[other.track_album[new]]
+        )
+        return artist_map, track_map
+
+    def artist_names(self, keys):
+        """Nama artis untuk kunci ``keys``."""
+        return self.artists.take(keys)
+
+    def track_table(self, keys):
+        """Kunci lagu, judul, dan nama artis untuk kunci ``keys``, berindeks kunci lagu."""
+        keys = np.asarray(keys, dtype=np.int64)
+        return pd.DataFrame({
+            'track_name': self.titles.take(self.track_title[keys]).astype(str),
+            'artist_name': self.artists.take(self.track_artist[keys]).astype(str),
+        }, index=pd.Index(self.tracks.take(keys).astype(str), name='track_key'))
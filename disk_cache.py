@@ -0,0 +1,165 @@
+"""Cache hasil pembersihan di disk, bertahan melewati restart dan redeploy.
+
+DataFrame disimpan sebagai Feather (Arrow IPC) tanpa kompresi sehingga bisa
+dibaca kembali lewat memory map. Kunci cache adalah hash isi unggahan, dan
+ukuran total direktori dibatasi dengan eviksi LRU berdasarkan waktu akses.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+
+try:
+    from pyarrow import feather
+except ImportError:  # pragma: no cover - pyarrow ikut terpasang bersama streamlit
+    feather = None
+
+CACHE_DIR = os.environ.get(
+    'SPOTIFY_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'spotify-stream-analytics')
+)
+CACHE_MAX_BYTES = int(float(os.environ.get('SPOTIFY_CACHE_MAX_MB', 2048)) * 1024 ** 2)
+
+_HASH_BLOCK = 1024 * 1024
+
+
+def _file_digest(source):
+    digest = hashlib.blake2b(digest_size=16)
+    if hasattr(source, 'read'):
+        source.seek(0)
+        for block in iter(lambda: source.read(_HASH_BLOCK), b''):
+            digest.update(block)
+        source.seek(0)
+    else:
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def content_hash(uploaded_files):
+    """Hash isi satu atau beberapa file unggahan, dibaca blok demi blok.
+
+    Urutan file tidak memengaruhi hasil.
+    """
+    if not isinstance(uploaded_files, (list, tuple)):
+        uploaded_files = [uploaded_files]
+    digest = hashlib.blake2b(digest_size=16)
+    for file_digest in sorted(_file_digest(source) for source in uploaded_files):
+        digest.update(file_digest.encode())
+    return digest.hexdigest()
+
+
+def combine_keys(*keys):
+    """Kunci dataset turunan, misalnya riwayat lama ditambah ekspor baru."""
+    digest = hashlib.blake2b(digest_size=16)
+    for key in keys:
+        digest.update(key.encode())
+    return digest.hexdigest()
+
+
+def cache_key(dataset_key, kind, version):
+    """Nama entri cache untuk satu jenis hasil dari satu dataset."""
+    return f"{kind}-{dataset_key}-v{version}"
+
+
+class DiskCache:
+    """Direktori cache dengan batas ukuran total dan eviksi LRU."""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    def _touch(self, path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _write(self, path, write):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.evict()
+
+    def load_frame(self, key):
+        """Membaca DataFrame lewat memory map; ``None`` jika belum ada."""
+        path = self._path(key, '.feather')
+        if not self.enabled or feather is None or not os.path.exists(path):
+            return None
+        self._touch(path)
+        return feather.read_feather(path, memory_map=True)
+
+    def save_frame(self, key, data):
+        if not self.enabled or feather is None:
+            return
+        frame = data.reset_index(drop=True)
+        self._write(
+            self._path(key, '.feather'),
+            lambda path: feather.write_feather(frame, path, compression='uncompressed')
+        )
+
+    def load_object(self, key):
+        """Membaca objek Python (misalnya agregat); ``None`` jika belum ada."""
+        path = self._path(key, '.pkl')
+        if not self.enabled or not os.path.exists(path):
+            return None
+        self._touch(path)
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def save_object(self, key, obj):
+        if not self.enabled:
+            return
+
+        def write(path):
+            with open(path, 'wb') as f:
+                pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._write(self._path(key, '.pkl'), write)
+
+    def load_path(self, key, suffix):
+        """Path berkas cache yang dibuka langsung (misalnya basis data SQL); ``None`` jika belum ada."""
+        path = self._path(key, suffix)
+        if not self.enabled or not os.path.exists(path):
+            return None
+        self._touch(path)
+        return path
+
+    def save_file(self, key, suffix, write):
+        """Menulis berkas cache lewat ``write(path)`` secara atomik; mengembalikan path akhirnya."""
+        if not self.enabled:
+            return None
+        path = self._path(key, suffix)
+        self._write(path, write)
+        return path
+
+    def evict(self):
+        """Menghapus entri yang paling lama tidak diakses hingga muat dalam batas."""
+        try:
+            entries = [entry for entry in os.scandir(self.directory)
+                       if entry.is_file() and not entry.name.endswith('.tmp')]
+        except FileNotFoundError:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
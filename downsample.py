@@ -0,0 +1,56 @@
+"""Penyusutan deret waktu di server sebelum dikirim ke Plotly.
+
+Ukuran payload grafik dibatasi oleh jumlah titik maksimum per trace,
+bukan oleh panjang riwayat.
+"""
+import numpy as np
+import pandas as pd
+
+# Batas titik per trace untuk deret waktu panjang
+MAX_POINTS_PER_TRACE = 1000
+
+
+def lttb_indices(x, y, threshold):
+    """Indeks titik terpilih menurut Largest-Triangle-Three-Buckets.
+
+    Titik pertama dan terakhir selalu dipertahankan; setiap bucket di
+    antaranya menyumbang satu titik yang membentuk segitiga terbesar dengan
+    titik terpilih sebelumnya dan rata-rata bucket berikutnya, sehingga
+    puncak dan lembah tetap terlihat.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def downsample_series(series, max_points=MAX_POINTS_PER_TRACE):
+    """Menyusutkan Series berindeks waktu/angka menjadi paling banyak ``max_points`` titik."""
+    if len(series) <= max_points:
+        return series
+    index = series.index
+    if isinstance(index, pd.DatetimeIndex):
+        x = index.asi8
+    else:
+        x = np.asarray(index, dtype=np.float64)
+    return series.iloc[lttb_indices(x, series.to_numpy(), max_points)]
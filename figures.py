@@ -0,0 +1,360 @@
+"""Grafik Plotly untuk setiap bagian, dibangun dari hasil analysis.py.
+
+Modul ini tidak bergantung pada Streamlit sehingga grafik yang sama bisa
+ditampilkan di aplikasi maupun ditulis sebagai HTML statis oleh report.py.
+Plotly baru diimpor saat grafik pertama dibuat agar tidak membebani waktu
+mulai aplikasi (lihat benchmarks/importtime.py).
+"""
+
+
+def artist_figures(result):
+    import plotly.express as px
+
+    fig_plays = px.bar(
+        x=result['top_artists'].values,
+        y=result['top_artists'].index,
+        orientation='h',
+        title="Top 15 Artis Berdasarkan Jumlah Pemutaran",
+        labels={'x': 'Jumlah Pemutaran', 'y': 'Artis'},
+        color=result['top_artists'].values,
+        color_continuous_scale='Viridis'
+    )
+    fig_plays.update_layout(height=600, yaxis={'categoryorder': 'total ascending'})
+
+    fig_time = px.pie(
+        values=result['artist_time'].values,
+        names=result['artist_time'].index,
+        title="Top 10 Artis Berdasarkan Waktu Mendengarkan"
+    )
+    fig_time.update_traces(textposition='inside', textinfo='percent+label')
+    return {'fig_plays': fig_plays, 'fig_time': fig_time}
+
+
+def song_figures(result):
+    import plotly.express as px
+
+    top_songs = result['top_songs']
+    short_names = [f"{song[:30]}..." if len(song) > 30 else song for song in top_songs['track_name']]
+    labels = [f"{song} - {artist}" for song, artist in zip(short_names, top_songs['artist_name'])]
+
+    fig = px.bar(
+        x=top_songs['plays'],
+        y=labels,
+        orientation='h',
+        title="Top 15 Lagu Paling Sering Diputar",
+        labels={'x': 'Jumlah Pemutaran', 'y': 'Lagu'},
+        color=top_songs['plays'],
+        color_continuous_scale='Blues'
+    )
+    fig.update_layout(height=600, yaxis={'categoryorder': 'total ascending'})
+    return {'fig_top': fig}
+
+
+def time_figures(result):
+    import plotly.express as px
+
+    hourly = result['hourly']
+    fig_hourly = px.line(
+        x=hourly.index,
+        y=hourly.values,
+        title="Aktivitas Mendengarkan per Jam",
+        labels={'x': 'Jam dalam Sehari', 'y': 'Jumlah Pemutaran'},
+        markers=True
+    )
+    fig_hourly.update_layout(height=400)
+
+    # Akhir pekan (Sabtu, Minggu) diberi warna berbeda
+    daily = result['daily']
+    colors = ['orange' if i >= 5 else 'steelblue' for i in range(len(daily))]
+    fig_daily = px.bar(
+        x=daily.index,
+        y=daily.values,
+        title="Aktivitas Mendengarkan per Hari",
+        labels={'x': 'Hari', 'y': 'Jumlah Pemutaran'},
+        color=colors,
+        color_discrete_map='identity'
+    )
+    fig_daily.update_layout(height=400)
+
+    heatmap = result['heatmap']
+    fig_heatmap = px.imshow(
+        heatmap.values,
+        x=heatmap.columns,
+        y=heatmap.index,
+        title="Heatmap: Pola Mendengarkan Hari vs Jam",
+        labels={'x': 'Jam', 'y': 'Hari', 'color': 'Jumlah Pemutaran'},
+        color_continuous_scale='YlOrRd'
+    )
+
+    fig_period = px.pie(
+        values=result['period'].values,
+        names=result['period'].index,
+        title="Distribusi Mendengarkan per Periode Waktu"
+    )
+    return {
+        'fig_hourly': fig_hourly,
+        'fig_daily': fig_daily,
+        'fig_heatmap': fig_heatmap,
+        'fig_period': fig_period,
+    }
+
+
+def duration_figures(result):
+    import plotly.express as px
+
+    histogram = result['histogram']
+    bin_width = histogram['menit'].iloc[1] - histogram['menit'].iloc[0]
+    fig_hist = px.bar(
+        x=histogram['menit'] + bin_width / 2,
+        y=histogram['jumlah'],
+        title="Distribusi Durasi Mendengarkan (0-10 menit)",
+        labels={'x': 'Menit', 'y': 'Frekuensi'}
+    )
+    fig_hist.update_traces(width=bin_width)
+    fig_hist.update_layout(bargap=0)
+    # Garis rata-rata dan median
+    fig_hist.add_vline(x=result['rata_rata_menit'], line_dash="dash", line_color="red",
+                       annotation_text=f"Rata-rata: {result['rata_rata_menit']:.2f}")
+    fig_hist.add_vline(x=result['median_menit'], line_dash="dash", line_color="green",
+                       annotation_text=f"Median: {result['median_menit']:.2f}")
+
+    fig_category = px.pie(
+        values=result['categories'].values,
+        names=result['categories'].index,
+        title="Distribusi Kategori Durasi"
+    )
+
+    hourly_duration = result['hourly_duration']
+    fig_hourly = px.line(
+        x=hourly_duration.index,
+        y=hourly_duration.values,
+        title="Durasi Rata-rata per Jam",
+        labels={'x': 'Jam', 'y': 'Durasi Rata-rata (menit)'},
+        markers=True
+    )
+
+    fig_daily = px.bar(
+        x=result['daily_duration'].index,
+        y=result['daily_duration'].values,
+        title="Durasi Rata-rata per Hari",
+        labels={'x': 'Hari', 'y': 'Durasi Rata-rata (menit)'}
+    )
+    return {
+        'fig_hist': fig_hist,
+        'fig_category': fig_category,
+        'fig_hourly': fig_hourly,
+        'fig_daily': fig_daily,
+    }
+
+
+def pattern_figures(result):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    trend = result['trend']
+    fig_trend = px.line(
+        x=trend.index,
+        y=trend.values,
+        title="Tren Aktivitas Harian",
+        labels={'x': 'Tanggal', 'y': 'Jumlah Pemutaran'}
+    )
+    fig_trend.update_layout(height=400)
+
+    plays_per_day = result['plays_per_day']
+    fig_distribution = px.bar(
+        x=plays_per_day.index,
+        y=plays_per_day.values,
+        title="Distribusi Pemutaran per Hari",
+        labels={'x': 'Jumlah Pemutaran per Hari', 'y': 'Frekuensi Hari'}
+    )
+
+    weekday_hourly = result['weekday_hourly']
+    weekend_hourly = result['weekend_hourly']
+    fig_weekend = go.Figure()
+    fig_weekend.add_trace(go.Scatter(x=weekday_hourly.index, y=weekday_hourly.values,
+                                     mode='lines+markers', name='Hari Kerja'))
+    fig_weekend.add_trace(go.Scatter(x=weekend_hourly.index, y=weekend_hourly.values,
+                                     mode='lines+markers', name='Akhir Pekan'))
+    fig_weekend.update_layout(
+        title="Pola Mendengarkan: Hari Kerja vs Akhir Pekan",
+        xaxis_title="Jam",
+        yaxis_title="Jumlah Pemutaran"
+    )
+    return {
+        'fig_trend': fig_trend,
+        'fig_distribution': fig_distribution,
+        'fig_weekend': fig_weekend,
+    }
+
+
+def playback_figures(result):
+    import plotly.express as px
+
+    hourly = result['hourly']
+    fig_hourly = px.line(
+        x=hourly.index,
+        y=hourly.values * 100,
+        title="Tingkat Skip per Jam",
+        labels={'x': 'Jam dalam Sehari', 'y': 'Tingkat Skip (%)'},
+        markers=True
+    )
+    fig_hourly.update_layout(height=400)
+
+    devices = result['devices']
+    fig_devices = px.bar(
+        x=devices.index,
+        y=devices['skip_rate'] * 100,
+        title="Tingkat Skip per Perangkat",
+        labels={'x': 'Perangkat', 'y': 'Tingkat Skip (%)'},
+        color=devices['plays'],
+        color_continuous_scale='Purples'
+    )
+    fig_devices.update_layout(height=400, coloraxis_colorbar={'title': 'Pemutaran'})
+
+    shuffle = result['shuffle']
+    fig_shuffle = px.bar(
+        x=shuffle.index,
+        y=shuffle['skip_rate'] * 100,
+        title="Tingkat Skip: Shuffle vs Berurutan",
+        labels={'x': 'Mode', 'y': 'Tingkat Skip (%)'},
+        color=shuffle.index,
+        color_discrete_map={'Shuffle': 'orange', 'Berurutan': 'steelblue'}
+    )
+    fig_shuffle.update_layout(height=400, showlegend=False)
+
+    share = result['transition_share']
+    fig_transitions = px.imshow(
+        share.values * 100,
+        x=share.columns,
+        y=share.index,
+        title="Alasan Mulai → Alasan Selesai (% per alasan mulai)",
+        labels={'x': 'Alasan Selesai', 'y': 'Alasan Mulai', 'color': '%'},
+        color_continuous_scale='YlOrRd',
+        text_auto='.0f'
+    )
+
+    artists = result['artists']
+    fig_artists = px.bar(
+        x=artists['skip_rate'] * 100,
+        y=artists.index,
+        orientation='h',
+        title="Tingkat Skip 15 Artis Teratas",
+        labels={'x': 'Tingkat Skip (%)', 'y': 'Artis'},
+        color=artists['skip_rate'],
+        color_continuous_scale='Reds'
+    )
+    fig_artists.update_layout(height=600, yaxis={'categoryorder': 'total ascending'}, coloraxis_showscale=False)
+    return {
+        'fig_hourly': fig_hourly,
+        'fig_devices': fig_devices,
+        'fig_shuffle': fig_shuffle,
+        'fig_transitions': fig_transitions,
+        'fig_artists': fig_artists,
+    }
+
+
+def session_figures(result):
+    import plotly.express as px
+
+    histogram = result['length_histogram']
+    bin_width = histogram['menit'].iloc[1] - histogram['menit'].iloc[0]
+    fig_length = px.bar(
+        x=histogram['menit'] + bin_width / 2,
+        y=histogram['jumlah'],
+        title="Distribusi Durasi Sesi (0-4 jam)",
+        labels={'x': 'Durasi Sesi (menit)', 'y': 'Jumlah Sesi'}
+    )
+    fig_length.update_traces(width=bin_width)
+    fig_length.update_layout(bargap=0)
+
+    tracks_per_session = result['tracks_per_session']
+    fig_tracks = px.bar(
+        x=tracks_per_session.index,
+        y=tracks_per_session.values,
+        title="Jumlah Lagu per Sesi (50 = 50 atau lebih)",
+        labels={'x': 'Jumlah Lagu', 'y': 'Jumlah Sesi'}
+    )
+    return {'fig_length': fig_length, 'fig_tracks': fig_tracks}
+
+
+def comparison_figures(result):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    rolling = result['rolling']
+    fig_rolling = px.line(
+        x=rolling.index,
+        y=rolling.values,
+        title=f"Rata-rata Pemutaran per Hari ({result['rolling_days']} Hari Bergulir)",
+        labels={'x': 'Tanggal', 'y': 'Pemutaran per Hari'}
+    )
+    # Jendela pembanding abu-abu, jendela sekarang hijau
+    for (start, end), color in ((result['previous'], 'gray'), (result['current'], '#1DB954')):
+        fig_rolling.add_vrect(x0=start, x1=end, fillcolor=color, opacity=0.15, line_width=0)
+    fig_rolling.update_layout(height=400)
+
+    hourly = result['hourly']
+    fig_hourly = go.Figure()
+    fig_hourly.add_trace(go.Bar(x=hourly.index, y=hourly['previous'], name='Periode Pembanding', marker_color='gray'))
+    fig_hourly.add_trace(go.Bar(x=hourly.index, y=hourly['current'], name='Periode Ini', marker_color='#1DB954'))
+    fig_hourly.update_layout(
+        title="Pemutaran per Jam: Periode Ini vs Pembanding",
+        xaxis_title="Jam dalam Sehari",
+        yaxis_title="Jumlah Pemutaran",
+        barmode='group',
+        height=400
+    )
+
+    artists = result['artists']
+    fig_artists = go.Figure()
+    fig_artists.add_trace(go.Bar(x=artists['previous'], y=artists.index, orientation='h',
+                                 name='Periode Pembanding', marker_color='gray'))
+    fig_artists.add_trace(go.Bar(x=artists['current'], y=artists.index, orientation='h',
+                                 name='Periode Ini', marker_color='#1DB954'))
+    fig_artists.update_layout(
+        title=f"Top {len(artists)} Artis: Periode Ini vs Pembanding",
+        xaxis_title="Jumlah Pemutaran",
+        barmode='group',
+        height=600,
+        yaxis={'categoryorder': 'array', 'categoryarray': list(artists.index[::-1])}
+    )
+    return {'fig_rolling': fig_rolling, 'fig_hourly': fig_hourly, 'fig_artists': fig_artists}
+
+
+def streak_figures(result):
+    import plotly.graph_objects as go
+
+    # go.Bar menerima data kosong, misalnya rentang tanpa binge
+    streak_lengths = result['streak_lengths']
+    fig_streaks = go.Figure(go.Bar(x=streak_lengths.index, y=streak_lengths.values,
+                                   marker_color='#1DB954'))
+    fig_streaks.update_layout(
+        title="Panjang Rangkaian Hari Beruntun (30 = 30 hari atau lebih)",
+        xaxis_title="Hari Berturut-turut",
+        yaxis_title="Jumlah Rangkaian"
+    )
+
+    artists = result['binge_artists']
+    fig_binges = go.Figure(go.Bar(x=artists['binge'].values[::-1], y=artists.index[::-1],
+                                  orientation='h', marker_color='#1DB954'))
+    fig_binges.update_layout(
+        title=f"Artis dengan Binge Terbanyak ({result['min_binge']}+ pemutaran berturut-turut)",
+        xaxis_title="Jumlah Binge",
+        yaxis_title="Artis",
+        height=400
+    )
+    return {'fig_streaks': fig_streaks, 'fig_binges': fig_binges}
+
+
+# Pembangun grafik per bagian, pasangan dari analysis.ANALYSES
+FIGURES = {
+    'artist': artist_figures,
+    'song': song_figures,
+    'time': time_figures,
+    'duration': duration_figures,
+    'pattern': pattern_figures,
+    'playback': playback_figures,
+    'session': session_figures,
+    'comparison': comparison_figures,
+    'streak': streak_figures,
+}
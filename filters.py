@@ -0,0 +1,394 @@
+"""Filter rentang tanggal dan artis yang cepat di atas indeks riwayat.
+
+``HistoryIndex`` menyimpan kolom-kolom yang dibutuhkan agregat sebagai
+array NumPy ringkas yang terurut menurut ``ts``, bukan DataFrame lengkap:
+
+- rentang tanggal menjadi rentang baris lewat ``searchsorted`` pada ``ts``;
+- indeks terbalik artis -> posisi baris (format CSR) sehingga filter artis
+  hanya menyentuh baris milik artis yang dipilih;
+- parsial per hari (hari x jam, hari x artis, hari x lagu, kategori durasi,
+  dan 10 pemutaran terpanjang per hari) sehingga filter tanggal saja cukup
+  memotong tabel parsial yang jauh lebih kecil;
+- satu kode sel kubus pemutaran per baris (jam x perangkat x shuffle x
+  alasan mulai x alasan selesai) sehingga kubus pemutaran hasil filter
+  cukup dihitung dengan ``np.bincount``.
+
+Hasil filter adalah ``ListeningAggregates`` biasa, jadi analysis.py dan
+figures.py dipakai apa adanya.
+"""
+import numpy as np
+import pandas as pd
+
+from aggregates import CUBE_KEYS, MAX_DURATION_SECONDS, PLAYBACK_KEYS, ListeningAggregates, entity_table
+from calendar_features import EPOCH_WEEKDAY, day_number, day_start_ns, localize
+from dimensions import Codebook, Dimensions
+from ingest import DURATION_LABELS, PLATFORM_LABELS
+
+# Versi struktur indeks untuk cache di disk; naikkan bila atribut berubah
+FILTER_VERSION = 3
+
+# Jumlah pemutaran terpanjang yang disimpan per hari (sama dengan ListeningAggregates)
+LONGEST_PER_DAY = 10
+
+_MS_PER_MINUTE = 1000 * 60
+
+# Kolom per baris yang ikut diurutkan menurut ts
+_ROW_COLUMNS = (
+    'ts', 'day', 'hour', 'ms_played', 'seconds', 'skipped', 'duration_codes', 'artist', 'track', 'playback'
+)
+
+# Kolom per potongan yang hanya dipakai untuk menyusun kode sel kubus pemutaran
+_PLAYBACK_PARTS = ('device', 'shuffle', 'reason_start', 'reason_end')
+
+
+def _concat(parts, dtype):
+    return np.concatenate(parts).astype(dtype, copy=False) if parts else np.empty(0, dtype=dtype)
+
+
+def _group_sums(keys, *weights):
+    """Kunci unik terurut beserta indeks kelompok per baris, jumlah baris, dan jumlah ``weights``."""
+    unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    sums = [np.bincount(inverse, weights=weight, minlength=len(unique)) for weight in weights]
+    return unique, inverse, counts, sums
+
+
+class HistoryIndex:
+    """Riwayat dalam bentuk array terurut ``ts`` beserta indeks untuk filter.
+
+    Kode artis dan lagu adalah kunci ``dims`` yang juga dipakai agregat hasil
+    filter, sehingga tabel artis dan lagu cukup dihitung dengan ``np.bincount``.
+    """
+
+    def __init__(self):
+        self.tz = None
+        self.first_day = 0
+        self.n_days = 0
+        # Kolom per baris, terurut menurut ts
+        self.ts = None
+        self.day = None
+        self.hour = None
+        self.ms_played = None
+        self.seconds = None
+        self.skipped = None
+        self.duration_codes = None
+        self.artist = None
+        self.track = None
+        self.playback = None
+        # Dimensi nama untuk kode artis dan lagu
+        self.dims = None
+        # Label sel kubus pemutaran: MultiIndex PLAYBACK_KEYS, urut menurut kode sel
+        self.playback_labels = None
+        # Indeks terbalik artis: posisi baris artis a = artist_rows[artist_offsets[a]:artist_offsets[a + 1]]
+        self.artist_rows = None
+        self.artist_offsets = None
+        # Parsial per hari
+        self.hour_plays = None
+        self.hour_ms = None
+        self.day_categories = None
+        self.day_longest = None
+        self.day_artists = None
+        self.day_tracks = None
+
+    @classmethod
+    def from_frame(cls, data, tz=None):
+        """Membangun indeks dari DataFrame yang sudah dibersihkan."""
+        return cls.from_chunks([data], tz)
+
+    @classmethod
+    def from_chunks(cls, chunks, tz=None):
+        """Membangun indeks dari iterator potongan; hanya kolom yang dibutuhkan yang disimpan."""
+        index = cls()
+        index.tz = tz
+        dims = Dimensions()
+        reasons = {'reason_start': Codebook(), 'reason_end': Codebook()}
+        columns = {name: [] for name in _ROW_COLUMNS + _PLAYBACK_PARTS if name not in ('seconds', 'playback')}
+
+        for chunk in chunks:
+            if len(chunk) == 0:
+                continue
+            columns['ts'].append(chunk['ts'].to_numpy().astype('int64'))
+            columns['day'].append(chunk['tanggal'].to_numpy())
+            columns['hour'].append(chunk['jam'].to_numpy())
+            columns['ms_played'].append(chunk['ms_played'].to_numpy())
+            columns['skipped'].append(chunk['skipped'].to_numpy())
+            columns['shuffle'].append(chunk['shuffle'].to_numpy())
+            # Kategori perangkat tetap (PLATFORM_LABELS), jadi kodenya sama di semua potongan
+            columns['device'].append(chunk['perangkat'].cat.codes.to_numpy())
+            for name, codebook in reasons.items():
+                columns[name].append(codebook.encode(chunk[name])[0])
+            columns['duration_codes'].append(chunk['kategori_durasi'].cat.codes.to_numpy())
+            artist, track = dims.encode(chunk)
+            columns['artist'].append(artist)
+            columns['track'].append(track)
+
+        dtypes = {
+            'ts': np.int64, 'day': np.int32, 'hour': np.int8, 'ms_played': np.int32, 'skipped': bool,
+            'duration_codes': np.int8, 'artist': np.int32, 'track': np.int32,
+            'device': np.int32, 'shuffle': np.int32, 'reason_start': np.int32, 'reason_end': np.int32,
+        }
+        parts = {name: _concat(columns.pop(name), dtypes[name]) for name in _PLAYBACK_PARTS}
+        for name, values in columns.items():
+            setattr(index, name, _concat(values, dtypes[name]))
+        index.seconds = (index.ms_played // 1000).clip(0, MAX_DURATION_SECONDS).astype(np.int16)
+        index._build_playback(parts, reasons)
+        index.dims = dims
+
+        # Ekspor umumnya sudah urut waktu; pengurutan hanya bila perlu
+        if len(index.ts) and np.any(index.ts[1:] < index.ts[:-1]):
+            order = np.argsort(index.ts, kind='stable')
+            for name in _ROW_COLUMNS:
+                setattr(index, name, getattr(index, name)[order])
+
+        index._build_artist_index()
+        index._build_partials()
+        return index
+
+    def _build_playback(self, parts, reasons):
+        """Kode sel kubus pemutaran per baris, dengan jam sebagai dimensi paling luar."""
+        levels = [range(24), PLATFORM_LABELS, [False, True]]
+        cell = self.hour.astype(np.int32) * len(PLATFORM_LABELS) + parts['device']
+        cell = cell * 2 + parts['shuffle']
+        for name, codebook in reasons.items():
+            labels, _, rank = codebook.sorted_codes()
+            cell = cell * len(labels) + rank[parts[name]]
+            levels.append(labels.astype(str))
+        self.playback = cell
+        self.playback_labels = pd.MultiIndex.from_product(levels, names=PLAYBACK_KEYS)
+
+    def _build_artist_index(self):
+        # Pengurutan stabil menjaga posisi setiap artis tetap urut waktu
+        self.artist_rows = np.argsort(self.artist, kind='stable').astype(np.int32)
+        counts = np.bincount(self.artist, minlength=len(self.dims.artists))
+        self.artist_offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def _build_partials(self):
+        if len(self.ts):
+            self.first_day = int(self.day.min())
+            self.n_days = int(self.day.max()) - self.first_day + 1
+        day = self.day.astype(np.int64) - self.first_day
+        ms = self.ms_played.astype(np.float64)
+
+        # Hari x jam dan hari x kategori durasi, padat
+        cell = day * 24 + self.hour
+        self.hour_plays = np.bincount(cell, minlength=self.n_days * 24)
+        self.hour_ms = np.bincount(cell, weights=ms, minlength=self.n_days * 24)
+        n_categories = len(DURATION_LABELS)
+        categorized = self.duration_codes >= 0
+        self.day_categories = np.bincount(
+            day[categorized] * n_categories + self.duration_codes[categorized],
+            minlength=self.n_days * n_categories
+        ).reshape(self.n_days, n_categories)
+
+        # Posisi pemutaran terpanjang per hari; -1 bila hari itu lebih sedikit pemutarannya
+        order = np.lexsort((-self.ms_played.astype(np.int64), day))
+        day_sorted = day[order]
+        starts = np.searchsorted(day_sorted, np.arange(self.n_days), side='left')
+        rank = np.arange(len(order)) - starts[day_sorted]
+        keep = rank < LONGEST_PER_DAY
+        self.day_longest = np.full((self.n_days, LONGEST_PER_DAY), -1, dtype=np.int64)
+        self.day_longest[day_sorted[keep], rank[keep]] = order[keep]
+
+        # Hari x artis dan hari x lagu, jarang; terurut menurut hari lalu kode
+        n_artists = len(self.dims.artists)
+        skipped = self.skipped.astype(np.float64)
+        keys, _, plays, (total_ms, skips) = _group_sums(day * n_artists + self.artist, ms, skipped)
+        self.day_artists = {
+            'day': (keys // n_artists).astype(np.int32), 'code': (keys % n_artists).astype(np.int32),
+            'plays': plays.astype(np.int32), 'ms': total_ms, 'skips': skips.astype(np.int32),
+        }
+
+        n_tracks = len(self.dims.tracks)
+        keys, inverse, plays, (total_ms, skips) = _group_sums(day * n_tracks + self.track, ms, skipped)
+        first_ts = np.full(len(keys), np.iinfo(np.int64).max)
+        last_ts = np.full(len(keys), np.iinfo(np.int64).min)
+        np.minimum.at(first_ts, inverse, self.ts)
+        np.maximum.at(last_ts, inverse, self.ts)
+        self.day_tracks = {
+            'day': (keys // n_tracks).astype(np.int32), 'code': (keys % n_tracks).astype(np.int32),
+            'plays': plays.astype(np.int32), 'ms': total_ms, 'skips': skips.astype(np.int32),
+            'first_ts': first_ts, 'last_ts': last_ts,
+        }
+
+    def __len__(self):
+        return len(self.ts)
+
+    @property
+    def first_date(self):
+        """Tanggal lokal pertama dalam riwayat."""
+        return pd.Timestamp(self.first_day, unit='D').date()
+
+    @property
+    def last_date(self):
+        """Tanggal lokal terakhir dalam riwayat."""
+        return pd.Timestamp(self.first_day + max(self.n_days - 1, 0), unit='D').date()
+
+    def top_artist_names(self, n=None):
+        """Nama artis urut menurut jumlah pemutaran, untuk pilihan filter."""
+        order = np.argsort(-np.diff(self.artist_offsets), kind='stable')
+        return [str(name) for name in self.dims.artist_names(order[:n])]
+
+    def row_range(self, start_day, end_day):
+        """Rentang baris [awal, akhir) untuk hari lokal ``start_day`` s.d. ``end_day``, lewat searchsorted."""
+        bounds = day_start_ns([start_day, end_day + 1], self.tz)
+        start, stop = np.searchsorted(self.ts, bounds, side='left')
+        return int(start), int(stop)
+
+    def artist_positions(self, codes, start=0, stop=None):
+        """Posisi baris (urut waktu) milik artis ``codes`` di dalam rentang baris [start, stop)."""
+        stop = len(self.ts) if stop is None else stop
+        segments = []
+        for code in codes:
+            rows = self.artist_rows[self.artist_offsets[code]:self.artist_offsets[code + 1]]
+            lo, hi = np.searchsorted(rows, [start, stop], side='left')
+            segments.append(rows[lo:hi])
+        if not segments:
+            return np.empty(0, dtype=np.int32)
+        return np.sort(np.concatenate(segments)) if len(segments) > 1 else segments[0]
+
+    def aggregates(self, start_date=None, end_date=None, artists=None):
+        """``ListeningAggregates`` untuk rentang tanggal lokal (inklusif) dan/atau daftar artis.
+
+        Tanpa filter artis semua tabel dipotong dari parsial per hari; hanya
+        histogram durasi per detik dan kubus pemutaran yang membaca baris,
+        sebagai satu irisan bersebelahan. Dengan filter artis, baris diambil lewat indeks terbalik.
+        """
+        last_day = self.first_day + self.n_days - 1
+        start_day = self.first_day if start_date is None else max(day_number(start_date), self.first_day)
+        end_day = last_day if end_date is None else min(day_number(end_date), last_day)
+        if start_day > end_day:
+            start_day, end_day = self.first_day, self.first_day - 1
+        start, stop = self.row_range(start_day, end_day)
+
+        if artists:
+            codes = self.dims.artists.get(artists)
+            agg = self._from_rows(self.artist_positions(codes[codes >= 0], start, stop))
+        else:
+            agg = self._from_partials(start_day - self.first_day, end_day - self.first_day + 1, start, stop)
+        agg.tz = self.tz
+        return agg
+
+    # Pembentukan agregat
+
+    def _from_partials(self, lo, hi, start, stop):
+        """Agregat untuk hari [lo, hi) (relatif terhadap hari pertama) dari parsial per hari."""
+        agg = ListeningAggregates()
+        agg.dims = self.dims
+        hi = max(hi, lo)
+        cells = slice(lo * 24, hi * 24)
+        agg.cube = self._cube(np.arange(lo * 24, hi * 24), self.hour_plays[cells], self.hour_ms[cells])
+
+        part = slice(*np.searchsorted(self.day_artists['day'], [lo, hi], side='left'))
+        day_artists = {name: values[part] for name, values in self.day_artists.items()}
+        agg.artists = self._artist_table(
+            day_artists['code'], day_artists['plays'], day_artists['ms'], day_artists['skips']
+        )
+
+        part = slice(*np.searchsorted(self.day_tracks['day'], [lo, hi], side='left'))
+        day_tracks = {name: values[part] for name, values in self.day_tracks.items()}
+        agg.tracks = self._track_table(
+            day_tracks['code'], day_tracks['plays'], day_tracks['ms'], day_tracks['skips'],
+            day_tracks['first_ts'], day_tracks['last_ts'],
+        )
+
+        agg.total_plays = stop - start
+        agg.total_minutes = float(self.hour_ms[cells].sum()) / _MS_PER_MINUTE
+        if stop > start:
+            # ts terurut: pemutaran pertama dan terakhir ada di ujung irisan
+            agg.first_ts, agg.last_ts = pd.Timestamp(int(self.ts[start])), pd.Timestamp(int(self.ts[stop - 1]))
+        agg.duration_seconds = np.bincount(self.seconds[start:stop], minlength=MAX_DURATION_SECONDS + 1)
+        agg.duration_category_plays = self._category_series(self.day_categories[lo:hi].sum(axis=0))
+        agg.playback = self._playback(slice(start, stop))
+
+        candidates = self.day_longest[lo:hi].ravel()
+        agg.longest_plays = self._longest(candidates[candidates >= 0])
+        return agg
+
+    def _from_rows(self, rows):
+        """Agregat dari posisi baris terpilih (urut waktu)."""
+        agg = ListeningAggregates()
+        agg.dims = self.dims
+        day = self.day[rows].astype(np.int64) - self.first_day
+        ms = self.ms_played[rows].astype(np.float64)
+        ts = self.ts[rows]
+
+        cells, _, plays, (total_ms,) = _group_sums(day * 24 + self.hour[rows], ms)
+        agg.cube = self._cube(cells, plays, total_ms)
+        ones = np.ones(len(rows), dtype=np.int64)
+        skipped = self.skipped[rows].astype(np.float64)
+        agg.artists = self._artist_table(self.artist[rows], ones, ms, skipped)
+        agg.tracks = self._track_table(self.track[rows], ones, ms, skipped, ts, ts)
+        agg.playback = self._playback(rows)
+
+        agg.total_plays = len(rows)
+        agg.total_minutes = float(ms.sum()) / _MS_PER_MINUTE
+        if len(rows):
+            agg.first_ts, agg.last_ts = pd.Timestamp(int(ts[0])), pd.Timestamp(int(ts[-1]))
+        agg.duration_seconds = np.bincount(self.seconds[rows], minlength=MAX_DURATION_SECONDS + 1)
+        codes = self.duration_codes[rows]
+        agg.duration_category_plays = self._category_series(
+            np.bincount(codes[codes >= 0], minlength=len(DURATION_LABELS))
+        )
+
+        n_longest = min(LONGEST_PER_DAY, len(rows))
+        ms_rows = self.ms_played[rows]
+        top = np.argpartition(-ms_rows, n_longest - 1)[:n_longest] if n_longest else np.empty(0, dtype=np.int64)
+        agg.longest_plays = self._longest(rows[top])
+        return agg
+
+    def _cube(self, cells, plays, total_ms):
+        present = plays > 0
+        cells = np.asarray(cells)[present]
+        days = cells // 24 + self.first_day
+        weekday = ((days + EPOCH_WEEKDAY) % 7).astype(np.int8)
+        index = pd.MultiIndex.from_arrays(
+            [days.astype(np.int32), (cells % 24).astype(np.int8), weekday, weekday >= 5], names=CUBE_KEYS
+        )
+        return pd.DataFrame({
+            'plays': plays[present].astype(np.int64),
+            'menit': total_ms[present] / _MS_PER_MINUTE,
+        }, index=index)
+
+    def _playback(self, rows):
+        """Kubus pemutaran untuk baris ``rows`` (irisan atau posisi), hanya sel yang terisi."""
+        cells = self.playback[rows]
+        n = len(self.playback_labels)
+        plays = np.bincount(cells, minlength=n)
+        present = plays > 0
+        return pd.DataFrame({
+            'plays': plays[present].astype(np.int64),
+            'skips': np.bincount(cells, weights=self.skipped[rows], minlength=n)[present].astype(np.int64),
+        }, index=self.playback_labels[present])
+
+    def _artist_table(self, codes, plays, ms, skips):
+        return entity_table(codes, plays, np.asarray(ms) / _MS_PER_MINUTE, skips)
+
+    def _track_table(self, codes, plays, ms, skips, first_ts, last_ts):
+        return entity_table(codes, plays, np.asarray(ms) / _MS_PER_MINUTE, skips, first_ts, last_ts)
+
+    def _category_series(self, counts):
+        return pd.Series(
+            np.asarray(counts, dtype=np.int64), index=pd.Index(DURATION_LABELS, name='kategori_durasi'), name='count'
+        )
+
+    def _longest(self, candidates):
+        """10 pemutaran terpanjang dari posisi kandidat; nilai sama diurutkan menurut waktu."""
+        candidates = np.sort(candidates)
+        top = candidates[np.argsort(-self.ms_played[candidates], kind='stable')[:LONGEST_PER_DAY]]
+        return pd.DataFrame({
+            'track_name': self.dims.titles.take(self.dims.track_title[self.track[top]]).astype(str),
+            'artist_name': self.dims.artist_names(self.artist[top]).astype(str),
+            'menit_diputar': (self.ms_played[top] / _MS_PER_MINUTE).astype(np.float32),
+        })
+
+
+def filter_sessions(sessions, start_date=None, end_date=None, tz=None):
+    """Sesi yang dimulai di dalam rentang tanggal lokal (inklusif)."""
+    if sessions is None or (start_date is None and end_date is None):
+        return sessions
+    days = localize(sessions['mulai'], tz).dt.normalize()
+    mask = pd.Series(True, index=sessions.index)
+    if start_date is not None:
+        mask &= days >= pd.Timestamp(start_date)
+    if end_date is not None:
+        mask &= days <= pd.Timestamp(end_date)
+    return sessions[mask]
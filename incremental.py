@@ -0,0 +1,79 @@
+"""Penambahan ekspor baru ke riwayat yang sudah tersimpan.
+
+Ekspor ulang Spotify biasanya tumpang tindih dengan ekspor sebelumnya.
+Baris dianggap sama jika (ts, spotify_track_uri, ms_played) sama; kunci
+ini di-hash menjadi uint64 dan disimpan dalam indeks terurut sehingga
+pemeriksaan baris baru cukup dengan pencarian biner.
+"""
+import numpy as np
+import pandas as pd
+
+DEDUP_COLUMNS = ['ts', 'spotify_track_uri', 'ms_played']
+
+# Versi format indeks hash dan manifest penyimpanan bertahap untuk cache di disk
+STORE_VERSION = 1
+
+
+def row_hashes(data):
+    """Hash 64-bit per baris atas kolom kunci deduplikasi.
+
+    Jika ekspor tidak memiliki ``spotify_track_uri``, judul dan artis dipakai
+    sebagai gantinya.
+    """
+    columns = [column for column in DEDUP_COLUMNS if column in data]
+    if 'spotify_track_uri' not in data:
+        columns += ['track_name', 'artist_name']
+    return pd.util.hash_pandas_object(data[columns], index=False).to_numpy()
+
+
+def drop_duplicate_plays(data):
+    """Membuang baris yang kuncinya sudah muncul sebelumnya di ``data``."""
+    duplicated = pd.Series(row_hashes(data)).duplicated().to_numpy()
+    if not duplicated.any():
+        return data
+    return data[~duplicated].reset_index(drop=True)
+
+
+class HashIndex:
+    """Himpunan hash baris tersimpan dalam array uint64 terurut."""
+
+    def __init__(self, hashes=None):
+        self.hashes = np.unique(hashes) if hashes is not None else np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def contains(self, hashes):
+        """Mask boolean: hash mana yang sudah ada di indeks."""
+        if len(self.hashes) == 0:
+            return np.zeros(len(hashes), dtype=bool)
+        position = np.searchsorted(self.hashes, hashes).clip(max=len(self.hashes) - 1)
+        return self.hashes[position] == hashes
+
+    def add(self, hashes):
+        """Menyisipkan hash baru tanpa mengurutkan ulang seluruh indeks."""
+        new = np.unique(hashes)
+        new = new[~self.contains(new)]
+        self.hashes = np.insert(self.hashes, np.searchsorted(self.hashes, new), new)
+        return self
+
+
+def new_plays(index, data, keys=None):
+    """Baris ``data`` yang belum ada di indeks beserta hash-nya.
+
+    Duplikat di dalam ``data`` sendiri juga dibuang. ``keys`` (opsional)
+    adalah kolom kunci yang sudah dinormalisasi, mis. dari ingest.clean_keys
+    untuk data mentah; tanpa itu hash dihitung dari ``data``.
+    """
+    hashes = row_hashes(data if keys is None else keys)
+    fresh = ~index.contains(hashes) & ~pd.Series(hashes).duplicated().to_numpy()
+    return data[fresh].reset_index(drop=True), hashes[fresh]
+
+
+def dedup_chunks(chunks):
+    """Membuang pemutaran ganda dari aliran potongan, mis. saat beberapa ekspor tumpang tindih."""
+    index = HashIndex()
+    for chunk in chunks:
+        fresh, hashes = new_plays(index, chunk)
+        index.add(hashes)
+        yield fresh
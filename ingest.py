@@ -0,0 +1,402 @@
+"""Pembacaan dan pembersihan data riwayat streaming Spotify."""
+import functools
+import json
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from calendar_features import calendar_features
+from profiling import stage
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:  # pragma: no cover - pyarrow opsional
+    pa = pa_csv = None
+
+# Jumlah baris default per potongan pada mode hemat memori
+DEFAULT_CHUNKSIZE = 200_000
+
+# Versi skema hasil clean_frame; naikkan setiap kali logika pembersihan berubah
+# agar cache di disk yang lama tidak terpakai lagi
+SCHEMA_VERSION = 6
+
+# Kolom ekspor sesuai spotify_data_dictionary.csv
+EXPORT_COLUMNS = [
+    'spotify_track_uri', 'ts', 'platform', 'ms_played', 'track_name', 'artist_name',
+    'album_name', 'reason_start', 'reason_end', 'shuffle', 'skipped'
+]
+
+# Kolom wajib di setiap ekspor; tanpa kolom ini tidak ada bagian yang bisa dihitung
+REQUIRED_COLUMNS = ['ts', 'ms_played', 'track_name', 'artist_name']
+
+# Kolom opsional yang dibutuhkan per bagian analisis (analysis.ANALYSES dan 'session').
+# Kolom ekspor lain, termasuk album_name, IP, negara, dan kolom episode, tidak dibaca
+ANALYSIS_COLUMNS = {
+    'artist': [],
+    'song': ['spotify_track_uri', 'skipped'],
+    'time': [],
+    'duration': [],
+    'pattern': [],
+    'playback': ['spotify_track_uri', 'platform', 'reason_start', 'reason_end', 'shuffle', 'skipped'],
+    'session': ['skipped'],
+}
+
+# Kolom teks yang langsung diurai sebagai kategori (kamus Arrow atau kategori pandas)
+CATEGORY_COLUMNS = [
+    'spotify_track_uri', 'platform', 'track_name', 'artist_name', 'album_name', 'reason_start', 'reason_end'
+]
+
+# Parser CSV untuk pembacaan utuh: pembaca Arrow multithread bila pyarrow terpasang, selain itu mesin C pandas
+CSV_ENGINE = 'pyarrow' if pa is not None else 'c'
+
+# ts dengan akhiran zona waktu (Z atau +07:00) diurai sebagai timestamp UTC
+_TZ_SUFFIX = re.compile(r'(Z|[+-]\d{2}:?\d{2})$')
+
+# Nama field JSON ekspor Spotify yang berbeda dari kolom CSV
+JSON_FIELD_MAP = {
+    'master_metadata_track_name': 'track_name',
+    'master_metadata_album_artist_name': 'artist_name',
+    'master_metadata_album_album_name': 'album_name',
+    # Riwayat streaming biasa (StreamingHistory*.json)
+    'endTime': 'ts',
+    'msPlayed': 'ms_played',
+    'trackName': 'track_name',
+    'artistName': 'artist_name',
+}
+
+# Batas dan label kategori durasi (menit); 0 menit tidak masuk kategori mana pun
+DURATION_BINS = [0, 0.5, 2, 5, float('inf')]
+DURATION_LABELS = ['Sangat Pendek (<30s)', 'Pendek (30s-2m)', 'Sedang (2-5m)', 'Panjang (>5m)']
+
+# Pengganti nama yang kosong
+NAME_FILLS = {
+    'track_name': 'Lagu Tidak Diketahui',
+    'artist_name': 'Artis Tidak Diketahui',
+    'album_name': 'Album Tidak Diketahui',
+}
+
+# Kolom TRUE/FALSE ekspor yang disimpan sebagai bool; kolom yang tidak ada diisi False
+BOOL_COLUMNS = ['shuffle', 'skipped']
+
+# Alasan mulai/selesai pemutaran, disimpan sebagai kategori; kosong = 'unknown' seperti di ekspor
+REASON_COLUMNS = ['reason_start', 'reason_end']
+UNKNOWN_REASON = 'unknown'
+
+# Keluarga perangkat dari string platform ekspor (mis. "Android OS 9 API 28 (samsung, SM-G960F)");
+# kata kunci huruf kecil dicek berurutan, sehingga web player dan perangkat partner didahulukan
+PLATFORM_FAMILIES = [
+    ('Web', ('web_player', 'web player', 'webplayer')),
+    ('Cast/TV', ('cast', 'partner', 'tv', 'sonos', 'speaker')),
+    ('Android', ('android',)),
+    ('iOS', ('ios', 'iphone', 'ipad')),
+    ('Windows', ('windows',)),
+    ('macOS', ('os x', 'osx', 'macos', 'mac os')),
+    ('Linux', ('linux',)),
+]
+PLATFORM_LABELS = [label for label, _ in PLATFORM_FAMILIES] + ['Lainnya', 'Tidak Diketahui']
+
+# Shard riwayat audio di dalam ZIP ekspor; shard video dan berkas lain diabaikan
+AUDIO_SHARD_PATTERN = re.compile(
+    r'^(endsong_\d+|Streaming_History_Audio_.+|StreamingHistory(_music_)?\d+)\.json$'
+)
+
+
+def load_columns(analyses=None):
+    """Kolom ekspor yang dibaca untuk bagian ``analyses`` (None = semua), urut seperti EXPORT_COLUMNS."""
+    names = ANALYSIS_COLUMNS if analyses is None else analyses
+    wanted = set(REQUIRED_COLUMNS).union(*(ANALYSIS_COLUMNS[name] for name in names))
+    return [column for column in EXPORT_COLUMNS if column in wanted]
+
+
+# Kolom yang dibaca secara default: kebutuhan semua bagian dashboard
+LOAD_COLUMNS = load_columns()
+
+
+def parse_bool(values):
+    """Mengubah kolom TRUE/FALSE (string, bool, atau kosong) menjadi bool; kosong = False."""
+    if values.dtype == bool:
+        return values
+    return values.isin([True, 'TRUE', 'True', 'true'])
+
+
+def _platform_label(platform):
+    lowered = platform.lower()
+    for label, keywords in PLATFORM_FAMILIES:
+        if any(keyword in lowered for keyword in keywords):
+            return label
+    return 'Lainnya'
+
+
+def platform_family(platform):
+    """Keluarga perangkat per baris sebagai kategori tetap PLATFORM_LABELS.
+
+    Pemetaan dihitung sekali per nilai platform unik, lalu diterapkan lewat kode kategori.
+    """
+    platform = platform.astype('category')
+    families = [PLATFORM_LABELS.index(_platform_label(str(value))) for value in platform.cat.categories]
+    # Kode -1 (kosong) mengambil elemen terakhir: 'Tidak Diketahui'
+    lookup = np.array(families + [PLATFORM_LABELS.index('Tidak Diketahui')], dtype=np.int8)
+    return pd.Categorical.from_codes(lookup[platform.cat.codes.to_numpy()], categories=PLATFORM_LABELS)
+
+
+def _fill_category(values, fill):
+    """Kategori dengan nilai kosong diganti ``fill``; kategori hasil parsing tidak menerima nilai baru."""
+    values = values.astype('category')
+    if values.isna().any():
+        if fill not in values.cat.categories:
+            values = values.cat.add_categories([fill])
+        values = values.fillna(fill)
+    return values
+
+
+def _clean_ts(ts):
+    """Timestamp UTC naif beresolusi ns; ts JSON bertanda zona waktu diseragamkan seperti CSV."""
+    ts = pd.to_datetime(ts)
+    if ts.dt.tz is not None:
+        ts = ts.dt.tz_convert(None)
+    # Satuan disamakan agar hash dan penggabungan antar sumber konsisten
+    return ts.astype('datetime64[ns]')
+
+
+def clean_keys(data):
+    """Kolom identitas pemutaran dari data mentah, dibersihkan persis seperti clean_frame.
+
+    Berisi ts, ms_played, dan spotify_track_uri (atau judul dan artis bila
+    URI tidak ada), sehingga hash barisnya sama dengan hash baris hasil
+    clean_frame tanpa membersihkan kolom lain.
+    """
+    keys = pd.DataFrame({'ts': _clean_ts(data['ts']), 'ms_played': data['ms_played'].astype('int32')})
+    if 'spotify_track_uri' in data:
+        keys['spotify_track_uri'] = data['spotify_track_uri']
+    else:
+        for column in ('track_name', 'artist_name'):
+            keys[column] = _fill_category(data[column], NAME_FILLS[column])
+    return keys
+
+
+def clean_frame(data, tz=None):
+    """Menambahkan kolom turunan waktu dan durasi pada data Spotify.
+
+    Skema dibuat ringkas: nama lagu/artis (dan album bila dibaca), platform,
+    keluarga perangkat, dan alasan mulai/selesai disimpan sebagai kategori,
+    skip dan shuffle sebagai bool, fitur kalender sebagai kode integer sempit
+    (lihat calendar_features) dan durasi sebagai float32. ``ts`` tetap UTC;
+    jika ``tz`` diisi, fitur kalender dihitung dalam zona waktu tersebut.
+    """
+    with stage('clean', rows=len(data)):
+        # Konversi timestamp; ts JSON bertanda zona waktu diseragamkan ke UTC naif seperti CSV
+        with stage('to_datetime'):
+            data['ts'] = _clean_ts(data['ts'])
+        # Tanggal (nomor hari), jam, hari, bulan, tahun, akhir pekan, dan periode waktu
+        with stage('calendar'):
+            for column, values in calendar_features(data['ts'], tz).items():
+                data[column] = values
+
+        # Konversi durasi; detik dapat diturunkan dari ms_played bila dibutuhkan
+        data['ms_played'] = data['ms_played'].astype('int32')
+        data['menit_diputar'] = (data['ms_played'] / (1000 * 60)).astype('float32')
+
+        # Menangani missing values
+        with stage('categories'):
+            for column in ('track_name', 'artist_name'):
+                data[column] = _fill_category(data[column], NAME_FILLS[column])
+            if 'album_name' in data:
+                data['album_name'] = _fill_category(data['album_name'], NAME_FILLS['album_name'])
+
+            # Identitas lagu
+            if 'spotify_track_uri' in data:
+                data['spotify_track_uri'] = data['spotify_track_uri'].astype('category')
+
+        # Perilaku pemutaran: skip dan shuffle sebagai bool, alasan dan perangkat sebagai kategori
+        with stage('playback'):
+            for column in BOOL_COLUMNS:
+                data[column] = parse_bool(data[column]) if column in data else False
+            for column in REASON_COLUMNS:
+                reasons = data[column] if column in data else pd.Series(None, index=data.index, dtype=object)
+                data[column] = _fill_category(reasons, UNKNOWN_REASON)
+            platform = data['platform'] if 'platform' in data else pd.Series(None, index=data.index, dtype=object)
+            data['platform'] = platform.astype('category')
+            data['perangkat'] = platform_family(data['platform'])
+
+        # Kategori durasi
+        with stage('cut'):
+            data['kategori_durasi'] = pd.cut(data['menit_diputar'], bins=DURATION_BINS, labels=DURATION_LABELS)
+
+    return data
+
+
+def _check_columns(columns, name):
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ValueError(f"Kolom wajib tidak ditemukan di {name}: {', '.join(missing)}")
+
+
+def parse_json_shard(payload, columns=None):
+    """Mengubah satu shard JSON ekspor Spotify menjadi DataFrame berkolom CSV (``columns``)."""
+    records = json.loads(payload)
+    shard = pd.DataFrame.from_records(records).rename(columns=JSON_FIELD_MAP)
+    if len(shard):
+        _check_columns(shard.columns, 'shard JSON')
+    shard = shard.reindex(columns=columns or LOAD_COLUMNS)
+    shard['ts'] = pd.to_datetime(shard['ts'], utc=True).dt.tz_convert(None)
+    return shard
+
+
+def _file_name(source):
+    return os.path.basename(getattr(source, 'name', None) or str(source))
+
+
+def read_header(source, nrows=1):
+    """Header CSV beserta ``nrows`` baris pertama, tanpa membaca badan file; posisi file dikembalikan."""
+    position = source.tell() if hasattr(source, 'seek') else None
+    head = pd.read_csv(source, nrows=nrows)
+    if position is not None:
+        source.seek(position)
+    return head
+
+
+def csv_columns(source, columns=None):
+    """Kolom yang akan dibaca dari satu CSV beserta cuplikan header.
+
+    Gagal sebelum badan file dibaca bila kolom wajib tidak ada. Kolom
+    ``columns`` (default LOAD_COLUMNS) yang tidak ada di file dilewati;
+    clean_frame mengisi nilai bawaannya.
+    """
+    head = read_header(source)
+    _check_columns(head.columns, _file_name(source))
+    return [column for column in columns or LOAD_COLUMNS if column in head.columns], head
+
+
+def _pandas_dtypes(columns):
+    dtypes = {column: 'category' for column in columns if column in CATEGORY_COLUMNS}
+    dtypes['ms_played'] = 'int32'
+    return dtypes
+
+
+def _arrow_types(columns, head):
+    types = {column: pa.dictionary(pa.int32(), pa.string()) for column in columns if column in CATEGORY_COLUMNS}
+    types['ms_played'] = pa.int32()
+    types.update({column: pa.bool_() for column in BOOL_COLUMNS if column in columns})
+    # Tipe ts ditentukan dari baris pertama: naif (UTC) atau bertanda zona waktu
+    sample = str(head['ts'].iloc[0]) if len(head) else ''
+    types['ts'] = pa.timestamp('ns', tz='UTC' if _TZ_SUFFIX.search(sample) else None)
+    return types
+
+
+def read_csv_export(source, columns=None):
+    """Membaca satu CSV ekspor: hanya kolom yang dibutuhkan, dengan tipe ditetapkan saat parsing.
+
+    Dengan pyarrow, file diurai multithread oleh pembaca CSV Arrow; nama
+    langsung menjadi kategori dan ts menjadi timestamp. Tanpa pyarrow, atau
+    bila isi file tidak cocok dengan tipe yang ditetapkan, dipakai mesin C pandas.
+    """
+    columns, head = csv_columns(source, columns)
+    if CSV_ENGINE == 'pyarrow':
+        position = source.tell() if hasattr(source, 'seek') else None
+        convert = pa_csv.ConvertOptions(
+            include_columns=columns, column_types=_arrow_types(columns, head), strings_can_be_null=True
+        )
+        try:
+            return pa_csv.read_csv(source, convert_options=convert).to_pandas()
+        except pa.ArrowInvalid:
+            if position is not None:
+                source.seek(position)
+    return pd.read_csv(source, usecols=columns, dtype=_pandas_dtypes(columns))
+
+
+def iter_sources(uploaded_files):
+    """Mengurai file unggahan menjadi pasangan (jenis, isi).
+
+    Jenis ``'csv'`` membawa objek file, jenis ``'json'`` membawa isi shard
+    dalam bytes. File ZIP dibuka dan hanya shard riwayat audio yang diambil.
+    """
+    if not isinstance(uploaded_files, (list, tuple)):
+        uploaded_files = [uploaded_files]
+
+    for source in uploaded_files:
+        name = _file_name(source).lower()
+        if name.endswith('.zip'):
+            with zipfile.ZipFile(source) as archive:
+                for member in sorted(archive.namelist()):
+                    if AUDIO_SHARD_PATTERN.match(os.path.basename(member)):
+                        yield 'json', archive.read(member)
+        elif name.endswith('.json'):
+            if hasattr(source, 'read'):
+                yield 'json', source.read()
+            else:
+                with open(source, 'rb') as f:
+                    yield 'json', f.read()
+        else:
+            yield 'csv', source
+
+
+def read_export(uploaded_files, max_workers=None, columns=None):
+    """Membaca CSV, shard JSON, atau ZIP ekspor Spotify menjadi satu DataFrame mentah.
+
+    Hanya kolom ``columns`` (default LOAD_COLUMNS) yang dibaca. Shard JSON
+    diurai paralel di process pool karena penguraian JSON adalah tahap
+    paling mahal saat memuat ekspor berisi puluhan shard.
+    """
+    frames, shards = [], []
+    for kind, payload in iter_sources(uploaded_files):
+        if kind == 'json':
+            shards.append(payload)
+        else:
+            with stage('read_csv') as record:
+                frames.append(read_csv_export(payload, columns))
+                record.rows = len(frames[-1])
+
+    workers = min(len(shards), max_workers or os.cpu_count() or 1)
+    if shards:
+        parse = functools.partial(parse_json_shard, columns=columns)
+        with stage('parse_json') as record:
+            if workers == 1:
+                frames.extend(parse(shard) for shard in shards)
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    frames.extend(executor.map(parse, shards))
+            record.rows = sum(len(frame) for frame in frames[-len(shards):])
+
+    if not frames:
+        raise ValueError("Tidak ada file riwayat streaming yang dikenali")
+    return pd.concat(frames, ignore_index=True)
+
+
+def concat_clean(frames):
+    """Menggabungkan beberapa DataFrame hasil clean_frame tanpa kehilangan tipe kategori."""
+    frames = [frame for frame in frames if len(frame)] or frames[:1]
+    data = pd.concat(frames, ignore_index=True)
+    for column in data.columns:
+        if isinstance(frames[0][column].dtype, pd.CategoricalDtype) and not isinstance(
+            data[column].dtype, pd.CategoricalDtype
+        ):
+            data[column] = pd.api.types.union_categoricals([frame[column] for frame in frames])
+    return data
+
+
+def iter_clean_chunks(uploaded_files, chunksize=DEFAULT_CHUNKSIZE, tz=None, columns=None):
+    """Membaca ekspor per potongan dan membersihkan setiap potongan.
+
+    CSV dibaca ``chunksize`` baris sekaligus dengan mesin C pandas (satu-satunya
+    yang mendukung ``chunksize``), tetap hanya kolom ``columns`` dan dengan tipe
+    saat parsing. Setiap shard JSON menjadi satu potongan. Memori puncak
+    dibatasi oleh ukuran potongan, bukan oleh panjang riwayat.
+    """
+    for kind, payload in iter_sources(uploaded_files):
+        if kind == 'json':
+            yield clean_frame(parse_json_shard(payload, columns), tz)
+        else:
+            selected, _ = csv_columns(payload, columns)
+            reader = pd.read_csv(payload, chunksize=chunksize, usecols=selected, dtype=_pandas_dtypes(selected))
+            while True:
+                with stage('read_csv') as record:
+                    chunk = next(reader, None)
+                    record.rows = 0 if chunk is None else len(chunk)
+                if chunk is None:
+                    break
+                yield clean_frame(chunk, tz)
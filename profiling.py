@@ -0,0 +1,278 @@
+"""Profil ringan per tahap: waktu dinding, waktu CPU, jumlah baris, dan memori puncak.
+
+Tahap ditandai dengan ``with stage('nama', rows=n):`` di jalur panas
+(pembacaan, pembersihan, agregasi, analisis, grafik); tahap di dalam tahap
+lain dicatat dengan nama berjenjang. Selama tidak ada ``Profiler`` yang
+aktif di konteks saat ini, ``stage`` hanya membaca satu ContextVar dan
+mengembalikan objek kosong, sehingga biayanya mendekati nol.
+
+Profiler diaktifkan per sesi dari panel debug di sidebar atau untuk semua
+sesi dengan ``SPOTIFY_PROFILE=1``. Hasil setiap putaran bisa ditulis sebagai
+log JSON per baris (``SPOTIFY_PROFILE_LOG``) dan sebagai berkas teks
+Prometheus untuk textfile collector node_exporter (``SPOTIFY_PROFILE_PROM``).
+
+Memori puncak diukur dari kenaikan RSS puncak proses (murah, tetapi hanya
+terlihat bila tahap melampaui puncak sebelumnya), atau dengan tracemalloc
+bila ``trace_memory`` aktif (tepat, tetapi memperlambat alokasi Python).
+"""
+import contextvars
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+PROFILE_ENABLED = os.environ.get('SPOTIFY_PROFILE', '') not in ('', '0')
+PROFILE_LOG = os.environ.get('SPOTIFY_PROFILE_LOG') or None
+PROFILE_PROM = os.environ.get('SPOTIFY_PROFILE_PROM') or None
+
+_ACTIVE = contextvars.ContextVar('profiler', default=None)
+
+_MB = 1024 ** 2
+
+
+def _max_rss_bytes():
+    if resource is None:
+        return 0
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss dalam KB di Linux dan dalam byte di macOS
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+class StageRecord:
+    """Hasil satu tahap; ``rows`` boleh diisi di dalam blok ``with``."""
+
+    __slots__ = ('name', 'depth', 'rows', 'wall_s', 'cpu_s', 'peak_bytes', '_start', '_child_peak')
+
+    def __init__(self, name, depth, rows=None):
+        self.name = name
+        self.depth = depth
+        self.rows = rows
+        self.wall_s = self.cpu_s = 0.0
+        self.peak_bytes = 0
+        self._start = None
+        self._child_peak = 0
+
+    def as_dict(self):
+        return {
+            'stage': self.name, 'depth': self.depth, 'rows': self.rows,
+            'wall_s': self.wall_s, 'cpu_s': self.cpu_s, 'peak_mb': self.peak_bytes / _MB,
+        }
+
+
+class _NullStage:
+    """Pengganti StageRecord saat profil tidak aktif; semua isian diabaikan."""
+
+    __slots__ = ('rows',)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _StageContext:
+    __slots__ = ('profiler', 'record')
+
+    def __init__(self, profiler, record):
+        self.profiler = profiler
+        self.record = record
+
+    def __enter__(self):
+        self.profiler._enter(self.record)
+        return self.record
+
+    def __exit__(self, *exc):
+        self.profiler._exit(self.record)
+        return False
+
+
+class Profiler:
+    """Pencatat tahap untuk satu putaran skrip (satu rerun Streamlit atau satu laporan)."""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.records = []
+        self._stack = []
+
+    def stage(self, name, rows=None):
+        # Nama tahap bersarang diawali nama induknya, misalnya ``section:artist/plotly_chart``
+        if self._stack:
+            name = f"{self._stack[-1].name}/{name}"
+        return _StageContext(self, StageRecord(name, len(self._stack), rows))
+
+    def _memory(self):
+        return tracemalloc.get_traced_memory() if self.trace_memory else (0, _max_rss_bytes())
+
+    def _enter(self, record):
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            # Puncak sejauh ini milik tahap induk; dicatat sebelum penghitung puncak direset
+            if self._stack:
+                parent = self._stack[-1]
+                parent._child_peak = max(parent._child_peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        current, peak = self._memory()
+        record._start = (time.perf_counter(), time.process_time(), current if self.trace_memory else peak)
+        self.records.append(record)
+        self._stack.append(record)
+
+    def _exit(self, record):
+        wall, cpu, memory = record._start
+        record.wall_s = time.perf_counter() - wall
+        record.cpu_s = time.process_time() - cpu
+        peak = max(self._memory()[1], record._child_peak)
+        record.peak_bytes = max(peak - memory, 0)
+        self._stack.pop()
+        if self.trace_memory:
+            if self._stack:
+                self._stack[-1]._child_peak = max(self._stack[-1]._child_peak, peak)
+            tracemalloc.reset_peak()
+
+    def summary(self):
+        """Ringkasan per nama tahap: jumlah panggilan, total waktu, baris, dan puncak memori terbesar."""
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record.name, {
+                'stage': record.name, 'depth': record.depth, 'calls': 0, 'rows': 0,
+                'wall_s': 0.0, 'cpu_s': 0.0, 'peak_mb': 0.0,
+            })
+            total['calls'] += 1
+            total['rows'] += record.rows or 0
+            total['wall_s'] += record.wall_s
+            total['cpu_s'] += record.cpu_s
+            total['peak_mb'] = max(total['peak_mb'], record.peak_bytes / _MB)
+        return list(totals.values())
+
+
+def activate(profiler):
+    """Menjadikan ``profiler`` (atau None) pencatat untuk konteks saat ini."""
+    _ACTIVE.set(profiler)
+    return profiler
+
+
+def stage(name, rows=None):
+    """Konteks pengukuran satu tahap; tanpa profiler aktif tidak mengukur apa pun."""
+    profiler = _ACTIVE.get()
+    if profiler is None:
+        return _NULL_STAGE
+    return profiler.stage(name, rows)
+
+
+def write_json_log(profiler, path, **fields):
+    """Menambahkan satu baris JSON per tahap ke ``path``; ``fields`` ikut di setiap baris."""
+    timestamp = time.time()
+    lines = [
+        json.dumps({'ts': timestamp, **fields, **record.as_dict()}, ensure_ascii=False)
+        for record in profiler.records
+    ]
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(''.join(line + '\n' for line in lines))
+
+
+class PrometheusTextfile:
+    """Penghitung kumulatif per tahap untuk seluruh proses, ditulis dalam format teks Prometheus.
+
+    Penghitung hanya bertambah selama proses hidup, sesuai semantik counter
+    Prometheus; berkas diganti secara atomik agar collector tidak membaca
+    isi setengah jadi.
+    """
+
+    METRICS = (
+        ('calls', 'spotify_stage_calls_total', 'counter', "Jumlah eksekusi tahap"),
+        ('wall_s', 'spotify_stage_wall_seconds_total', 'counter', "Total waktu dinding per tahap"),
+        ('cpu_s', 'spotify_stage_cpu_seconds_total', 'counter', "Total waktu CPU proses per tahap"),
+        ('rows', 'spotify_stage_rows_total', 'counter', "Total baris yang diproses per tahap"),
+        ('peak_bytes', 'spotify_stage_peak_memory_bytes', 'gauge', "Kenaikan memori puncak terbesar per tahap"),
+    )
+
+    CACHE_METRICS = (
+        ('hits', 'spotify_result_cache_hits_total', 'counter', "Permintaan yang dilayani cache hasil"),
+        ('misses', 'spotify_result_cache_misses_total', 'counter', "Permintaan yang tidak ada di cache hasil"),
+        ('computed', 'spotify_result_cache_computed_total', 'counter', "Perhitungan yang benar-benar dijalankan"),
+        ('coalesced', 'spotify_result_cache_coalesced_total', 'counter', "Permintaan yang menunggu perhitungan yang sedang berjalan"),
+        ('evictions', 'spotify_result_cache_evictions_total', 'counter', "Entri yang dikeluarkan oleh LRU"),
+        ('entries', 'spotify_result_cache_entries', 'gauge', "Jumlah entri di cache hasil"),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {}
+        self._caches = {}
+
+    def record(self, profiler):
+        with self._lock:
+            for record in profiler.records:
+                total = self._totals.setdefault(
+                    record.name, {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'rows': 0, 'peak_bytes': 0}
+                )
+                total['calls'] += 1
+                total['wall_s'] += record.wall_s
+                total['cpu_s'] += record.cpu_s
+                total['rows'] += record.rows or 0
+                total['peak_bytes'] = max(total['peak_bytes'], record.peak_bytes)
+
+    def record_cache(self, name, stats):
+        """Menyimpan penghitung terbaru sebuah cache hasil; nilainya sudah kumulatif."""
+        with self._lock:
+            self._caches[name] = dict(stats)
+
+    def render(self):
+        with self._lock:
+            totals = {name: dict(total) for name, total in sorted(self._totals.items())}
+            caches = {name: dict(stats) for name, stats in sorted(self._caches.items())}
+        lines = []
+        for field, metric, kind, description in self.METRICS:
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, total in totals.items():
+                label = name.replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'{metric}{{stage="{label}"}} {total[field]}')
+        if caches:
+            for field, metric, kind, description in self.CACHE_METRICS:
+                lines.append(f"# HELP {metric} {description}")
+                lines.append(f"# TYPE {metric} {kind}")
+                for name, stats in caches.items():
+                    lines.append(f'{metric}{{cache="{name}"}} {stats[field]}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.render())
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+# Penghitung bersama semua sesi di proses ini
+PROMETHEUS = PrometheusTextfile()
+
+
+def export(profiler, caches=None, **fields):
+    """Menulis hasil profiler ke log JSON dan berkas Prometheus yang dikonfigurasi lewat environment.
+
+    ``caches`` memetakan nama cache hasil ke ``stats()``-nya untuk ikut diekspor ke Prometheus.
+    """
+    if PROFILE_LOG:
+        write_json_log(profiler, PROFILE_LOG, **fields)
+    if PROFILE_PROM:
+        PROMETHEUS.record(profiler)
+        for name, stats in (caches or {}).items():
+            PROMETHEUS.record_cache(name, stats)
+        PROMETHEUS.write(PROFILE_PROM)
@@ -0,0 +1,260 @@
+"""Laporan batch tanpa Streamlit untuk banyak ekspor sekaligus.
+
+Setiap entri di direktori masukan adalah satu pengguna: sebuah subdirektori
+berisi file ekspor (CSV, JSON, ZIP) atau satu file ekspor langsung. Setiap
+pengguna diproses di process pool terpisah dan menghasilkan::
+
+    <keluaran>/<pengguna>/summary.json         angka ringkasan per bagian
+    <keluaran>/<pengguna>/tables/*.parquet     tabel per bagian (atau .json)
+    <keluaran>/<pengguna>/figures/*.html       grafik statis per bagian
+    <keluaran>/<pengguna>/sketches.npz         sketsa artis/lagu (--approximate)
+    <keluaran>/_pooled/                        laporan gabungan semua pengguna (--pool)
+    <keluaran>/index.json                      status setiap pengguna
+
+Contoh::
+
+    python report.py exports/ reports/ --workers 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+
+from aggregates import ListeningAggregates
+from analysis import ANALYSES, session_analysis
+from calendar_features import DEFAULT_TIMEZONE
+from figures import FIGURES
+from incremental import drop_duplicate_plays
+from ingest import clean_frame, iter_clean_chunks, read_export
+from sessions import DEFAULT_SESSION_GAP_MINUTES, sessionize
+from sketches import SketchAggregates, save_sketches
+
+EXPORT_EXTENSIONS = ('.csv', '.json', '.zip')
+
+# Subdirektori keluaran untuk laporan gabungan semua pengguna (--pool)
+POOLED_DIR = '_pooled'
+
+
+def discover_exports(root):
+    """Pasangan (pengguna, daftar file) dari direktori masukan, urut menurut nama."""
+    exports = []
+    for entry in sorted(os.scandir(root), key=lambda entry: entry.name):
+        if entry.is_dir():
+            files = sorted(
+                os.path.join(entry.path, name) for name in os.listdir(entry.path)
+                if name.lower().endswith(EXPORT_EXTENSIONS)
+            )
+            if files:
+                exports.append((entry.name, files))
+        elif entry.name.lower().endswith(EXPORT_EXTENSIONS):
+            exports.append((os.path.splitext(entry.name)[0], [entry.path]))
+    return exports
+
+
+def load_export(files, chunksize=None, gap_minutes=DEFAULT_SESSION_GAP_MINUTES, tz=None, approximate=False):
+    """Agregat dan tabel sesi satu pengguna.
+
+    Dengan ``chunksize`` data dibaca per potongan seperti mode hemat memori
+    di aplikasi, sehingga tabel sesi tidak dibuat (None). ``tz`` menentukan
+    zona waktu jam, hari, dan tanggal. Dengan ``approximate`` artis dan lagu
+    diringkas sebagai sketsa (lihat sketches.py).
+    """
+    aggregates = SketchAggregates if approximate else ListeningAggregates
+    if chunksize:
+        return aggregates.from_chunks(iter_clean_chunks(files, chunksize, tz), tz), None
+    # Sudah berjalan di process pool; shard JSON diurai berurutan
+    data = clean_frame(read_export(files, max_workers=1), tz)
+    if len(files) > 1:
+        data = drop_duplicate_plays(data)
+    return aggregates.from_frame(data, tz), sessionize(data, gap_minutes)
+
+
+def analyse_aggregates(agg, sessions=None):
+    """Menjalankan semua analisis atas agregat (dan tabel sesi bila ada)."""
+    results = {name: analyse(agg) for name, analyse in ANALYSES.items()}
+    if sessions is not None and len(sessions):
+        results['session'] = session_analysis(sessions, agg.tz)
+    results['overview'] = {
+        'total_plays': agg.total_plays,
+        'n_tracks': agg.n_tracks,
+        'n_artists': agg.n_artists,
+        'total_minutes': agg.total_minutes,
+        'first_ts_utc': agg.first_ts,
+        'last_ts_utc': agg.last_ts,
+        'timezone': agg.tz or DEFAULT_TIMEZONE,
+        # Batas galat angka perkiraan; kosong pada mode eksak
+        'error_bounds': agg.error_bounds(),
+    }
+    return results
+
+
+def analyse_export(files, chunksize=None, gap_minutes=DEFAULT_SESSION_GAP_MINUTES, tz=None, approximate=False):
+    """Menjalankan semua analisis untuk satu pengguna."""
+    return analyse_aggregates(*load_export(files, chunksize, gap_minutes, tz, approximate))
+
+
+def _scalar(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).isoformat()
+    return value
+
+
+def _table(value):
+    """Series/DataFrame menjadi DataFrame dengan indeks sebagai kolom dan nama kolom string."""
+    frame = value.to_frame(name=value.name or 'nilai') if isinstance(value, pd.Series) else value
+    frame = frame.reset_index(drop=isinstance(frame.index, pd.RangeIndex))
+    frame.columns = [str(column) for column in frame.columns]
+    return frame
+
+
+def write_report(results, directory, table_format='parquet', html=True, plotlyjs='cdn'):
+    """Menulis ringkasan, tabel, dan grafik HTML satu pengguna."""
+    os.makedirs(os.path.join(directory, 'tables'), exist_ok=True)
+    summary = {}
+    for section, result in results.items():
+        summary[section] = {}
+        for key, value in result.items():
+            if isinstance(value, (pd.Series, pd.DataFrame)):
+                path = os.path.join(directory, 'tables', f"{section}_{key}.{table_format}")
+                if table_format == 'parquet':
+                    _table(value).to_parquet(path, index=False)
+                else:
+                    _table(value).to_json(path, orient='records', date_format='iso')
+            else:
+                summary[section][key] = _scalar(value)
+    with open(os.path.join(directory, 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    if html:
+        os.makedirs(os.path.join(directory, 'figures'), exist_ok=True)
+        for section, result in results.items():
+            if section not in FIGURES:
+                continue
+            # Skrip plotly.js hanya disertakan sekali per halaman
+            parts = [
+                pio.to_html(figure, full_html=False, include_plotlyjs=plotlyjs if i == 0 else False)
+                for i, figure in enumerate(FIGURES[section](result).values())
+            ]
+            with open(os.path.join(directory, 'figures', f"{section}.html"), 'w', encoding='utf-8') as f:
+                f.write('<!DOCTYPE html>\n<html><head><meta charset="utf-8"></head><body>\n')
+                f.write('\n'.join(parts))
+                f.write('\n</body></html>\n')
+
+
+def process_export(user, files, output_dir, chunksize=None, gap_minutes=DEFAULT_SESSION_GAP_MINUTES, tz=None,
+                   approximate=False, pool=False, table_format='parquet', html=True, plotlyjs='cdn'):
+    """Memproses satu pengguna; kesalahan dicatat di status, tidak menghentikan batch.
+
+    Dengan ``pool`` agregat pengguna ikut dikembalikan di status (kunci
+    ``aggregates``) untuk digabung menjadi laporan bersama.
+    """
+    started = time.perf_counter()
+    try:
+        agg, sessions = load_export(files, chunksize, gap_minutes, tz, approximate)
+        directory = os.path.join(output_dir, user)
+        write_report(analyse_aggregates(agg, sessions), directory, table_format, html, plotlyjs)
+        if approximate:
+            save_sketches(agg, os.path.join(directory, 'sketches.npz'))
+        status = {'status': 'ok', 'rows': agg.total_plays}
+        if pool:
+            status['aggregates'] = agg
+    except Exception as e:
+        status = {'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+    status.update(user=user, files=len(files), seconds=round(time.perf_counter() - started, 3))
+    return status
+
+
+def run_batch(input_dir, output_dir, workers=None, pool=False, **options):
+    """Memproses semua ekspor di process pool dan menulis index.json.
+
+    Dengan ``pool`` agregat semua pengguna yang berhasil digabung lalu
+    dianalisis bersama ke ``<keluaran>/POOLED_DIR``; pemutaran tidak
+    dideduplikasi antar pengguna.
+    """
+    exports = discover_exports(input_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(exports) or 1))
+
+    statuses = []
+    pooled = None
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(process_export, user, files, output_dir, pool=pool, **options) for user, files in exports
+        ]
+        for future in as_completed(futures):
+            status = future.result()
+            agg = status.pop('aggregates', None)
+            if agg is not None:
+                pooled = agg if pooled is None else pooled.merge(agg)
+            statuses.append(status)
+            print(f"[{len(statuses)}/{len(exports)}] {status['user']}: {status['status']} "
+                  f"({status['seconds']:.1f} s)", file=sys.stderr)
+
+    if pooled is not None:
+        write_report(
+            analyse_aggregates(pooled), os.path.join(output_dir, POOLED_DIR), options.get('table_format', 'parquet'),
+            options.get('html', True), options.get('plotlyjs', 'cdn')
+        )
+
+    statuses.sort(key=lambda status: status['user'])
+    index = {
+        'workers': workers,
+        'seconds': round(time.perf_counter() - started, 3),
+        'exports': statuses,
+    }
+    if pooled is not None:
+        index['pooled'] = {'dir': POOLED_DIR, 'rows': pooled.total_plays}
+    with open(os.path.join(output_dir, 'index.json'), 'w') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    return index
+
+
+def _timezone(name):
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise argparse.ArgumentTypeError(f"zona waktu tidak dikenal: {name}")
+    return name
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Laporan batch riwayat streaming Spotify")
+    parser.add_argument('input', help="direktori ekspor: satu subdirektori atau satu file per pengguna")
+    parser.add_argument('output', help="direktori keluaran laporan")
+    parser.add_argument('--workers', type=int, default=None, help="jumlah proses; default jumlah CPU")
+    parser.add_argument('--chunksize', type=int, default=None, help="baca per potongan (tanpa analisis sesi)")
+    parser.add_argument('--gap', type=int, default=DEFAULT_SESSION_GAP_MINUTES, help="jeda antar sesi (menit)")
+    parser.add_argument('--tz', type=_timezone, default=None,
+                        help="zona waktu untuk jam, hari, dan tanggal, mis. Asia/Jakarta; default UTC")
+    parser.add_argument('--approximate', action='store_true',
+                        help="artis dan lagu sebagai sketsa berbatas galat; menulis sketches.npz per pengguna")
+    parser.add_argument('--pool', action='store_true',
+                        help=f"gabungkan semua pengguna menjadi satu laporan di {POOLED_DIR}/")
+    parser.add_argument('--format', choices=['parquet', 'json'], default='parquet', help="format tabel")
+    parser.add_argument('--no-html', action='store_true', help="lewati grafik HTML")
+    parser.add_argument('--inline-plotlyjs', action='store_true',
+                        help="sertakan plotly.js di setiap HTML agar bisa dibuka tanpa internet")
+    args = parser.parse_args(argv)
+
+    index = run_batch(
+        args.input, args.output, args.workers,
+        pool=args.pool, chunksize=args.chunksize, gap_minutes=args.gap, tz=args.tz,
+        approximate=args.approximate, table_format=args.format,
+        html=not args.no_html, plotlyjs=True if args.inline_plotlyjs else 'cdn',
+    )
+    failed = [status for status in index['exports'] if status['status'] != 'ok']
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
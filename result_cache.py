@@ -0,0 +1,181 @@
+"""Cache hasil bersama untuk semua sesi dalam satu proses, dengan single-flight.
+
+Beberapa sesi yang membuka dataset yang sama pada saat bersamaan tidak
+menghitung hal yang sama berulang kali: permintaan pertama untuk sebuah
+kunci menjadi pemimpin dan menghitung, permintaan lain untuk kunci itu
+menunggu hasilnya. Beban CPU dengan begitu bergantung pada jumlah dataset
+yang berbeda, bukan pada jumlah pengguna.
+
+- ``SingleFlight`` hanya menggabungkan perhitungan yang sedang berjalan.
+- ``ResultCache`` menyimpan hasil di memori dengan eviksi LRU berdasarkan
+  jumlah entri, di atas ``SingleFlight``.
+- ``worker_lock`` mengunci satu kunci lintas proses lewat berkas di
+  ``SPOTIFY_LOCK_DIR`` (tidak aktif bila kosong). Dipakai di sekitar
+  "cek cache disk, bangun, simpan" sehingga worker lain yang berbagi cache
+  disk menunggu lalu menemukan entri yang sudah jadi.
+"""
+import collections
+import contextlib
+import hashlib
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+LOCK_DIR = os.environ.get('SPOTIFY_LOCK_DIR') or None
+RESULT_CACHE_ENTRIES = int(os.environ.get('SPOTIFY_RESULT_CACHE_ENTRIES', 64))
+
+
+class FileLock:
+    """Kunci eksklusif lintas proses lewat ``flock`` pada satu berkas per kunci.
+
+    Berkas dihapus saat kunci dilepas agar direktori tidak menumpuk. Proses
+    yang menunggu pada berkas yang sudah dihapus mencoba lagi dengan berkas baru.
+    """
+
+    def __init__(self, directory, key):
+        name = hashlib.blake2b(str(key).encode(), digest_size=16).hexdigest()
+        self.path = os.path.join(directory, f"{name}.lock")
+        self._fd = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(fd).st_ino == os.stat(self.path).st_ino:
+                    self._fd = fd
+                    return self
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+
+    def __exit__(self, *exc):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+        return False
+
+
+def worker_lock(key, lock_dir=LOCK_DIR):
+    """Kunci lintas worker untuk ``key``; konteks kosong bila tidak dikonfigurasi atau tanpa ``fcntl``."""
+    if lock_dir is None or fcntl is None:
+        return contextlib.nullcontext()
+    return FileLock(lock_dir, key)
+
+
+class _Flight:
+    __slots__ = ('done', 'owner', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.owner = threading.get_ident()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Menggabungkan perhitungan serentak untuk kunci yang sama menjadi satu."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.computed = 0
+        self.coalesced = 0
+
+    def do(self, key, compute):
+        """Hasil ``compute()`` untuk ``key``; pemanggil serentak dengan kunci sama menunggu satu perhitungan."""
+        with self._lock:
+            flight = self._flights.get(key)
+            # Pemanggilan bersarang dengan kunci yang sama dari thread pemimpin dihitung langsung
+            if flight is not None and flight.owner != threading.get_ident():
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                self.computed += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            return flight.value
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {'computed': self.computed, 'coalesced': self.coalesced, 'in_flight': len(self._flights)}
+
+
+class ResultCache:
+    """Cache LRU per proses untuk hasil yang mahal, misalnya grafik satu bagian per dataset.
+
+    Kunci biasanya ``(dataset_key, nama)``. Hasil disimpan sebagai objek
+    yang sama untuk semua pemanggil, jadi tidak boleh diubah setelah dikembalikan.
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        return self._flight.do(key, lambda: self._compute_and_store(key, compute))
+
+    def _compute_and_store(self, key, compute):
+        # Pemimpin sebelumnya bisa selesai di antara miss dan mulai flight ini
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Penghitung hit, miss (termasuk yang menunggu perhitungan lain), gabungan, dan eviksi."""
+        flight = self._flight.stats()
+        with self._lock:
+            return {
+                'entries': len(self._entries), 'max_entries': self.max_entries,
+                'hits': self.hits, 'misses': self.misses, 'computed': flight['computed'],
+                'coalesced': flight['coalesced'], 'evictions': self.evictions,
+            }
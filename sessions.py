@@ -0,0 +1,62 @@
+"""Pengelompokan pemutaran berurutan menjadi sesi mendengarkan.
+
+Satu baris ekspor adalah satu pemutaran. Sesi adalah rangkaian pemutaran
+yang jedanya kurang dari batas tertentu. Semua langkah memakai operasi
+vektor NumPy (cumsum atas penanda jeda dan reduceat per sesi), tanpa loop
+Python, sehingga riwayat 10 juta baris selesai dalam hitungan detik.
+"""
+import numpy as np
+import pandas as pd
+
+# Jeda default antar sesi dalam menit
+DEFAULT_SESSION_GAP_MINUTES = 30
+
+# Versi format tabel sesi untuk cache di disk
+SESSIONS_VERSION = 1
+
+
+def session_boundaries(data, gap_minutes=DEFAULT_SESSION_GAP_MINUTES):
+    """Urutan baris menurut waktu dan posisi awal setiap sesi dalam urutan itu.
+
+    ``ts`` pada ekspor Spotify adalah waktu lagu berhenti, sehingga waktu
+    mulai pemutaran adalah ``ts - ms_played``.
+    """
+    end = data['ts'].to_numpy(dtype='datetime64[ms]').astype(np.int64)
+    order = np.arange(len(end)) if data['ts'].is_monotonic_increasing else np.argsort(end, kind='stable')
+    end = end[order]
+    start = end - data['ms_played'].to_numpy(dtype=np.int64)[order]
+
+    # Sesi baru dimulai jika jeda sejak pemutaran yang paling akhir selesai melebihi batas
+    new_session = np.ones(len(end), dtype=bool)
+    latest_end = np.maximum.accumulate(end)
+    new_session[1:] = start[1:] - latest_end[:-1] > gap_minutes * 60 * 1000
+    return order, np.flatnonzero(new_session), start, end
+
+
+def sessionize(data, gap_minutes=DEFAULT_SESSION_GAP_MINUTES):
+    """Tabel sesi: id, mulai, selesai, durasi, jumlah lagu, menit diputar, dan porsi skip."""
+    if len(data) == 0:
+        return pd.DataFrame(columns=[
+            'session_id', 'mulai', 'selesai', 'durasi_menit', 'jumlah_lagu', 'menit_diputar', 'porsi_skip'
+        ])
+
+    order, starts, start, end = session_boundaries(data, gap_minutes)
+    played = end - start
+    if 'skipped' in data:
+        skipped = data['skipped'].to_numpy(dtype=np.int64)[order]
+    else:
+        skipped = np.zeros(len(order), dtype=np.int64)
+
+    session_start = np.minimum.reduceat(start, starts)
+    session_end = np.maximum.reduceat(end, starts)
+    track_count = np.diff(np.append(starts, len(order)))
+
+    return pd.DataFrame({
+        'session_id': np.arange(len(starts), dtype=np.int32),
+        'mulai': session_start.astype('datetime64[ms]'),
+        'selesai': session_end.astype('datetime64[ms]'),
+        'durasi_menit': ((session_end - session_start) / 60000).astype(np.float32),
+        'jumlah_lagu': track_count.astype(np.int32),
+        'menit_diputar': (np.add.reduceat(played, starts) / 60000).astype(np.float32),
+        'porsi_skip': (np.add.reduceat(skipped, starts) / track_count).astype(np.float32),
+    })
@@ -0,0 +1,467 @@
+"""Sketsa perkiraan untuk riwayat sangat besar atau gabungan banyak pengguna.
+
+Jumlah artis dan lagu unik dihitung dengan HyperLogLog, sedangkan artis dan
+lagu teratas dengan Space-Saving yang dipersempit oleh Count-Min. Memori
+setiap sketsa tetap, tidak bergantung pada jumlah baris maupun jumlah
+artis/lagu. Semua sketsa bisa digabung (hasil gabungan sama dengan sketsa
+atas data gabungan, dalam batas galat yang sama) dan diserialisasi ke NPZ
+tanpa pickle sehingga aman ditukar antar pengguna.
+
+Batas galat:
+
+- HyperLogLog dengan ``2**p`` register: galat relatif standar
+  ``1.04 / sqrt(2**p)``; ditampilkan sebagai dua kali lipatnya (~95%).
+- Space-Saving: perkiraan tidak pernah di bawah nilai sebenarnya dan
+  kelebihannya paling banyak ``floor``, yaitu batas atas hitungan item
+  yang tidak dipantau (paling besar sekitar N / kapasitas).
+- Count-Min dengan lebar w dan kedalaman d: kelebihan paling banyak
+  ``e / w * N`` dengan peluang ``1 - exp(-d)``.
+"""
+import io
+import math
+
+import numpy as np
+import pandas as pd
+
+from aggregates import TRACK_FOLD, ListeningAggregates, track_totals
+
+# Versi format sketsa untuk cache di disk dan berkas NPZ; naikkan bila susunan array berubah
+SKETCH_VERSION = 2
+
+# 2**14 register (16 KB): galat relatif standar 0,81%
+HLL_PRECISION = 14
+
+# Jumlah item yang dipantau per ringkasan teratas
+SPACE_SAVING_CAPACITY = 1000
+
+# 5 baris x 2**16 kolom (2,6 MB): kelebihan <= 0,0042% x N dengan peluang 99,3%
+CMS_WIDTH_BITS = 16
+CMS_DEPTH = 5
+
+# Pengali ganjil tetap untuk hash multiply-shift Count-Min; harus sama di semua proses agar bisa digabung
+_CMS_MULTIPLIERS = np.random.default_rng(0x5EED).integers(1, 2 ** 63, size=16, dtype=np.uint64) * 2 + 1
+
+
+def hash_values(values):
+    """Hash 64-bit stabil per nilai, sama untuk string, object, maupun kategori."""
+    return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+
+
+def _bit_length(values):
+    """Panjang bit setiap uint64; dihitung per 32 bit agar eksak di float64."""
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+
+def _pack(prefix, arrays):
+    return {f"{prefix}.{name}": value for name, value in arrays.items()}
+
+
+def _unpack(prefix, arrays):
+    start = len(prefix) + 1
+    return {name[start:]: arrays[name] for name in arrays if name.startswith(prefix + '.')}
+
+
+def _sigma(x):
+    if x == 1:
+        return math.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous, z = z, z + x * y
+        y += y
+        if z == previous:
+            return z
+
+
+def _tau(x):
+    if x in (0, 1):
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = math.sqrt(x)
+        y *= 0.5
+        previous, z = z, z - (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+
+class _Sketch:
+    """Serialisasi NPZ bersama untuk semua sketsa."""
+
+    def to_bytes(self):
+        buffer = io.BytesIO()
+        np.savez(buffer, **self.to_arrays())
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, payload):
+        with np.load(io.BytesIO(payload), allow_pickle=False) as arrays:
+            return cls.from_arrays(dict(arrays))
+
+
+class HyperLogLog(_Sketch):
+    """Perkiraan jumlah nilai unik dari hash 64-bit."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.intp)
+        rest = hashes & np.uint64((1 << (64 - p)) - 1)
+        # Posisi bit 1 pertama pada sisa hash, dihitung dari kiri
+        rank = (64 - p) - _bit_length(rest) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+        return self
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError(f"Presisi HyperLogLog berbeda: {self.precision} dan {other.precision}")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        """Perkiraan jumlah unik dengan estimator Ertl (2017), tanpa bias di seluruh rentang."""
+        m = len(self.registers)
+        q = 64 - self.precision
+        histogram = np.bincount(self.registers, minlength=q + 2)
+        z = m * _tau(1 - histogram[q + 1] / m)
+        for k in range(q, 0, -1):
+            z = 0.5 * (z + histogram[k])
+        z += m * _sigma(histogram[0] / m)
+        return m * m / (2 * math.log(2) * z)
+
+    @property
+    def relative_error(self):
+        """Galat relatif standar (satu simpangan baku)."""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def to_arrays(self):
+        return {'registers': self.registers}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        registers = arrays['registers']
+        sketch = cls(int(math.log2(len(registers))))
+        sketch.registers = registers.astype(np.uint8)
+        return sketch
+
+
+class CountMinSketch(_Sketch):
+    """Perkiraan hitungan per item yang tidak pernah di bawah nilai sebenarnya."""
+
+    def __init__(self, width_bits=CMS_WIDTH_BITS, depth=CMS_DEPTH):
+        if depth > len(_CMS_MULTIPLIERS):
+            raise ValueError(f"Kedalaman Count-Min paling banyak {len(_CMS_MULTIPLIERS)}")
+        self.width_bits = width_bits
+        self.counts = np.zeros((depth, 1 << width_bits), dtype=np.int64)
+        self.total = 0
+
+    def _columns(self, hashes, row):
+        return ((hashes * _CMS_MULTIPLIERS[row]) >> np.uint64(64 - self.width_bits)).astype(np.intp)
+
+    def add(self, hashes, counts):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        counts = np.asarray(counts, dtype=np.int64)
+        for row in range(len(self.counts)):
+            np.add.at(self.counts[row], self._columns(hashes, row), counts)
+        self.total += int(counts.sum())
+        return self
+
+    def estimate(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        return np.min([self.counts[row][self._columns(hashes, row)] for row in range(len(self.counts))], axis=0)
+
+    def merge(self, other):
+        if other.counts.shape != self.counts.shape:
+            raise ValueError(f"Ukuran Count-Min berbeda: {self.counts.shape} dan {other.counts.shape}")
+        self.counts += other.counts
+        self.total += other.total
+        return self
+
+    @property
+    def error_bound(self):
+        """Kelebihan maksimum e / w * N, berlaku dengan peluang ``confidence``."""
+        return math.e / self.counts.shape[1] * self.total
+
+    @property
+    def confidence(self):
+        return 1 - math.exp(-len(self.counts))
+
+    def to_arrays(self):
+        return {'counts': self.counts, 'total': np.int64(self.total)}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        counts = arrays['counts']
+        sketch = cls(int(math.log2(counts.shape[1])), counts.shape[0])
+        sketch.counts = counts.astype(np.int64)
+        sketch.total = int(arrays['total'])
+        return sketch
+
+
+class SpaceSaving(_Sketch):
+    """Ringkasan item teratas yang bisa digabung (Space-Saving / Misra-Gries).
+
+    Setiap item yang dipantau menyimpan ``counts`` (batas atas) dan
+    ``errors`` (kelebihan maksimum); item lain dijamin tidak lebih dari
+    ``floor``. Potongan data dimasukkan sebagai hitungan eksak per item.
+    """
+
+    def __init__(self, capacity=SPACE_SAVING_CAPACITY):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype='int64')
+        self.errors = pd.Series(dtype='int64')
+        self.floor = 0
+        self.total = 0
+
+    @classmethod
+    def from_counts(cls, counts, capacity=SPACE_SAVING_CAPACITY):
+        """Ringkasan dari hitungan eksak per item (Series berindeks item)."""
+        sketch = cls(capacity)
+        sketch.total = int(counts.sum())
+        sketch._set(counts.astype('int64'), pd.Series(0, index=counts.index, dtype='int64'))
+        return sketch
+
+    def _set(self, counts, errors):
+        # Urutan stabil: hitungan menurun, lalu nama item
+        order = counts.sort_index(kind='stable').sort_values(ascending=False, kind='stable').index
+        if len(order) > self.capacity:
+            self.floor = max(self.floor, int(counts[order[self.capacity]]))
+            order = order[:self.capacity]
+        self.counts = counts[order]
+        self.errors = errors[order]
+
+    def update(self, counts):
+        return self.merge(SpaceSaving.from_counts(counts, self.capacity))
+
+    def merge(self, other):
+        # Item yang tidak dipantau di satu sisi dianggap bernilai floor sisi itu
+        items = self.counts.index.union(other.counts.index)
+        counts = self.counts.reindex(items, fill_value=self.floor) + other.counts.reindex(items, fill_value=other.floor)
+        errors = self.errors.reindex(items, fill_value=self.floor) + other.errors.reindex(items, fill_value=other.floor)
+        self.floor += other.floor
+        self.total += other.total
+        self._set(counts, errors)
+        return self
+
+    def to_arrays(self):
+        return {
+            'items': self.counts.index.to_numpy(dtype=str),
+            'counts': self.counts.to_numpy(),
+            'errors': self.errors.to_numpy(),
+            'scalars': np.array([self.capacity, self.floor, self.total], dtype=np.int64),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        capacity, floor, total = (int(value) for value in arrays['scalars'])
+        sketch = cls(capacity)
+        index = pd.Index(arrays['items'].astype(object), dtype='str')
+        sketch.counts = pd.Series(arrays['counts'], index=index, dtype='int64')
+        sketch.errors = pd.Series(arrays['errors'], index=index, dtype='int64')
+        sketch.floor, sketch.total = floor, total
+        return sketch
+
+
+class HeavyHitters(_Sketch):
+    """Item teratas: kandidat dari Space-Saving, hitungannya dipersempit dengan Count-Min."""
+
+    def __init__(self, capacity=SPACE_SAVING_CAPACITY, width_bits=CMS_WIDTH_BITS, depth=CMS_DEPTH):
+        self.summary = SpaceSaving(capacity)
+        self.sketch = CountMinSketch(width_bits, depth)
+
+    def update(self, counts):
+        """Memasukkan hitungan eksak satu potongan (Series berindeks nama item)."""
+        counts = counts[counts > 0]
+        self.summary.update(counts)
+        self.sketch.add(hash_values(counts.index), counts.to_numpy())
+        return self
+
+    def merge(self, other):
+        self.summary.merge(other.summary)
+        self.sketch.merge(other.sketch)
+        return self
+
+    def top(self, n):
+        """N item teratas dengan kolom ``estimate`` (batas atas) dan ``lower`` (batas bawah)."""
+        summary = self.summary
+        estimate = np.minimum(summary.counts.to_numpy(), self.sketch.estimate(hash_values(summary.counts.index)))
+        top = pd.DataFrame({
+            'estimate': estimate,
+            'lower': (summary.counts - summary.errors).to_numpy(),
+        }, index=summary.counts.index)
+        return top.sort_values('estimate', ascending=False, kind='stable').head(n)
+
+    @property
+    def monitored(self):
+        return self.summary.counts.index
+
+    @property
+    def error_bound(self):
+        """Kelebihan maksimum setiap perkiraan: floor Space-Saving atau batas Count-Min, yang lebih kecil."""
+        return min(self.summary.floor, self.sketch.error_bound)
+
+    def to_arrays(self):
+        return {**_pack('summary', self.summary.to_arrays()), **_pack('sketch', self.sketch.to_arrays())}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        sketch = cls()
+        sketch.summary = SpaceSaving.from_arrays(_unpack('summary', arrays))
+        sketch.sketch = CountMinSketch.from_arrays(_unpack('sketch', arrays))
+        return sketch
+
+
+# Kolom tambahan lagu yang dipantau; dihitung sejak lagu masuk ringkasan
+_TRACK_INFO_FOLD = {**TRACK_FOLD, 'plays_seen': 'sum'}
+
+_MS_PER_MINUTE = 1000 * 60
+
+
+class SketchAggregates(ListeningAggregates):
+    """Agregat dengan artis dan lagu diringkas sebagai sketsa berukuran tetap.
+
+    Kubus waktu, kubus pemutaran, histogram durasi, dan pemutaran terpanjang
+    tetap eksak karena ukurannya tidak bergantung pada jumlah artis atau
+    lagu. Skip per artis diperkirakan dengan Count-Min. Menit,
+    skip, dan waktu putar pertama/terakhir lagu teratas dihitung sejak lagu
+    tersebut mulai dipantau, sehingga eksak untuk lagu yang selalu teratas.
+    """
+
+    def __init__(self, capacity=SPACE_SAVING_CAPACITY, precision=HLL_PRECISION):
+        super().__init__()
+        self.artist_count = HyperLogLog(precision)
+        self.track_count = HyperLogLog(precision)
+        self.artist_plays = HeavyHitters(capacity)
+        self.artist_ms = HeavyHitters(capacity)
+        self.artist_skips = CountMinSketch()
+        self.track_plays = HeavyHitters(capacity)
+        self.track_info = None
+
+    @classmethod
+    def from_frame(cls, data, tz=None, **options):
+        agg = cls(**options)
+        agg.tz = tz
+        agg.update(data)
+        return agg
+
+    @classmethod
+    def from_chunks(cls, chunks, tz=None, **options):
+        agg = cls(**options)
+        agg.tz = tz
+        for chunk in chunks:
+            agg.update(chunk)
+        return agg
+
+    def _update_entities(self, chunk, minutes):
+        columns = pd.DataFrame({'ms': chunk['ms_played'].astype('int64'), 'skips': chunk['skipped'].astype('int64')})
+        artists = columns.groupby(chunk['artist_name'], observed=True).agg(
+            size=('ms', 'size'), sum=('ms', 'sum'), skips=('skips', 'sum')
+        )
+        artists.index = artists.index.astype(str)
+        hashes = hash_values(artists.index)
+        self.artist_count.add(hashes)
+        self.artist_plays.update(artists['size'])
+        self.artist_ms.update(artists['sum'])
+        self.artist_skips.add(hashes, artists['skips'].to_numpy())
+
+        tracks = track_totals(chunk, minutes)
+        tracks.index = tracks.index.astype(str)
+        self.track_count.add(hash_values(tracks['track_name'].astype(str).unique()))
+        self.track_plays.update(tracks['plays'])
+        self._keep_track_info(tracks.assign(plays_seen=tracks['plays']))
+
+    def _keep_track_info(self, tracks):
+        """Melipat detail lagu, hanya untuk lagu yang sedang dipantau."""
+        monitored = self.track_plays.monitored
+        tracks = tracks[tracks.index.isin(monitored)]
+        if self.track_info is not None:
+            tracks = pd.concat([self.track_info, tracks]).groupby(level=0).agg(_TRACK_INFO_FOLD)
+        self.track_info = tracks[tracks.index.isin(monitored)]
+
+    def _merge_entities(self, other):
+        self.artist_count.merge(other.artist_count)
+        self.track_count.merge(other.track_count)
+        self.artist_plays.merge(other.artist_plays)
+        self.artist_ms.merge(other.artist_ms)
+        self.artist_skips.merge(other.artist_skips)
+        self.track_plays.merge(other.track_plays)
+        if other.track_info is not None:
+            self._keep_track_info(other.track_info)
+
+    def top_artists(self, n=15, by='plays'):
+        if by == 'plays':
+            top = self.artist_plays.top(n)['estimate']
+        elif by == 'menit':
+            top = self.artist_ms.top(n)['estimate'] / _MS_PER_MINUTE
+        else:
+            raise ValueError(f"Kolom urutan tidak dikenal: {by}")
+        return top.rename(by).rename_axis('artist_name')
+
+    def top_artist_skips(self, n=15):
+        top = self.artist_plays.top(n)[['estimate']].rename(columns={'estimate': 'plays'})
+        # Count-Min tidak pernah kurang dari nilai sebenarnya, jadi dibatasi jumlah pemutaran
+        top['skips'] = np.minimum(self.artist_skips.estimate(hash_values(top.index)), top['plays'].to_numpy())
+        top['skip_rate'] = top['skips'] / top['plays']
+        return top.rename_axis('artist_name')
+
+    def top_tracks(self, n=15, by='plays'):
+        if by != 'plays':
+            raise ValueError(f"Mode perkiraan hanya mengurutkan lagu menurut plays, bukan {by}")
+        plays = self.track_plays.top(n)['estimate'].rename('plays')
+        info = self.track_info.reindex(plays.index)
+        top = info.drop(columns=['plays', 'plays_seen']).assign(plays=plays)[list(TRACK_FOLD)]
+        top['skip_rate'] = info['skips'] / info['plays_seen']
+        return top.rename_axis('track_key')
+
+    @property
+    def n_artists(self):
+        return round(self.artist_count.estimate())
+
+    @property
+    def n_tracks(self):
+        return round(self.track_count.estimate())
+
+    def error_bounds(self):
+        """Batas galat per metrik: relatif (~95%) untuk jumlah unik, absolut untuk hitungan teratas."""
+        return {
+            'n_artists': 2 * self.artist_count.relative_error,
+            'n_tracks': 2 * self.track_count.relative_error,
+            'artist_plays': self.artist_plays.error_bound,
+            'artist_menit': self.artist_ms.error_bound / _MS_PER_MINUTE,
+            'artist_skips': self.artist_skips.error_bound,
+            'track_plays': self.track_plays.error_bound,
+        }
+
+
+# Sketsa SketchAggregates yang ditulis ke berkas NPZ per pengguna
+SKETCH_FIELDS = {
+    'artist_count': HyperLogLog,
+    'track_count': HyperLogLog,
+    'artist_plays': HeavyHitters,
+    'artist_ms': HeavyHitters,
+    'artist_skips': CountMinSketch,
+    'track_plays': HeavyHitters,
+}
+
+
+def save_sketches(agg, path):
+    """Menulis semua sketsa ``agg`` ke satu berkas NPZ."""
+    arrays = {}
+    for name in SKETCH_FIELDS:
+        arrays.update(_pack(name, getattr(agg, name).to_arrays()))
+    np.savez(path, version=np.int64(SKETCH_VERSION), **arrays)
+
+
+def load_sketches(path):
+    """Membaca sketsa dari berkas NPZ sebagai dict nama -> sketsa, siap digabung dengan ``merge``."""
+    with np.load(path, allow_pickle=False) as arrays:
+        arrays = dict(arrays)
+    if int(arrays.pop('version')) != SKETCH_VERSION:
+        raise ValueError(f"Versi berkas sketsa tidak cocok dengan {SKETCH_VERSION}")
+    return {name: cls.from_arrays(_unpack(name, arrays)) for name, cls in SKETCH_FIELDS.items()}
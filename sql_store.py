@@ -0,0 +1,319 @@
+"""Penyimpanan riwayat di basis data SQL lokal (DuckDB, atau SQLite sebagai cadangan).
+
+Data yang sudah dibersihkan ditulis potongan demi potongan ke satu berkas
+basis data, lalu tab-tab dashboard dijawab dengan kueri agregat yang hanya
+mengembalikan hasil kecil (artis teratas, lagu teratas, kubus hari x jam,
+tren harian, tingkat skip). Riwayat lengkap tidak pernah berada di memori
+sekaligus, sehingga banyak pengguna bisa dilayani tanpa menyimpan DataFrame
+mereka.
+
+DuckDB dipakai bila terpasang (``pip install duckdb``): penyimpanannya
+kolumnar dan GROUP BY dijalankan paralel di semua inti CPU. Tanpa DuckDB
+dipakai ``sqlite3`` bawaan Python, yang berbasis baris dan satu thread.
+"""
+import os
+import pathlib
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from aggregates import CUBE_KEYS, MAX_DURATION_SECONDS, PLAYBACK_KEYS, ListeningAggregates
+from dimensions import track_key
+from ingest import DURATION_LABELS
+
+try:
+    import duckdb
+except ImportError:  # pragma: no cover - duckdb opsional
+    duckdb = None
+
+# Versi skema tabel plays; naikkan bila kolom atau isinya berubah
+SQL_VERSION = 2
+
+SQL_ENGINE = 'duckdb' if duckdb is not None else 'sqlite'
+SQL_SUFFIX = {'duckdb': '.duckdb', 'sqlite': '.sqlite'}[SQL_ENGINE]
+
+# Satu baris per pemutaran; kategori durasi disimpan sebagai kode (-1 = tanpa kategori)
+PLAYS_COLUMNS = {
+    'ts': 'BIGINT',
+    'tanggal': 'INTEGER',
+    'jam': 'SMALLINT',
+    'hari_ke': 'SMALLINT',
+    'akhir_pekan': 'BOOLEAN',
+    'ms_played': 'INTEGER',
+    'kategori_durasi': 'SMALLINT',
+    'skipped': 'BOOLEAN',
+    'shuffle': 'BOOLEAN',
+    'perangkat': 'VARCHAR',
+    'reason_start': 'VARCHAR',
+    'reason_end': 'VARCHAR',
+    'track_key': 'VARCHAR',
+    'track_name': 'VARCHAR',
+    'artist_name': 'VARCHAR',
+}
+
+# Tabel ringkasan yang dibangun sekali setelah plays terisi. Kueri tab membaca
+# tabel-tabel kecil ini, bukan memindai ulang seluruh pemutaran
+SUMMARY_TABLES = {
+    'cube': (
+        "SELECT tanggal, jam, hari_ke, akhir_pekan, COUNT(*) AS plays, SUM(ms_played) AS ms "
+        "FROM plays GROUP BY tanggal, jam, hari_ke, akhir_pekan"
+    ),
+    'playback': (
+        "SELECT jam, perangkat, shuffle, reason_start, reason_end, COUNT(*) AS plays, "
+        "SUM(CASE WHEN skipped THEN 1 ELSE 0 END) AS skips "
+        "FROM plays GROUP BY jam, perangkat, shuffle, reason_start, reason_end"
+    ),
+    'artists': (
+        "SELECT artist_name, COUNT(*) AS plays, SUM(ms_played) AS ms, "
+        "SUM(CASE WHEN skipped THEN 1 ELSE 0 END) AS skips FROM plays GROUP BY artist_name"
+    ),
+    # URI menentukan judul dan artis; MIN hanya memilih satu nilai per lagu
+    'tracks': (
+        "SELECT track_key, MIN(track_name) AS track_name, MIN(artist_name) AS artist_name, "
+        "COUNT(*) AS plays, SUM(ms_played) AS ms, SUM(CASE WHEN skipped THEN 1 ELSE 0 END) AS skips, "
+        "MIN(ts) AS first_ts, MAX(ts) AS last_ts FROM plays GROUP BY track_key"
+    ),
+    # Detik utuh dihitung tanpa pembagian integer agar sama di DuckDB dan SQLite
+    'durations': (
+        "SELECT (ms_played - ms_played % 1000) / 1000 AS detik, kategori_durasi, COUNT(*) AS jumlah "
+        "FROM plays GROUP BY 1, 2"
+    ),
+    'longest': (
+        "SELECT track_name, artist_name, ms_played FROM plays ORDER BY ms_played DESC LIMIT 10"
+    ),
+}
+
+# Kolom yang boleh dipakai untuk mengurutkan hasil teratas
+RANK_COLUMNS = ('plays', 'menit')
+
+_MS_PER_MINUTE = 1000 * 60
+
+
+def plays_rows(chunk):
+    """Kolom tabel plays dari satu potongan hasil clean_frame, bertipe primitif."""
+    return pd.DataFrame({
+        'ts': chunk['ts'].to_numpy().astype('int64'),
+        'tanggal': chunk['tanggal'],
+        'jam': chunk['jam'].astype('int16'),
+        'hari_ke': chunk['hari_ke'].astype('int16'),
+        'akhir_pekan': chunk['akhir_pekan'],
+        'ms_played': chunk['ms_played'],
+        'kategori_durasi': chunk['kategori_durasi'].cat.codes.astype('int16'),
+        'skipped': chunk['skipped'],
+        'shuffle': chunk['shuffle'],
+        'perangkat': chunk['perangkat'].astype(str),
+        'reason_start': chunk['reason_start'].astype(str),
+        'reason_end': chunk['reason_end'].astype(str),
+        'track_key': track_key(chunk).astype(str),
+        'track_name': chunk['track_name'].astype(str),
+        'artist_name': chunk['artist_name'].astype(str),
+    }, columns=list(PLAYS_COLUMNS))
+
+
+class SqlStore:
+    """Satu berkas basis data berisi tabel ``plays`` untuk satu dataset.
+
+    Objek ini hanya menyimpan path dan nama mesin sehingga bisa di-pickle
+    oleh ``st.cache_data``; koneksi baca-saja dibuka per kueri.
+    """
+
+    def __init__(self, path, engine=SQL_ENGINE):
+        self.path = path
+        self.engine = engine
+
+    @classmethod
+    def build(cls, path, chunks, engine=SQL_ENGINE):
+        """Mengisi basis data baru di ``path`` dari iterator potongan hasil clean_frame."""
+        # Berkas kosong (misalnya dari mkstemp) ditolak DuckDB sebagai basis data
+        if os.path.exists(path):
+            os.remove(path)
+        schema = ', '.join(f"{name} {sql_type}" for name, sql_type in PLAYS_COLUMNS.items())
+        placeholders = ', '.join('?' * len(PLAYS_COLUMNS))
+
+        if engine == 'duckdb':
+            con = duckdb.connect(path)
+        else:
+            con = sqlite3.connect(path)
+            # Berkas sementara; atomisitas dijamin oleh penggantian berkas setelah selesai
+            con.execute('PRAGMA journal_mode = OFF')
+            con.execute('PRAGMA synchronous = OFF')
+        try:
+            con.execute(f"CREATE TABLE plays ({schema})")
+            for chunk in chunks:
+                rows = plays_rows(chunk)
+                if engine == 'duckdb':
+                    con.register('chunk_rows', rows)
+                    con.execute('INSERT INTO plays SELECT * FROM chunk_rows')
+                    con.unregister('chunk_rows')
+                else:
+                    # tolist per kolom jauh lebih cepat daripada itertuples untuk membentuk tuple Python
+                    con.executemany(
+                        f"INSERT INTO plays VALUES ({placeholders})",
+                        zip(*(rows[column].tolist() for column in rows.columns))
+                    )
+            for name, select in SUMMARY_TABLES.items():
+                con.execute(f"CREATE TABLE {name} AS {select}")
+            con.commit()
+        finally:
+            con.close()
+        return cls(path, engine)
+
+    def query(self, sql, params=()):
+        """Menjalankan satu kueri baca-saja dan mengembalikan hasilnya sebagai DataFrame."""
+        if self.engine == 'duckdb':
+            con = duckdb.connect(self.path, read_only=True)
+            try:
+                return con.execute(sql, list(params)).df()
+            finally:
+                con.close()
+        con = sqlite3.connect(pathlib.Path(self.path).as_uri() + '?mode=ro', uri=True)
+        try:
+            return pd.read_sql_query(sql, con, params=params)
+        finally:
+            con.close()
+
+
+def _rank_column(by):
+    if by not in RANK_COLUMNS:
+        raise ValueError(f"Kolom urutan tidak dikenal: {by}")
+    return by
+
+
+class SqlAggregates(ListeningAggregates):
+    """Agregat yang tab-tabnya dijawab dengan kueri ke ``SqlStore``.
+
+    Hanya total, histogram durasi per detik, dan 10 pemutaran terpanjang
+    yang disimpan di objek. Tampilan kubus waktu, artis, dan lagu teratas
+    dihitung di basis data dari tabel ringkasan setiap kali diminta; hasil
+    per bagian di-memo oleh aplikasi sehingga kueri berjalan sekali per bagian.
+    """
+
+    def __init__(self, store, tz=None):
+        super().__init__()
+        self.store = store
+        self.tz = tz
+
+        totals = store.query(
+            "SELECT SUM(plays) AS plays, COALESCE(SUM(ms), 0) AS ms, "
+            "MIN(tanggal) AS first_day, MAX(tanggal) AS last_day, "
+            "(SELECT MIN(first_ts) FROM tracks) AS first_ts, (SELECT MAX(last_ts) FROM tracks) AS last_ts, "
+            "(SELECT COUNT(*) FROM artists) AS n_artists, "
+            "(SELECT COUNT(DISTINCT track_name) FROM tracks) AS n_tracks FROM cube"
+        ).iloc[0]
+        self.total_plays = int(totals['plays']) if pd.notna(totals['plays']) else 0
+        self.total_minutes = float(totals['ms']) / _MS_PER_MINUTE
+        if self.total_plays:
+            self.first_ts = pd.Timestamp(int(totals['first_ts']))
+            self.last_ts = pd.Timestamp(int(totals['last_ts']))
+            self._total_days = int(totals['last_day']) - int(totals['first_day']) + 1
+        else:
+            self._total_days = 0
+        self._n_artists = int(totals['n_artists'])
+        self._n_tracks = int(totals['n_tracks'])
+
+        durations = store.query("SELECT detik, kategori_durasi, jumlah FROM durations")
+        counts = durations['jumlah'].to_numpy().astype(np.int64)
+        seconds = durations['detik'].to_numpy().astype(np.int64).clip(0, MAX_DURATION_SECONDS)
+        np.add.at(self.duration_seconds, seconds, counts)
+
+        codes = durations['kategori_durasi'].to_numpy().astype(np.int64)
+        per_category = np.bincount(codes[codes >= 0], weights=counts[codes >= 0], minlength=len(DURATION_LABELS))
+        self.duration_category_plays = pd.Series(
+            per_category.astype(np.int64),
+            index=pd.Index(DURATION_LABELS, name='kategori_durasi'),
+            name='count',
+        )
+
+        self.longest_plays = store.query(
+            f"SELECT track_name, artist_name, ms_played / {_MS_PER_MINUTE}.0 AS menit_diputar "
+            "FROM longest ORDER BY ms_played DESC"
+        )
+
+    def totals_by(self, *keys):
+        """Total pemutaran dan menit per kombinasi ``keys``, dihitung dengan GROUP BY."""
+        unknown = set(keys) - set(CUBE_KEYS)
+        if unknown:
+            raise ValueError(f"Dimensi tidak dikenal: {', '.join(sorted(unknown))}")
+        columns = ', '.join(keys)
+        totals = self.store.query(
+            f"SELECT {columns}, SUM(plays) AS plays, SUM(ms) / {_MS_PER_MINUTE}.0 AS menit "
+            f"FROM cube GROUP BY {columns} ORDER BY {columns}"
+        )
+        if 'akhir_pekan' in totals:
+            totals['akhir_pekan'] = totals['akhir_pekan'].astype(bool)
+        totals['plays'] = totals['plays'].astype(np.int64)
+        return totals.set_index(list(keys))
+
+    def playback_by(self, *keys):
+        """Pemutaran, skip, dan tingkat skip per kombinasi ``keys`` dari tabel playback."""
+        unknown = set(keys) - set(PLAYBACK_KEYS)
+        if unknown:
+            raise ValueError(f"Dimensi tidak dikenal: {', '.join(sorted(unknown))}")
+        columns = ', '.join(keys)
+        totals = self.store.query(
+            f"SELECT {columns}, SUM(plays) AS plays, SUM(skips) AS skips "
+            f"FROM playback GROUP BY {columns} ORDER BY {columns}"
+        )
+        if 'shuffle' in totals:
+            totals['shuffle'] = totals['shuffle'].astype(bool)
+        totals[['plays', 'skips']] = totals[['plays', 'skips']].astype(np.int64)
+        totals['skip_rate'] = totals['skips'] / totals['plays']
+        return totals.set_index(list(keys))
+
+    def top_artists(self, n=15, by='plays'):
+        by = _rank_column(by)
+        top = self.store.query(
+            f"SELECT artist_name, plays, ms / {_MS_PER_MINUTE}.0 AS menit "
+            f"FROM artists ORDER BY {by} DESC, artist_name LIMIT ?",
+            (int(n),)
+        )
+        return top.set_index('artist_name')[by]
+
+    def top_artist_skips(self, n=15):
+        top = self.store.query(
+            "SELECT artist_name, plays, skips FROM artists ORDER BY plays DESC, artist_name LIMIT ?", (int(n),)
+        ).set_index('artist_name')
+        top['skip_rate'] = top['skips'] / top['plays']
+        return top
+
+    def artist_day_totals(self, artists):
+        """Pemutaran dan menit per (tanggal, artis) untuk ``artists``, langsung dari tabel plays."""
+        artists = list(artists)
+        if not artists:
+            return pd.DataFrame(
+                {'plays': [], 'menit': []}, index=pd.MultiIndex.from_arrays([[], []], names=['tanggal', 'artist_name'])
+            )
+        placeholders = ', '.join('?' * len(artists))
+        totals = self.store.query(
+            f"SELECT tanggal, artist_name, COUNT(*) AS plays, SUM(ms_played) / {_MS_PER_MINUTE}.0 AS menit "
+            f"FROM plays WHERE artist_name IN ({placeholders}) GROUP BY tanggal, artist_name",
+            artists
+        )
+        totals['plays'] = totals['plays'].astype(np.int64)
+        return totals.set_index(['tanggal', 'artist_name'])
+
+    def top_tracks(self, n=15, by='plays'):
+        by = _rank_column(by)
+        top = self.store.query(
+            f"SELECT track_key, track_name, artist_name, plays, ms / {_MS_PER_MINUTE}.0 AS menit, "
+            "skips, first_ts, last_ts "
+            f"FROM tracks ORDER BY {by} DESC, track_key LIMIT ?",
+            (int(n),)
+        ).set_index('track_key')
+        top['first_ts'] = pd.to_datetime(top['first_ts'].astype(np.int64))
+        top['last_ts'] = pd.to_datetime(top['last_ts'].astype(np.int64))
+        top['skip_rate'] = top['skips'] / top['plays']
+        return top
+
+    @property
+    def n_artists(self):
+        return self._n_artists
+
+    @property
+    def n_tracks(self):
+        return self._n_tracks
+
+    @property
+    def total_days(self):
+        return self._total_days
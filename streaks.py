@@ -0,0 +1,138 @@
+"""Rangkaian beruntun dengan run-length encoding: hari beruntun, lagu diulang, dan binge artis.
+
+Setiap ukuran adalah run dari kode integer yang terurut menurut ``ts``:
+
+- nomor hari lokal yang punya pemutaran: hari berurutan membentuk rangkaian;
+- kunci lagu: lagu yang sama diputar berturut-turut;
+- kunci artis: binge, yaitu N pemutaran atau lebih dari satu artis tanpa selingan.
+
+Batas run dicari sekali dengan ``np.flatnonzero`` atas perubahan kode, dan
+menit per run dengan ``np.add.reduceat``, tanpa loop Python per baris. Hanya
+run yang cukup panjang yang disimpan, sehingga hasilnya kecil dan di-cache
+di disk bersama data yang sudah dibersihkan.
+"""
+import numpy as np
+import pandas as pd
+
+from calendar_features import day_number
+from dimensions import Dimensions
+
+# Versi struktur rangkaian untuk cache di disk; naikkan bila atribut berubah
+STREAKS_VERSION = 1
+
+# Binge default: jumlah pemutaran berturut-turut minimal dari satu artis
+BINGE_MIN_PLAYS = 5
+
+# Run artis terpendek yang disimpan; batas binge di panel tidak bisa lebih kecil
+MIN_STORED_BINGE = 3
+
+# Lagu diulang: minimal dua pemutaran berturut-turut
+MIN_REPEAT_PLAYS = 2
+
+_MS_PER_MINUTE = 1000 * 60
+
+
+def run_starts(codes):
+    """Posisi awal dan panjang setiap run nilai yang sama berturut-turut."""
+    codes = np.asarray(codes)
+    if len(codes) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    starts = np.concatenate([[0], np.flatnonzero(codes[1:] != codes[:-1]) + 1])
+    return starts, np.diff(np.append(starts, len(codes)))
+
+
+def day_runs(days):
+    """Hari pertama dan panjang setiap rangkaian hari berurutan, dari nomor hari unik yang terurut.
+
+    Di dalam satu rangkaian ``hari - posisi`` tetap, jadi rangkaian adalah run nilai tersebut.
+    """
+    days = np.asarray(days, dtype=np.int64)
+    starts, lengths = run_starts(days - np.arange(len(days)))
+    return days[starts], lengths
+
+
+def _run_table(codes, ts, day, ms, min_plays):
+    """Run kode dengan panjang minimal ``min_plays`` dan kunci aslinya, diberi kode ulang 0..k-1."""
+    starts, lengths = run_starts(codes)
+    keep = lengths >= min_plays
+    ends = (starts + lengths - 1)[keep]
+    played = np.add.reduceat(ms, starts)[keep] if len(starts) else np.empty(0)
+    keys, inverse = np.unique(codes[starts[keep]], return_inverse=True)
+    starts = starts[keep]
+    table = pd.DataFrame({
+        # ts adalah waktu lagu berhenti; run dimulai saat pemutaran pertamanya dimulai
+        'mulai': (ts[starts] - ms[starts] * 1_000_000).view('datetime64[ns]'),
+        'selesai': ts[ends].view('datetime64[ns]'),
+        'tanggal': day[starts],
+        'jumlah_putar': lengths[keep].astype(np.int32),
+        'menit_diputar': (played / _MS_PER_MINUTE).astype(np.float32),
+        'kode': inverse.astype(np.int32),
+    })
+    return table, keys
+
+
+class ListeningStreaks:
+    """Hari aktif, run lagu diulang, dan run artis dari seluruh riwayat.
+
+    ``repeats`` dan ``binges`` terurut waktu; kolom ``kode`` menunjuk baris
+    ``track_labels`` (judul, artis) atau posisi di ``artist_labels``.
+    """
+
+    def __init__(self):
+        self.tz = None
+        # Nomor hari lokal yang punya pemutaran, terurut
+        self.days = np.empty(0, dtype=np.int32)
+        self.repeats = None
+        self.binges = None
+        self.track_labels = None
+        self.artist_labels = None
+
+    @classmethod
+    def from_frame(cls, data, tz=None):
+        """Membangun rangkaian dari DataFrame yang sudah dibersihkan."""
+        return cls.from_chunks([data], tz)
+
+    @classmethod
+    def from_chunks(cls, chunks, tz=None):
+        """Membangun rangkaian dari iterator potongan; per baris hanya kode integer yang dikumpulkan."""
+        dims = Dimensions()
+        columns = {name: [] for name in ('ts', 'day', 'ms', 'artist', 'track')}
+        for chunk in chunks:
+            if len(chunk) == 0:
+                continue
+            artist, track = dims.encode(chunk)
+            columns['ts'].append(chunk['ts'].to_numpy().astype('datetime64[ns]').view('int64'))
+            columns['day'].append(chunk['tanggal'].to_numpy().astype(np.int32))
+            columns['ms'].append(chunk['ms_played'].to_numpy().astype(np.int64))
+            columns['artist'].append(artist)
+            columns['track'].append(track)
+        dtypes = {'ts': np.int64, 'day': np.int32, 'ms': np.int64, 'artist': np.int32, 'track': np.int32}
+        rows = {
+            name: np.concatenate(parts) if parts else np.empty(0, dtype=dtypes[name])
+            for name, parts in columns.items()
+        }
+
+        # Ekspor umumnya sudah urut waktu; pengurutan hanya bila perlu
+        ts = rows['ts']
+        if len(ts) and np.any(ts[1:] < ts[:-1]):
+            order = np.argsort(ts, kind='stable')
+            rows = {name: values[order] for name, values in rows.items()}
+
+        streaks = cls()
+        streaks.tz = tz
+        streaks.days = np.unique(rows['day']).astype(np.int32)
+        run_rows = rows['ts'], rows['day'], rows['ms']
+        streaks.repeats, tracks = _run_table(rows['track'], *run_rows, MIN_REPEAT_PLAYS)
+        streaks.track_labels = dims.track_table(tracks).reset_index(drop=True)
+        streaks.binges, artists = _run_table(rows['artist'], *run_rows, MIN_STORED_BINGE)
+        streaks.artist_labels = pd.Index(dims.artist_names(artists).astype(str), name='artist_name')
+        return streaks
+
+    def between(self, start_date=None, end_date=None):
+        """Hari aktif, lagu diulang, dan run artis yang dimulai dalam rentang tanggal lokal (inklusif)."""
+        lo = -np.inf if start_date is None else day_number(start_date)
+        hi = np.inf if end_date is None else day_number(end_date)
+        days = self.days[(self.days >= lo) & (self.days <= hi)]
+        repeats = self.repeats[self.repeats['tanggal'].between(lo, hi)]
+        binges = self.binges[self.binges['tanggal'].between(lo, hi)]
+        return days, repeats, binges